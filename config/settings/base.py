@@ -23,6 +23,7 @@ DJANGO_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 ]
 THIRD_PARTY_APPS = [
     'django_extensions',
@@ -35,6 +36,8 @@ LOCAL_APPS = [
     'hittalaget.teams.apps.TeamsConfig',
     'hittalaget.ads.apps.AdsConfig',
     'hittalaget.conversations.apps.ConversationsConfig',
+    'hittalaget.stats.apps.StatsConfig',
+    'hittalaget.deletions.apps.DeletionsConfig',
 ]
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
@@ -44,6 +47,8 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 MIDDLEWARE = [
     'debug_toolbar.middleware.DebugToolbarMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
+    'hittalaget.core.middleware.MicroCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -73,6 +78,9 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            'libraries': {
+                'fragments': 'hittalaget.core.templatetags.fragments',
+            },
         },
     },
 ]
@@ -90,11 +98,68 @@ USE_TZ = True
 # AUTHENTICATION
 # --------------------------------------------------------------------
 AUTH_USER_MODEL = 'users.User'
+AUTHENTICATION_BACKENDS = [
+    'hittalaget.users.backends.CachedModelBackend',
+    # Sessions from before CachedModelBackend, until they log in again.
+    'django.contrib.auth.backends.ModelBackend',
+]
 LOGIN_URL = 'user:login'
 LOGIN_REDIRECT_URL = 'user:redirect'
 LOGOUT_REDIRECT_URL = LOGIN_URL
 
 
+# CACHES
+# --------------------------------------------------------------------
+# Local memory by default, so nothing external is needed. It is per
+# process, so production.py requires CACHE_BACKEND and CACHE_LOCATION to
+# be set to a shared cache, e.g. django.core.cache.backends.memcached.MemcachedCache.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='hittalaget'),
+    }
+}
+
+
+# SESSIONS
+# --------------------------------------------------------------------
+SESSION_ENGINE = 'hittalaget.users.sessions'
+SESSION_WRITE_BEHIND = 60  # seconds, see hittalaget/users/sessions.py
+
+
+# REVERSE PROXY PURGING (hittalaget/core/purge.py)
+# --------------------------------------------------------------------
+SURROGATE_PURGE_BACKEND = 'hittalaget.core.purge.LocalPurgeSink'
+
+
+# FRAGMENTS (hittalaget/core/templatetags/fragments.py)
+# --------------------------------------------------------------------
+FRAGMENT_INCLUDES = 'js'  # or 'esi' behind a proxy that processes ESI
+
+
+# CACHE WARMING (hittalaget/stats/management/commands/warm_caches.py)
+# --------------------------------------------------------------------
+# The host and scheme the pages are rendered for. The feeds link to it,
+# and it must be in ALLOWED_HOSTS.
+WARM_UP_HOST = config('WARM_UP_HOST', default='localhost')
+WARM_UP_SECURE = config('WARM_UP_SECURE', default=False, cast=bool)
+
+
+# MICRO CACHE (hittalaget/core/middleware.py)
+# --------------------------------------------------------------------
+MICRO_CACHE_TIMEOUT = 0  # seconds, 0 disables it, see production.py
+MICRO_CACHE_STALE = 60
+MICRO_CACHE_LOCK_TIMEOUT = 10
+MICRO_CACHE_VIEWS = [
+    'index',
+    'about',
+    'contact',
+    'ad:list',
+    'team:detail',
+    'player:detail',
+]
+
+
 
 
 
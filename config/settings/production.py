@@ -26,6 +26,19 @@ DATABASES = {
 }
 
 
+# CACHES
+# --------------------------------------------------------------------
+# Required, without the local memory default from base.py: sessions are
+# written behind through the cache (hittalaget/users/sessions.py), so
+# every process must share it.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND'),
+        'LOCATION': config('CACHE_LOCATION'),
+    }
+}
+
+
 # PASSWORDS
 # --------------------------------------------------------------------
 AUTH_PASSWORD_VALIDATORS = [
@@ -44,6 +57,28 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# REVERSE PROXY PURGING
+# --------------------------------------------------------------------
+SURROGATE_PURGE_BACKEND = 'hittalaget.core.purge.HttpPurger'
+SURROGATE_PURGE_URL = config('SURROGATE_PURGE_URL')
+
+
+# FRAGMENTS
+# --------------------------------------------------------------------
+FRAGMENT_INCLUDES = config('FRAGMENT_INCLUDES', default='js')
+
+
+# CACHE WARMING
+# --------------------------------------------------------------------
+WARM_UP_HOST = config('WARM_UP_HOST')
+WARM_UP_SECURE = config('WARM_UP_SECURE', default=True, cast=bool)
+
+
+# MICRO CACHE
+# --------------------------------------------------------------------
+MICRO_CACHE_TIMEOUT = 5
+
+
 # STATIC FILES (CSS, JS, IMAGES)
 # --------------------------------------------------------------------
 STATIC_ROOT = BASE_DIR / "hittalaget" / "staticfiles"
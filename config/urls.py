@@ -8,6 +8,7 @@ from django.contrib.auth.views import (
 from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import TemplateView
+from hittalaget.stats.views import IndexView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -18,13 +19,14 @@ urlpatterns = [
     path('lag/', include('hittalaget.teams.urls', namespace="team")),
     path('annonser/', include('hittalaget.ads.urls', namespace="ad")),
     path('konversationer/', include('hittalaget.conversations.urls', namespace="conversation")),
+    path('api/', include('hittalaget.api.urls', namespace="api")),
 
     path('reset-password/', PasswordResetView.as_view(), name="password_reset"),
     path('reset-password/email-sent/', PasswordResetDoneView.as_view(), name="password_reset_done"),
     path('reset-password/<uidb64>/<token>/', PasswordResetConfirmView.as_view(), name="password_reset_confirm"),
     path('reset-password/done/', PasswordResetCompleteView.as_view(), name="password_reset_complete"),
 
-    path('', TemplateView.as_view(template_name="pages/index.html"), name="index"),
+    path('', IndexView.as_view(), name="index"),
     path('', include('hittalaget.users.urls', namespace="user")),
 ]
 
@@ -1,3 +1,58 @@
-from django.contrib import admin
+import io
 
-# Register your models here.
+from django.contrib import admin, messages
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from hittalaget.core.pagination import EstimatedCountPaginator
+from .forms import AdImportForm
+from .importer import AdImportError, import_ads, read_rows
+from .models import Ad
+
+
+@admin.register(Ad)
+class AdAdmin(admin.ModelAdmin):
+    list_display = ['title', 'ad_id', 'sport', 'created_at', 'expires_at', 'is_expired']
+    list_filter = ['sport', 'is_expired']
+    search_fields = ['title', 'ad_id']
+    change_list_template = "admin/ads/ad/change_list.html"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_urls(self):
+        urls = [
+            path("importera/", self.admin_site.admin_view(self.import_view), name="ads_ad_import"),
+        ]
+        return urls + super().get_urls()
+
+    def import_view(self, request):
+        ''' Upload a CSV or JSONL file and create its ads with importer.import_ads. '''
+        if not self.has_add_permission(request):
+            return redirect("admin:ads_ad_changelist")
+
+        form = AdImportForm(request.POST or None, request.FILES or None)
+
+        if request.method == "POST" and form.is_valid():
+            f = form.cleaned_data['file']
+            file_format = f.name.rsplit(".", 1)[1].lower()
+
+            try:
+                rows = read_rows(io.TextIOWrapper(f.file, encoding="utf-8", newline=""), file_format)
+                count, seconds = import_ads(rows)
+            except (AdImportError, UnicodeDecodeError) as e:
+                form.add_error('file', str(e))
+            else:
+                self.message_user(
+                    request,
+                    "{} annonser importerades på {:.2f}s.".format(count, seconds),
+                    messages.SUCCESS,
+                )
+                return redirect("admin:ads_ad_changelist")
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Importera annonser",
+            "form": form,
+        }
+        return TemplateResponse(request, "admin/ads/ad/import.html", context)
@@ -0,0 +1,20 @@
+from hittalaget.core.cache import bump_cache_version, get_cache_version
+
+
+'''
+Every sport has a feed version (see core/cache.py): the time of the last
+change to one of its ads. Cached feeds are stored under a key that
+includes the version, so bumping it is all it takes to invalidate them.
+'''
+
+
+def feed_version_name(sport):
+    return "ads:feed:{}".format(sport)
+
+
+def bump_feed_version(sport):
+    return bump_cache_version(feed_version_name(sport))
+
+
+def get_feed_version(sport):
+    return get_cache_version(feed_version_name(sport))
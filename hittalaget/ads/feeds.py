@@ -0,0 +1,97 @@
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date, quote_etag
+from django.views.generic import View
+from .cache import get_feed_version
+from .form_choices import football_positions
+from .models import Ad
+
+
+FEED_LENGTH = 50
+FEED_TIMEOUT = 60 * 60
+
+
+class AdFeed(Feed):
+    ''' Atom feed with the newest live ads of a sport, optionally for one position. '''
+    feed_type = Atom1Feed
+
+    def get_object(self, request, sport, position=None):
+        return {"sport": sport, "position": position}
+
+    def title(self, obj):
+        if obj['position']:
+            return "Nya annonser: {}, {}".format(obj['sport'], obj['position'])
+        return "Nya annonser: {}".format(obj['sport'])
+
+    def link(self, obj):
+        return reverse("ad:list", kwargs={"sport": obj['sport']})
+
+    def subtitle(self, obj):
+        return "Lag som söker spelare på hittalaget."
+
+    def items(self, obj):
+        queryset = Ad.objects.live().filter(sport=obj['sport']).select_related('team')
+        if obj['position']:
+            queryset = queryset.filter(positions=obj['position'])
+        return queryset.order_by('-created_at', '-id')[:FEED_LENGTH]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.description
+
+    def item_author_name(self, item):
+        return item.team.name
+
+    def item_pubdate(self, item):
+        return item.created_at
+
+
+class AdFeedView(View):
+    '''
+    Serves AdFeed from the cache. The cache key, ETag and Last-Modified
+    all derive from the sport's feed version (see cache.py), so pollers
+    get a 304 without any query until an ad of that sport changes.
+    '''
+    feed = AdFeed()
+
+    positions = {
+        "fotboll": football_positions,
+    }
+
+    def get(self, request, *args, **kwargs):
+        sport = kwargs['sport']
+        position = kwargs.get('position')
+
+        try:
+            positions = [value for value, label in self.positions[sport]]
+        except KeyError:
+            raise Http404()
+
+        if position is not None and position not in positions:
+            raise Http404()
+
+        version = get_feed_version(sport)
+        etag = quote_etag("{}-{}-{}".format(sport, position or "alla", version))
+        last_modified = version // 10**6
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+        if response is None:
+            key = "ads:feed:{}:{}:{}".format(sport, position, version)
+            content = cache.get(key)
+
+            if content is None:
+                content = self.feed(request, sport=sport, position=position).content
+                cache.set(key, content, FEED_TIMEOUT)
+
+            response = HttpResponse(content, content_type="application/atom+xml; charset=utf-8")
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
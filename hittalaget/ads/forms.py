@@ -2,6 +2,7 @@ from django import forms
 from django.core.exceptions import ValidationError
 from django.http import Http404
 from .models import Ad
+from hittalaget.users.models import City
 from .form_choices import (
     football_positions,
     football_min_experience,
@@ -11,29 +12,35 @@ from .form_choices import (
 import datetime
 
 
+''' The choices of each sport, built once rather than for every form. '''
+CHOICES = {
+    "fotboll": {
+        "positions": football_positions,
+        "min_experience": football_min_experience,
+        "special_ability": football_special_ability,
+    },
+}
+
+FILTER_CHOICES = {
+    sport: {field: [("", "Alla")] + choices for field, choices in fields.items()}
+    for sport, fields in CHOICES.items()
+}
+
+
 class AdForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         sport = kwargs.pop('sport')
         super().__init__(*args, **kwargs)
 
-        positions = {
-            "fotboll": football_positions,
-        }
-        min_experience = {
-            "fotboll": football_min_experience,
-        }
-        special_ability = {
-            "fotboll": football_special_ability,
-        }
-
         try:
-            self.fields['positions'].widget = forms.Select(choices=positions[sport])
-            self.fields['min_experience'].widget = forms.Select(choices=min_experience[sport])
-            self.fields['special_ability'].widget = forms.Select(choices=special_ability[sport])
+            choices = CHOICES[sport]
         except KeyError:
             raise Http404()
 
+        for field, field_choices in choices.items():
+            self.fields[field].widget = forms.Select(choices=field_choices)
+
     
     class Meta:
         model = Ad
@@ -67,6 +74,80 @@ class AdForm(forms.ModelForm):
         }
 
 
+class AdFilterForm(forms.Form):
+    ''' Optional GET filters for AdListView. Field names match the Ad fields. '''
+    positions = forms.ChoiceField(required=False, label="Position:")
+    min_experience = forms.ChoiceField(required=False, label="Lägsta erfarenhet:")
+    special_ability = forms.ChoiceField(required=False, label="Spetsegenskap:")
+    distance = forms.TypedChoiceField(
+        required=False,
+        coerce=int,
+        empty_value=None,
+        label="Avstånd:",
+        choices=[
+            ("", "Hela Sverige"),
+            ("10", "Inom 1 mil"),
+            ("25", "Inom 2,5 mil"),
+            ("50", "Inom 5 mil"),
+            ("100", "Inom 10 mil"),
+        ],
+    )
+
+    order = forms.ChoiceField(
+        required=False,
+        label="Sortera:",
+        choices=[
+            ("", "Nyast"),
+            ("trending", "Populärast"),
+        ],
+    )
+
+    def __init__(self, *args, **kwargs):
+        ''' The distance filter is measured from `city`, and is only shown if one is given. '''
+        sport = kwargs.pop('sport')
+        self.city = kwargs.pop('city', None)
+        super().__init__(*args, **kwargs)
+
+        if self.city is None:
+            del self.fields['distance']
+
+        try:
+            choices = FILTER_CHOICES[sport]
+        except KeyError:
+            raise Http404()
+
+        for field, field_choices in choices.items():
+            self.fields[field].choices = field_choices
+
+    def get_filters(self):
+        ''' Return the chosen filters as Ad queryset lookups. '''
+        if not self.is_valid():
+            return {}
+        filters = {field: value for field, value in self.cleaned_data.items() if value}
+        filters.pop('order', None)
+        distance = filters.pop('distance', None)
+        if distance:
+            filters['team__city__in'] = City.objects.near(self.city, distance)
+        return filters
+
+    def get_ordering(self):
+        ''' The Ad field to order (and paginate) by, descending. '''
+        if self.is_valid() and self.cleaned_data['order'] == "trending":
+            return "trending_score"
+        return "created_at"
+
+
+class AdImportForm(forms.Form):
+    ''' Used by the import view in the ad admin. '''
+    file = forms.FileField(label="Fil (.csv eller .jsonl)")
+
+    def clean_file(self):
+        f = self.cleaned_data['file']
+        if not f.name.lower().endswith((".csv", ".jsonl")):
+            raise ValidationError("Filen måste vara en .csv eller .jsonl fil.")
+        return f
+
+
 '''
 AdForm
 
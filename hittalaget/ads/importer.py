@@ -0,0 +1,185 @@
+import csv
+import json
+import random
+import time
+
+from django.db import IntegrityError, transaction
+from django.utils.text import slugify
+from hittalaget.core.cache import bump_model_version
+from hittalaget.core.purge import purge, surrogate_key
+from hittalaget.core.versioning import VERSION_BUMP
+from hittalaget.stats.counters import reconcile_ads, reconcile_sports, reconcile_teams
+from hittalaget.teams.models import Team
+from .cache import bump_feed_version
+from .form_choices import (
+    football_positions,
+    football_min_experience,
+    football_special_ability,
+)
+from .models import Ad, ad_search_vector, ad_title
+
+
+'''
+Bulk import of ads, used by the import_ads command and the ad admin.
+
+Ads are created with bulk_create, so none of the pre_save/post_save
+signals in models.py run. Everything they do is done here for the whole
+batch instead: titles and slugs are computed in memory, ad_ids are
+allocated with a few IN queries, search vectors are written with one
+UPDATE per chunk and feed and model versions (see core/cache.py) are
+bumped once.
+'''
+
+FIELDS = ['team_id', 'description', 'positions', 'min_experience', 'special_ability']
+
+CHOICES = {
+    "fotboll": {
+        "positions": {value for value, label in football_positions},
+        "min_experience": {value for value, label in football_min_experience},
+        "special_ability": {value for value, label in football_special_ability},
+    },
+}
+
+
+ATTEMPTS = 3  # per chunk, see create_chunk()
+
+
+class AdImportError(Exception):
+    pass
+
+
+def read_rows(f, file_format):
+    ''' Read rows (dicts) from a text file in the "csv" or "jsonl" format. '''
+    if file_format == "csv":
+        try:
+            return list(csv.DictReader(f))
+        except csv.Error as e:
+            raise AdImportError("Ogiltig CSV: {}".format(e))
+
+    if file_format == "jsonl":
+        rows = []
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                raise AdImportError("Rad {}: ogiltig JSON.".format(line_number))
+        return rows
+
+    raise AdImportError("Okänt format: {}".format(file_format))
+
+
+def build_ads(rows):
+    ''' Validate the rows and return unsaved Ad objects. Raises AdImportError. '''
+    try:
+        team_ids = {int(row['team_id']) for row in rows}
+    except (KeyError, TypeError, ValueError):
+        raise AdImportError("Varje rad måste ha ett giltigt team_id.")
+
+    teams = Team.objects.in_bulk(team_ids, field_name='team_id')
+    ads = []
+
+    for line_number, row in enumerate(rows, 1):
+        missing = [field for field in FIELDS if not row.get(field)]
+        if missing:
+            raise AdImportError("Rad {}: saknar {}.".format(line_number, ", ".join(missing)))
+
+        team = teams.get(int(row['team_id']))
+        if team is None:
+            raise AdImportError("Rad {}: laget {} finns inte.".format(line_number, row['team_id']))
+
+        for field, values in CHOICES[team.sport].items():
+            if row[field] not in values:
+                raise AdImportError("Rad {}: ogiltigt värde för {}.".format(line_number, field))
+
+        title = ad_title(team, row['positions'])
+        ads.append(Ad(
+            team=team,
+            sport=team.sport,
+            title=title,
+            slug=slugify(title),
+            description=row['description'],
+            positions=row['positions'],
+            min_experience=row['min_experience'],
+            special_ability=row['special_ability'],
+        ))
+
+    return ads
+
+
+def allocate_ad_ids(count):
+    '''
+    Return `count` unused six digit ad_ids. Candidates are drawn in bulk
+    and checked against the table with one IN query per round.
+    '''
+    ad_ids = set()
+
+    while len(ad_ids) < count:
+        candidates = set(random.sample(range(100000, 1000000), count - len(ad_ids))) - ad_ids
+        taken = Ad.all_objects.filter(ad_id__in=candidates).values_list('ad_id', flat=True)
+        ad_ids |= candidates - set(taken)
+
+    return list(ad_ids)
+
+
+def create_chunk(chunk, imported):
+    '''
+    Create the ads of one chunk in one transaction. A concurrent import can
+    take some of the allocated ad_ids before the chunk is written, which
+    fails the unique constraint; the chunk is then retried with new ad_ids.
+    '''
+    for attempt in range(ATTEMPTS):
+        try:
+            with transaction.atomic():
+                Ad.objects.bulk_create(chunk)
+                Ad.objects.filter(id__in=[ad.id for ad in chunk]).update(search_vector=ad_search_vector())
+                reconcile_ads([ad.id for ad in chunk])
+            return
+        except IntegrityError:
+            for ad, ad_id in zip(chunk, allocate_ad_ids(len(chunk))):
+                ad.pk = None
+                ad.ad_id = ad_id
+
+    raise AdImportError("Kunde inte spara annonserna efter {} försök, {} annonser importerades.".format(ATTEMPTS, imported))
+
+
+def import_ads(rows, batch_size=1000):
+    ''' Create ads from the rows. Returns (number of ads, seconds taken). '''
+    start = time.monotonic()
+    ads = build_ads(rows)
+
+    for ad, ad_id in zip(ads, allocate_ad_ids(len(ads))):
+        ad.ad_id = ad_id
+
+    imported = []
+    try:
+        for i in range(0, len(ads), batch_size):
+            create_chunk(ads[i:i + batch_size], imported=len(imported))
+            imported.extend(ads[i:i + batch_size])
+    finally:
+        ''' Also after a failed chunk, for the chunks that were committed. '''
+        if imported:
+            update_teams_and_caches(imported)
+
+    return len(ads), time.monotonic() - start
+
+
+def update_teams_and_caches(ads):
+    ''' What the signals would have done for the imported ads. '''
+    team_ids = {ad.team_id for ad in ads}
+    Team.objects.filter(id__in=team_ids, is_looking=False).update(
+        is_looking=True,
+        version=VERSION_BUMP,
+    )
+    reconcile_teams(team_ids)
+    reconcile_sports({ad.sport for ad in ads})
+
+    bump_model_version(Ad)
+    bump_model_version(Team)
+    purge(
+        [surrogate_key("team", team_id) for team_id in team_ids] +
+        [surrogate_key("ad-list", ad.sport) for ad in ads]
+    )
+    for sport in {ad.sport for ad in ads}:
+        bump_feed_version(sport)
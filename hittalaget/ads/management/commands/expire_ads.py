@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from hittalaget.ads.cache import bump_feed_version
+from hittalaget.ads.models import Ad
+from hittalaget.conversations.models import AdConversation
+from hittalaget.core.cache import bump_model_version
+from hittalaget.core.purge import purge, surrogate_key
+from hittalaget.core.versioning import VERSION_BUMP
+from hittalaget.stats.counters import reconcile_ads, reconcile_sports, reconcile_teams
+from hittalaget.teams.models import Team
+
+
+class Command(BaseCommand):
+    help = (
+        "Expire ads whose expires_at has passed, in batches. Closes their "
+        "active conversations and recomputes is_looking for their teams. "
+        "Meant to be run periodically, e.g. from cron every 10 minutes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        now = timezone.now()
+        expired = 0
+
+        while True:
+            count = self.expire_batch(now, batch_size)
+            if not count:
+                break
+            expired += count
+
+        self.stdout.write(self.style.SUCCESS("{} ads expired.".format(expired)))
+
+    @transaction.atomic
+    def expire_batch(self, now, batch_size):
+        '''
+        Expire at most batch_size ads in one transaction, so that no
+        single run holds locks on a large number of rows. Rows locked by
+        someone else are skipped and picked up by the next run.
+        '''
+        batch = list(
+            Ad.objects.live()
+            .filter(expires_at__lte=now)
+            .order_by('expires_at')
+            .select_for_update(skip_locked=True)
+            .values_list('id', 'team_id', 'sport')[:batch_size]
+        )
+
+        if not batch:
+            return 0
+
+        ad_ids = [ad_id for ad_id, team_id, sport in batch]
+        team_ids = {team_id for ad_id, team_id, sport in batch}
+        sports = {sport for ad_id, team_id, sport in batch}
+
+        Ad.objects.filter(id__in=ad_ids).update(is_expired=True, version=VERSION_BUMP)
+        AdConversation.objects.filter(ad_id__in=ad_ids, is_active=True).update(is_active=False)
+
+        ''' A team is looking for players as long as it has a live ad. '''
+        Team.objects.filter(id__in=team_ids).update(
+            is_looking=Exists(Ad.objects.live().filter(team=OuterRef('pk'))),
+            version=VERSION_BUMP,
+        )
+
+        ''' The live ad and conversation counters of the dashboard and the home page. '''
+        reconcile_teams(team_ids)
+        reconcile_ads(ad_ids)
+        reconcile_sports(sports)
+
+        ''' update() does not send signals, so the feeds and lists are invalidated here. '''
+        transaction.on_commit(lambda: bump_model_version(Ad))
+        transaction.on_commit(lambda: bump_model_version(Team))
+        purge(
+            [surrogate_key("ad", ad_id) for ad_id in ad_ids] +
+            [surrogate_key("team", team_id) for team_id in team_ids] +
+            [surrogate_key("ad-list", sport) for sport in sports]
+        )
+        for sport in sports:
+            transaction.on_commit(lambda sport=sport: bump_feed_version(sport))
+
+        return len(batch)
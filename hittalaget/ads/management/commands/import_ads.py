@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from hittalaget.ads.importer import AdImportError, import_ads, read_rows
+
+import os
+
+
+class Command(BaseCommand):
+    help = (
+        "Import ads from a CSV or JSONL file with the fields team_id, "
+        "description, positions, min_experience and special_ability."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="Defaults to the file extension.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or os.path.splitext(path)[1].lstrip(".").lower()
+
+        try:
+            with open(path, newline="", encoding="utf-8") as f:
+                rows = read_rows(f, file_format)
+            count, seconds = import_ads(rows, batch_size=options["batch_size"])
+        except (OSError, AdImportError) as e:
+            raise CommandError(e)
+
+        self.stdout.write(self.style.SUCCESS(
+            "{} ads imported in {:.2f}s ({:.0f} rows/s).".format(count, seconds, count / max(seconds, 1e-6))
+        ))
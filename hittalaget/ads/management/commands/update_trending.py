@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from hittalaget.ads.trending import update_trending_scores
+
+import time
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the trending score of every live ad from recent views, "
+        "contacts and age. Meant to be run periodically, e.g. every 15 minutes."
+    )
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        count = update_trending_scores()
+        self.stdout.write(self.style.SUCCESS(
+            "{} ads scored in {:.2f}s.".format(count, time.monotonic() - start)
+        ))
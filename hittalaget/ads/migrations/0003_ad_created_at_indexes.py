@@ -0,0 +1,36 @@
+# Generated by Django 3.1.14 on 2026-10-19 15:48
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0002_auto_20200124_2334'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ad',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='ad',
+            index=models.Index(fields=['sport', '-created_at', '-id'], name='ad_sport_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ad',
+            index=models.Index(fields=['sport', 'positions', '-created_at', '-id'], name='ad_sport_position_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ad',
+            index=models.Index(fields=['sport', 'min_experience', '-created_at', '-id'], name='ad_sport_experience_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ad',
+            index=models.Index(fields=['sport', 'special_ability', '-created_at', '-id'], name='ad_sport_ability_idx'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 3.1.14 on 2026-10-19 15:52
+
+from django.db import migrations, models
+import datetime
+import hittalaget.ads.models
+
+
+def set_expires_at(apps, schema_editor):
+    ''' Existing ads expire 30 days after they were created. '''
+    Ad = apps.get_model('ads', 'Ad')
+    Ad.objects.update(expires_at=models.F('created_at') + datetime.timedelta(days=30))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0004_ad_search_vector'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='ad',
+            name='ad_sport_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='ad',
+            name='ad_sport_position_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='ad',
+            name='ad_sport_experience_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='ad',
+            name='ad_sport_ability_idx',
+        ),
+        migrations.AddField(
+            model_name='ad',
+            name='expires_at',
+            field=models.DateTimeField(default=hittalaget.ads.models.get_expiry_date),
+        ),
+        migrations.AddField(
+            model_name='ad',
+            name='is_expired',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(set_expires_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='ad',
+            index=models.Index(condition=models.Q(is_expired=False), fields=['sport', '-created_at', '-id'], name='ad_sport_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ad',
+            index=models.Index(condition=models.Q(is_expired=False), fields=['sport', 'positions', '-created_at', '-id'], name='ad_sport_position_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ad',
+            index=models.Index(condition=models.Q(is_expired=False), fields=['sport', 'min_experience', '-created_at', '-id'], name='ad_sport_experience_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ad',
+            index=models.Index(condition=models.Q(is_expired=False), fields=['sport', 'special_ability', '-created_at', '-id'], name='ad_sport_ability_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ad',
+            index=models.Index(condition=models.Q(is_expired=False), fields=['expires_at'], name='ad_expires_at_idx'),
+        ),
+    ]
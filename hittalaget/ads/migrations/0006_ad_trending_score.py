@@ -0,0 +1,22 @@
+# Generated by Django 3.1.14 on 2026-10-19 15:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0005_ad_expiry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ad',
+            name='trending_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='ad',
+            index=models.Index(condition=models.Q(is_expired=False), fields=['sport', '-trending_score', '-id'], name='ad_sport_trending_idx'),
+        ),
+    ]
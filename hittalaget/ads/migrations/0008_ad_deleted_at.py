@@ -0,0 +1,18 @@
+# Generated by Django 3.1.14 on 2026-10-19 16:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0007_ad_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ad',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
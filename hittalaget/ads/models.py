@@ -1,12 +1,48 @@
-from django.db import models
-from django.db.models.signals import pre_save 
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import models, transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from hittalaget.core.cache import bump_versions
+from hittalaget.core.purge import purge_surrogate_keys, surrogate_key
+from hittalaget.core.versioning import bump_version, refresh_version
 from hittalaget.teams.models import Team
+from hittalaget.users.models import City
+from .cache import bump_feed_version
+from django.utils import timezone
 from django.utils.text import slugify
 from django.urls import reverse
 
+import datetime
+
 ## must add age to the list.. and of course height..
 
 
+AD_LIFETIME = datetime.timedelta(days=30)
+LIVE_ADS = models.Q(is_expired=False)
+
+
+def get_expiry_date():
+    return timezone.now() + AD_LIFETIME
+
+
+class AdQuerySet(models.QuerySet):
+
+    def live(self):
+        ''' Ads that have not expired yet. '''
+        return self.filter(LIVE_ADS)
+
+    def near(self, city, distance):
+        ''' Ads from teams within `distance` km of `city`, see CityQuerySet.near(). '''
+        return self.filter(team__city__in=City.objects.near(city, distance))
+
+
+class AdManager(models.Manager.from_queryset(AdQuerySet)):
+    ''' Hides deleted ads until they are purged, see hittalaget/deletions. '''
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Ad(models.Model):
 
     class Sport(models.TextChoices):
@@ -21,16 +57,54 @@ class Ad(models.Model):
     sport = models.CharField(max_length=255, choices=Sport.choices)
     slug = models.SlugField()
     ad_id = models.IntegerField(unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(default=get_expiry_date)
+    is_expired = models.BooleanField(default=False) # set by the expire_ads command
+    trending_score = models.FloatField(default=0) # set by the update_trending command
+    search_vector = SearchVectorField(null=True, editable=False)
+    version = models.PositiveIntegerField(default=1, editable=False)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = AdManager()
+    all_objects = AdQuerySet.as_manager() # includes deleted ads
+
+    class Meta:
+        '''
+        Composite indexes backing the AdListView filters, newest first. They
+        only cover live ads, so they stay small no matter how many ads expire.
+        '''
+        indexes = [
+            models.Index(fields=['sport', '-created_at', '-id'], name="ad_sport_created_idx", condition=LIVE_ADS),
+            models.Index(fields=['sport', 'positions', '-created_at', '-id'], name="ad_sport_position_idx", condition=LIVE_ADS),
+            models.Index(fields=['sport', 'min_experience', '-created_at', '-id'], name="ad_sport_experience_idx", condition=LIVE_ADS),
+            models.Index(fields=['sport', 'special_ability', '-created_at', '-id'], name="ad_sport_ability_idx", condition=LIVE_ADS),
+            models.Index(fields=['sport', '-trending_score', '-id'], name="ad_sport_trending_idx", condition=LIVE_ADS),
+            models.Index(fields=['expires_at'], name="ad_expires_at_idx", condition=LIVE_ADS),
+            GinIndex(fields=['search_vector'], name="ad_search_vector_idx"),
+        ]
 
     def get_absolute_url(self):
         return reverse("ad:detail", kwargs={"sport": self.sport, "ad_id": self.ad_id, "slug": self.slug})
 
+    def surrogate_keys(self):
+        ''' The keys of the cached pages that show the ad, see core/purge.py. '''
+        return [surrogate_key("ad", self.pk), surrogate_key("ad-list", self.sport)]
 
-def pre_save_title(sender, instance, **kwargs):
-    instance.title = "{} söker {}".format(
-        instance.team,
-        instance.positions
+
+def ad_search_vector():
+    ''' Title weighs more than description. Uses the swedish stemmer. '''
+    return (
+        SearchVector('title', weight='A', config='swedish') +
+        SearchVector('description', weight='B', config='swedish')
     )
+
+
+def ad_title(team, positions):
+    return "{} söker {}".format(team, positions)
+
+
+def pre_save_title(sender, instance, **kwargs):
+    instance.title = ad_title(instance.team, instance.positions)
     
 def pre_save_slug(sender, instance, **kwargs):
     instance.slug = slugify(instance.title)
@@ -40,11 +114,36 @@ def pre_save_ad_id(sender, instance, **kwargs):
     rand_id = randint(100000, 999999)
     
     if not instance.ad_id: 
-        while Ad.objects.filter(ad_id=rand_id).exists():
+        while Ad.all_objects.filter(ad_id=rand_id).exists():
             rand_id = randint(100000, 999999)
         else:
             instance.ad_id = rand_id
+
+def post_save_search_vector(sender, instance, **kwargs):
+    '''
+    Keep the stored search vector up to date on write, so that searching
+    never has to run to_tsvector() over every row.
+    '''
+    Ad.objects.filter(pk=instance.pk).update(search_vector=ad_search_vector())
+
+def bump_feed_version_on_change(sender, instance, **kwargs):
+    '''
+    Invalidate the cached feeds of the ad's sport, once the change has
+    committed. A bump before that would let a poll cache the old feed
+    under the new version.
+    '''
+    sport = instance.sport
+    transaction.on_commit(lambda: bump_feed_version(sport))
     
 pre_save.connect(pre_save_title, sender=Ad)
 pre_save.connect(pre_save_slug, sender=Ad)
-pre_save.connect(pre_save_ad_id, sender=Ad)
\ No newline at end of file
+pre_save.connect(pre_save_ad_id, sender=Ad)
+pre_save.connect(bump_version, sender=Ad)
+post_save.connect(refresh_version, sender=Ad)
+post_save.connect(post_save_search_vector, sender=Ad)
+post_save.connect(bump_feed_version_on_change, sender=Ad)
+post_delete.connect(bump_feed_version_on_change, sender=Ad)
+post_save.connect(bump_versions, sender=Ad)
+post_delete.connect(bump_versions, sender=Ad)
+post_save.connect(purge_surrogate_keys, sender=Ad)
+post_delete.connect(purge_surrogate_keys, sender=Ad)
\ No newline at end of file
@@ -0,0 +1,52 @@
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from hittalaget.ads.models import Ad
+from hittalaget.conversations.models import AdConversation
+from .test_views import SetUpTestDataMixin
+
+import datetime
+import io
+
+
+class ExpireAdsCommandTest(SetUpTestDataMixin, TestCase):
+
+    def setUp(self):
+        past = timezone.now() - datetime.timedelta(days=1)
+        self.expired = [self.create_ad(expires_at=past) for _ in range(3)]
+        self.conversation = AdConversation.objects.create(ad=self.expired[0], users_arr=["anon2", "anon"])
+        self.team.is_looking = True
+        self.team.save()
+
+    def expire_ads(self, **kwargs):
+        out = io.StringIO()
+        call_command("expire_ads", stdout=out, **kwargs)
+        return out.getvalue()
+
+    def test_expires_ads_in_batches(self):
+        live = self.create_ad()
+        output = self.expire_ads(batch_size=2)
+        self.assertIn("3 ads expired.", output)
+        self.assertEqual(list(Ad.objects.live()), [live])
+
+    def test_closes_active_conversations(self):
+        self.expire_ads()
+        self.conversation.refresh_from_db()
+        self.assertFalse(self.conversation.is_active)
+
+    def test_team_without_live_ads_stops_looking(self):
+        self.expire_ads()
+        self.team.refresh_from_db()
+        self.assertFalse(self.team.is_looking)
+
+    def test_team_with_live_ads_keeps_looking(self):
+        self.create_ad()
+        self.expire_ads()
+        self.team.refresh_from_db()
+        self.assertTrue(self.team.is_looking)
+
+    def test_expired_ads_are_hidden_from_list(self):
+        self.expire_ads()
+        response = self.client.get(reverse("ad:list", kwargs={"sport": "fotboll"}))
+        self.assertEqual(list(response.context['object_list']), [])
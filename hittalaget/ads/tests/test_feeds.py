@@ -0,0 +1,93 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from hittalaget.ads.cache import get_feed_version
+from .test_views import SetUpTestDataMixin
+
+
+class FeedViewTest(SetUpTestDataMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.url = reverse("ad:feed", kwargs={"sport": "fotboll"})
+        cls.position_url = reverse("ad:position_feed", kwargs={"sport": "fotboll", "position": "målvakt"})
+
+    def setUp(self):
+        cache.clear()
+
+    def test_GET(self):
+        ad = self.create_ad()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], "application/atom+xml; charset=utf-8")
+        self.assertIn("ETag", response)
+        self.assertIn("Last-Modified", response)
+        self.assertContains(response, ad.get_absolute_url())
+
+    def test_GET_position(self):
+        keeper = self.create_ad(positions="målvakt")
+        striker = self.create_ad(positions="anfallare")
+        response = self.client.get(self.position_url)
+        self.assertContains(response, keeper.get_absolute_url())
+        self.assertNotContains(response, striker.get_absolute_url())
+
+    def test_GET_invalid_sport_and_position(self):
+        response = self.client.get(reverse("ad:feed", kwargs={"sport": "asd"}))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse("ad:position_feed", kwargs={"sport": "fotboll", "position": "asd"}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_expired_ads_are_left_out(self):
+        ad = self.create_ad(is_expired=True)
+        response = self.client.get(self.url)
+        self.assertNotContains(response, ad.get_absolute_url())
+
+    def test_not_modified(self):
+        self.create_ad()
+        etag = self.client.get(self.url)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_feed_is_served_from_cache(self):
+        self.create_ad()
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+
+class FeedVersionTest(SetUpTestDataMixin, TransactionTestCase):
+    ''' The version is bumped on commit, so these tests commit. '''
+
+    def setUp(self):
+        cache.clear()
+        self.setUpTestData()
+        self.url = reverse("ad:feed", kwargs={"sport": "fotboll"})
+
+    def test_saving_an_ad_bumps_the_version(self):
+        version = get_feed_version("fotboll")
+        etag = self.client.get(self.url)['ETag']
+
+        ad = self.create_ad()
+        self.assertGreater(get_feed_version("fotboll"), version)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, ad.get_absolute_url())
+
+    def test_deleting_an_ad_bumps_the_version(self):
+        ad = self.create_ad()
+        version = get_feed_version("fotboll")
+        ad.delete()
+        self.assertGreater(get_feed_version("fotboll"), version)
+
+    def test_version_is_bumped_on_commit(self):
+        version = get_feed_version("fotboll")
+        with transaction.atomic():
+            self.create_ad()
+            self.assertEqual(get_feed_version("fotboll"), version)
+        self.assertGreater(get_feed_version("fotboll"), version)
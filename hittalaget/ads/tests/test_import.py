@@ -0,0 +1,127 @@
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from hittalaget.ads import importer
+from hittalaget.ads.importer import AdImportError, import_ads, read_rows
+from hittalaget.ads.models import Ad
+from .test_views import SetUpTestDataMixin
+
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+User = get_user_model()
+
+
+ROW = {
+    "description": "Vi söker en målvakt.",
+    "positions": "målvakt",
+    "min_experience": "korpen",
+    "special_ability": "snabb",
+}
+
+
+class ImportAdsTest(SetUpTestDataMixin, TestCase):
+
+    def rows(self, count):
+        return [dict(ROW, team_id=str(self.team.team_id)) for _ in range(count)]
+
+    def write_file(self, suffix, content):
+        f = tempfile.NamedTemporaryFile("w", suffix=suffix, delete=False, encoding="utf-8")
+        self.addCleanup(os.remove, f.name)
+        with f:
+            f.write(content)
+        return f.name
+
+    def test_import_csv(self):
+        header = "team_id,description,positions,min_experience,special_ability\n"
+        line = "{},Vi söker en målvakt.,målvakt,korpen,snabb\n".format(self.team.team_id)
+        path = self.write_file(".csv", header + line * 3)
+
+        out = io.StringIO()
+        call_command("import_ads", path, stdout=out)
+
+        self.assertIn("3 ads imported", out.getvalue())
+        ad = Ad.objects.first()
+        self.assertEqual(ad.title, "Hammarby IF söker målvakt")
+        self.assertEqual(ad.slug, "hammarby-if-soker-malvakt")
+        self.assertEqual(ad.sport, "fotboll")
+        self.assertIn("'hammarby':1A", ad.search_vector)
+
+    def test_import_jsonl(self):
+        path = self.write_file(".jsonl", "".join(json.dumps(row) + "\n" for row in self.rows(2)))
+        call_command("import_ads", path, batch_size=1, stdout=io.StringIO())
+
+        self.assertEqual(Ad.objects.count(), 2)
+        self.assertEqual(len(set(Ad.objects.values_list('ad_id', flat=True))), 2)
+        self.team.refresh_from_db()
+        self.assertTrue(self.team.is_looking)
+
+    def test_invalid_row_imports_nothing(self):
+        rows = self.rows(2)
+        rows[1]['positions'] = "libero"
+
+        with self.assertRaisesMessage(AdImportError, "Rad 2"):
+            import_ads(rows)
+        self.assertFalse(Ad.objects.exists())
+
+    def test_invalid_json(self):
+        with self.assertRaisesMessage(AdImportError, "Rad 1"):
+            read_rows(io.StringIO("{\n"), "jsonl")
+
+    def test_invalid_csv(self):
+        with self.assertRaisesMessage(AdImportError, "Ogiltig CSV"):
+            read_rows(io.StringIO("team_id\n" + "x" * 200000 + "\n"), "csv")
+
+    def test_taken_ad_id_is_retried(self):
+        ''' As when a concurrent import takes the ad_id after it was allocated. '''
+        taken = self.create_ad().ad_id
+        allocate = importer.allocate_ad_ids
+        with mock.patch.object(importer, "allocate_ad_ids", side_effect=[[taken], allocate(1)]):
+            import_ads(self.rows(1))
+
+        self.assertEqual(Ad.objects.count(), 2)
+        self.assertNotEqual(Ad.objects.latest('id').ad_id, taken)
+
+    def test_ad_id_that_stays_taken(self):
+        taken = self.create_ad().ad_id
+        with mock.patch.object(importer, "allocate_ad_ids", return_value=[taken]):
+            with self.assertRaisesMessage(AdImportError, "0 annonser importerades"):
+                import_ads(self.rows(1))
+        self.assertEqual(Ad.objects.count(), 1)
+
+    def test_unknown_team(self):
+        path = self.write_file(".jsonl", json.dumps(dict(ROW, team_id=1)) + "\n")
+        with self.assertRaises(CommandError):
+            call_command("import_ads", path, stdout=io.StringIO())
+
+    def test_query_count_does_not_grow_with_rows(self):
+        with CaptureQueriesContext(connection) as small:
+            import_ads(self.rows(2))
+        with CaptureQueriesContext(connection) as large:
+            import_ads(self.rows(50))
+        self.assertEqual(len(small), len(large))
+
+    def test_admin_upload(self):
+        admin = User.objects.create_superuser(
+            username="admin",
+            email="admin@test.com",
+            password="secret",
+            birthday="2000-1-1",
+            city=self.city,
+        )
+        self.client.force_login(admin)
+
+        content = "".join(json.dumps(row) + "\n" for row in self.rows(2)).encode()
+        upload = SimpleUploadedFile("annonser.jsonl", content)
+        response = self.client.post(reverse("admin:ads_ad_import"), {"file": upload})
+
+        self.assertRedirects(response, reverse("admin:ads_ad_changelist"))
+        self.assertEqual(Ad.objects.count(), 2)
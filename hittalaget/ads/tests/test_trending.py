@@ -0,0 +1,61 @@
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from hittalaget.ads.models import Ad
+from hittalaget.ads.trending import trending_score, update_trending_scores
+from hittalaget.conversations.models import AdConversation
+from hittalaget.stats.models import ViewCount
+from .test_views import SetUpTestDataMixin
+
+import datetime
+import io
+
+
+class TrendingScoreTest(TestCase):
+
+    def test_score_halves_every_half_life(self):
+        self.assertEqual(trending_score(0, 9, 0), 10)
+        self.assertEqual(trending_score(48, 9, 0), 5)
+
+    def test_contacts_weigh_more_than_views(self):
+        self.assertGreater(trending_score(0, 0, 1), trending_score(0, 4, 0))
+
+
+class UpdateTrendingTest(SetUpTestDataMixin, TestCase):
+
+    def test_update_trending_scores(self):
+        quiet = self.create_ad()
+        viewed = self.create_ad()
+        contacted = self.create_ad()
+        expired = self.create_ad(is_expired=True)
+        ViewCount.objects.create(kind=ViewCount.Kind.AD, object_id=viewed.pk, date=timezone.localdate(), count=3)
+        AdConversation.objects.create(ad=contacted, users_arr=["anon2", "anon"])
+
+        self.assertEqual(update_trending_scores(), 3)
+
+        ranked = list(Ad.objects.live().order_by('-trending_score'))
+        self.assertEqual(ranked, [contacted, viewed, quiet])
+        expired.refresh_from_db()
+        self.assertEqual(expired.trending_score, 0)
+
+    def test_old_ads_sink(self):
+        old = self.create_ad()
+        Ad.objects.filter(pk=old.pk).update(created_at=timezone.now() - datetime.timedelta(days=10))
+        new = self.create_ad()
+        update_trending_scores()
+        self.assertEqual(list(Ad.objects.order_by('-trending_score')), [new, old])
+
+    def test_command(self):
+        self.create_ad()
+        out = io.StringIO()
+        call_command("update_trending", stdout=out)
+        self.assertIn("1 ads scored", out.getvalue())
+
+    def test_list_view_trending_order(self):
+        first = self.create_ad(trending_score=1)
+        second = self.create_ad(trending_score=3)
+        third = self.create_ad(trending_score=2)
+        url = reverse("ad:list", kwargs={"sport": "fotboll"})
+        response = self.client.get(url, {"order": "trending"})
+        self.assertEqual(list(response.context['object_list']), [second, third, first])
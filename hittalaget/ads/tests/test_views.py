@@ -0,0 +1,289 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from hittalaget.ads.models import Ad
+from hittalaget.teams.models import Team
+from hittalaget.stats.counters import reconcile_sports
+from hittalaget.stats.models import SportStats
+from hittalaget.users.geo import rebuild_city_distances
+from hittalaget.users.models import City
+
+User = get_user_model()
+
+
+#   ---------------------------------------   #
+#   ~~~~~~~~~~~~~~   MIXINS   ~~~~~~~~~~~~~   #
+#   ---------------------------------------   #
+
+
+class SetUpTestDataMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.city = City.objects.create(name="Stockholm")
+
+        cls.user = User.objects.create_user(
+            username="anon",
+            email="anon@test.com",
+            birthday="2000-1-1",
+            city=cls.city
+        )
+
+        cls.team = Team.objects.create(
+            name="Hammarby IF",
+            founded=1897,
+            home="Tele2 Arena",
+            city=cls.city,
+            sport="fotboll",
+            user=cls.user,
+            level="allsvenskan",
+        )
+
+    @classmethod
+    def create_team(cls, username, city):
+        user = User.objects.create_user(
+            username=username,
+            email="{}@test.com".format(username),
+            birthday="2000-1-1",
+            city=city
+        )
+        return Team.objects.create(
+            name="{} IF".format(username),
+            founded=2000,
+            home="Arenan",
+            city=city,
+            sport="fotboll",
+            user=user,
+            level="korpen",
+        )
+
+    @classmethod
+    def create_ad(cls, **kwargs):
+        data = {
+            "team": cls.team,
+            "description": "Vi söker förstärkning.",
+            "positions": "målvakt",
+            "min_experience": "korpen",
+            "special_ability": "snabb",
+            "sport": "fotboll",
+        }
+        data.update(kwargs)
+        return Ad.objects.create(**data)
+
+
+#   ---------------------------------------   #
+#   ~~~~~~~~~~   TEST AD VIEWS   ~~~~~~~~~~   #
+#   ---------------------------------------   #
+
+
+class DetailViewTest(SetUpTestDataMixin, TestCase):
+
+    def setUp(self):
+        self.ad = self.create_ad()
+        self.url = reverse("ad:detail", kwargs={
+            "sport": "fotboll",
+            "ad_id": self.ad.ad_id,
+            "slug": self.ad.slug,
+        })
+
+    def test_cached_ad_holds_no_private_user_fields(self):
+        response = self.client.get(self.url)
+        user = response.context['object'].team.user
+        self.assertEqual(user.username, self.user.username)
+        self.assertLessEqual({"password", "email", "birthday"}, user.get_deferred_fields())
+
+    def test_GET_missing_ad(self):
+        url = reverse("ad:detail", kwargs={"sport": "fotboll", "ad_id": 1, "slug": "x"})
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class DetailViewCacheTest(SetUpTestDataMixin, TransactionTestCase):
+    ''' The cache versions are bumped on commit, so these tests commit. '''
+
+    def setUp(self):
+        self.setUpTestData()
+        self.ad = self.create_ad()
+        self.url = self.ad.get_absolute_url()
+
+    def ad_queries(self, queries):
+        return [query for query in queries if query['sql'].startswith('SELECT "ads_ad".')]
+
+    def test_ad_is_cached_until_it_changes(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        self.assertEqual(self.ad_queries(queries), [])
+
+        self.ad.description = "Vi söker en målvakt."
+        self.ad.save()
+        response = self.client.get(self.url)
+        self.assertContains(response, "Vi söker en målvakt.")
+
+
+class ListViewTest(SetUpTestDataMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.url = reverse("ad:list", kwargs={"sport": "fotboll"})
+
+    def test_GET(self):
+        ad = self.create_ad()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "ads/list.html")
+        self.assertEqual(list(response.context['object_list']), [ad])
+        self.assertIn("filter_form", response.context)
+
+    def test_GET_invalid_sport(self):
+        response = self.client.get(reverse("ad:list", kwargs={"sport": "asd"}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_newest_first(self):
+        first = self.create_ad()
+        second = self.create_ad()
+        response = self.client.get(self.url)
+        self.assertEqual(list(response.context['object_list']), [second, first])
+
+    def test_filters(self):
+        keeper = self.create_ad(positions="målvakt", min_experience="korpen")
+        striker = self.create_ad(positions="anfallare", min_experience="korpen")
+        self.create_ad(positions="anfallare", min_experience="allsvenskan")
+
+        response = self.client.get(self.url, {"positions": "målvakt"})
+        self.assertEqual(list(response.context['object_list']), [keeper])
+
+        response = self.client.get(self.url, {"positions": "anfallare", "min_experience": "korpen"})
+        self.assertEqual(list(response.context['object_list']), [striker])
+
+    def test_invalid_filter_is_ignored(self):
+        ad = self.create_ad()
+        response = self.client.get(self.url, {"positions": "asd"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['object_list']), [ad])
+
+    def test_cursor_pagination(self):
+        ads = [self.create_ad() for _ in range(25)][::-1]
+
+        response = self.client.get(self.url, {"positions": "målvakt"})
+        page = response.context['page_obj']
+        self.assertEqual(list(response.context['object_list']), ads[:20])
+        self.assertTrue(page.has_next())
+        self.assertContains(response, "positions=m%C3%A5lvakt&cursor={}".format(page.next_cursor))
+
+        response = self.client.get(self.url, {"positions": "målvakt", "cursor": page.next_cursor})
+        self.assertEqual(list(response.context['object_list']), ads[20:])
+        self.assertFalse(response.context['page_obj'].has_next())
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {"cursor": "asd"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_distance_filter(self):
+        self.city.latitude, self.city.longitude = 59.3293, 18.0686
+        self.city.save()
+        uppsala = City.objects.create(name="Uppsala", latitude=59.8586, longitude=17.6389)
+        goteborg = City.objects.create(name="Göteborg", latitude=57.7089, longitude=11.9746)
+        rebuild_city_distances()
+
+        nearby = self.create_ad(team=self.create_team("anon2", uppsala))
+        far_away = self.create_ad(team=self.create_team("anon3", goteborg))
+        self.client.force_login(self.user)
+
+        response = self.client.get(self.url, {"distance": "100"})
+        self.assertEqual(list(response.context['object_list']), [nearby])
+
+        response = self.client.get(self.url)
+        self.assertEqual(list(response.context['object_list']), [far_away, nearby])
+
+    def test_distance_filter_requires_login(self):
+        response = self.client.get(self.url)
+        self.assertNotIn("distance", response.context['filter_form'].fields)
+
+
+class SearchViewTest(SetUpTestDataMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.url = reverse("ad:search", kwargs={"sport": "fotboll"})
+
+    def test_GET_without_query(self):
+        self.create_ad()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "ads/search.html")
+        self.assertEqual(list(response.context['object_list']), [])
+
+    def test_GET_invalid_sport(self):
+        response = self.client.get(reverse("ad:search", kwargs={"sport": "asd"}), {"q": "målvakt"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_search_vector_is_stored_on_save(self):
+        ad = self.create_ad()
+        ad.refresh_from_db()
+        self.assertIn("'hammarby':1A", ad.search_vector)
+
+    def test_full_text_search_uses_swedish_stemming(self):
+        ad = self.create_ad(description="Vi behöver fler snabba målvakter till säsongen.")
+        self.create_ad(positions="anfallare", description="Vi söker en anfallare.")
+        response = self.client.get(self.url, {"q": "målvakterna"})
+        self.assertEqual(list(response.context['object_list']), [ad])
+
+    def test_title_ranks_above_description(self):
+        in_description = self.create_ad(positions="anfallare", description="Gärna en mittback.")
+        in_title = self.create_ad(positions="mittback", description="Vi söker förstärkning.")
+        response = self.client.get(self.url, {"q": "mittback"})
+        self.assertEqual(list(response.context['object_list']), [in_title, in_description])
+
+    def test_trigram_fallback_on_team_name(self):
+        ad = self.create_ad()
+        response = self.client.get(self.url, {"q": "Hamarby"})
+        self.assertEqual(list(response.context['object_list']), [ad])
+
+
+class CreateViewTest(SetUpTestDataMixin, TestCase):
+
+    def setUp(self):
+        self.url = reverse("ad:create", kwargs={"sport": "fotboll"})
+        self.client.force_login(self.user)
+        reconcile_sports(["fotboll"])  # as after reconcile_stats
+
+    def post(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {
+                "description": "Vi söker förstärkning.",
+                "positions": "målvakt",
+                "min_experience": "korpen",
+                "special_ability": "snabb",
+            })
+        return response, queries
+
+    def team_queries(self, queries):
+        ''' Queries loading the team, not the version read back after saving it. '''
+        return [
+            query for query in queries
+            if query['sql'].startswith('SELECT "teams_team".')
+            and not query['sql'].startswith('SELECT "teams_team"."version" FROM')
+        ]
+
+    def test_GET_loads_team_once(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_POST_loads_team_once(self):
+        response, queries = self.post()
+        self.assertEqual(len(self.team_queries(queries)), 1)
+
+        ad = Ad.objects.get()
+        self.assertRedirects(response, ad.get_absolute_url())
+        self.assertEqual(ad.team, self.team)
+
+    def test_POST_without_sport_stats(self):
+        ''' The missing counters are rebuilt from the teams, which is one more team query. '''
+        SportStats.objects.all().delete()
+        response, queries = self.post()
+        self.assertEqual(len(self.team_queries(queries)), 2)
+        self.assertEqual(SportStats.objects.get(sport="fotboll").live_ads, 1)
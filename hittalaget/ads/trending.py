@@ -0,0 +1,73 @@
+import datetime
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+from hittalaget.core.cache import bump_model_version
+from hittalaget.core.purge import purge, surrogate_key
+from hittalaget.conversations.models import AdConversation
+from hittalaget.stats.models import ViewCount
+from .models import Ad
+
+
+'''
+Trending score of an ad:
+
+    (1 + views + CONTACT_WEIGHT * contacts) * 0.5 ** (age / HALF_LIFE)
+
+views are the views of the last VIEW_WINDOW, contacts the number of
+conversations started from the ad. The 1 lets brand new ads without any
+interest start above old ones.
+'''
+
+CONTACT_WEIGHT = 5
+HALF_LIFE = datetime.timedelta(hours=48)
+VIEW_WINDOW = datetime.timedelta(days=7)
+
+
+def trending_score(age, views, contacts):
+    ''' Score of an ad `age` hours old. '''
+    decay = 0.5 ** (age / (HALF_LIFE.total_seconds() / 3600))
+    return (1 + views + CONTACT_WEIGHT * contacts) * decay
+
+
+def update_trending_scores(batch_size=1000):
+    ''' Score all live ads in one pass, and store the scores. Returns the number of ads. '''
+    now = timezone.now()
+
+    ads = list(Ad.objects.live().order_by('id').values_list('id', 'created_at', 'sport'))
+    if not ads:
+        return 0
+
+    live_ids = Ad.objects.live().values('id')
+    views = dict(
+        ViewCount.objects
+        .filter(kind=ViewCount.Kind.AD, object_id__in=live_ids, date__gte=(now - VIEW_WINDOW).date())
+        .values('object_id')
+        .annotate(total=Sum('count'))
+        .values_list('object_id', 'total')
+    )
+    contacts = dict(
+        AdConversation.objects
+        .filter(ad_id__in=live_ids)
+        .values('ad_id')
+        .annotate(total=Count('id'))
+        .values_list('ad_id', 'total')
+    )
+
+    scored = [
+        Ad(id=ad_id, trending_score=trending_score(
+            (now - created_at).total_seconds() / 3600,
+            views.get(ad_id, 0),
+            contacts.get(ad_id, 0),
+        ))
+        for ad_id, created_at, sport in ads
+    ]
+
+    with transaction.atomic():
+        Ad.objects.bulk_update(scored, ['trending_score'], batch_size=batch_size)
+    bump_model_version(Ad)
+    ''' The lists sorted by trending score. '''
+    purge([surrogate_key("ad-list", sport) for ad_id, created_at, sport in ads])
+
+    return len(ads)
@@ -1,12 +1,17 @@
 from django.urls import path
 from . import views
+from .feeds import AdFeedView
 
 app_name = "ad"
 
 urlpatterns = [
   path('<str:sport>/', views.AdListView.as_view(), name="list"),
   path('<str:sport>/ny/', views.AdCreateView.as_view(), name="create"),
+  path('<str:sport>/sok/', views.AdSearchView.as_view(), name="search"),
+  path('<str:sport>/flode/', AdFeedView.as_view(), name="feed"),
+  path('<str:sport>/flode/<str:position>/', AdFeedView.as_view(), name="position_feed"),
   path('<str:sport>/<int:ad_id>/<str:slug>/ta-bort/', views.AdDeleteView.as_view(), name="delete"),
+  path('<str:sport>/<int:ad_id>/<str:slug>/~fragment/', views.AdDetailFragmentView.as_view(), name="detail_fragment"),
   path('<str:sport>/<int:ad_id>/<str:slug>/', views.AdDetailView.as_view(), name="detail"),
 ]
 
@@ -1,8 +1,11 @@
 from django.contrib.auth.views import redirect_to_login
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
 from django.contrib import messages
 from django.core.exceptions import PermissionDenied
 from django.http import HttpResponseRedirect, Http404, HttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.db import transaction
+from django.db.models import F
 from django.urls import reverse
 from django.views.generic import (
     CreateView,
@@ -12,8 +15,18 @@ from django.views.generic import (
     ListView,
 )
 from .models import Ad
-from .forms import AdForm
 from hittalaget.teams.models import Team
+from hittalaget.users.models import private_user_fields
+from .forms import AdForm, AdFilterForm
+from hittalaget.core.cache import model_version_name, reference_cache
+from hittalaget.core.pagination import CursorPaginator, EstimatedCountPaginator, InvalidCursor
+from hittalaget.core.purge import surrogate_key
+from hittalaget.core.views import CachePolicyMixin, FragmentCacheMixin, UserFragmentMixin
+from hittalaget.deletions.cascade import delete_ad
+from hittalaget.stats import counters
+from hittalaget.stats.models import ViewCount
+from hittalaget.stats.views import ViewCountMixin
+from hittalaget.teams.views import get_team
 from hittalaget.conversations.forms import AdMessageForm
 
 
@@ -24,31 +37,141 @@ Next iteration:
 '''
 
 
-class AdDetailView(DetailView):
-    template_name = "ads/detail.html"
+class AdLookupMixin:
+    '''
+    Find an ad by ad_id. Used by AdDetailView and the JSON API, which
+    passes its own trimmed queryset. Ads found with the default queryset
+    are cached, see core/cache.py.
+    '''
+    def get_queryset(self):
+        return Ad.objects.select_related('team__user').defer(*private_user_fields('team__user'))
 
     def get_object(self, queryset=None):
+        if hasattr(self, 'object'):
+            return self.object
+
         ad_id = self.kwargs['ad_id']
-        
-        if not hasattr(self, 'object'):
-            self.object = get_object_or_404(Ad.objects.select_related('team__user'), ad_id=ad_id) # should I do this in team too? it is after all a unique identifier
-        
+        if queryset is None:
+            self.object = reference_cache.get_or_set(
+                "ad:{}".format(ad_id),
+                [model_version_name(Ad), model_version_name(Team)],
+                lambda: self.get_queryset().filter(ad_id=ad_id).first(),
+            )
+            if self.object is None:
+                raise Http404()
+        else:
+            self.object = get_object_or_404(queryset, ad_id=ad_id)
         return self.object
+
+
+class AdDetailView(CachePolicyMixin, AdLookupMixin, ViewCountMixin, FragmentCacheMixin, DetailView):
+    ''' The same page for every visitor, the rest is in AdDetailFragmentView. '''
+    template_name = "ads/detail.html"
+    view_count_kind = ViewCount.Kind.AD
+    shared_with_users = True
+
+    def get_fragment_dependencies(self):
+        return [self.object, self.object.team]
+
+    def get_surrogate_keys(self):
+        return [surrogate_key("ad", self.object.pk), surrogate_key("team", self.object.team_id)]
+
+
+class AdDetailFragmentView(UserFragmentMixin, AdLookupMixin, DetailView):
+    ''' The owner's links and view count, or the contact form. '''
+    template_name = "ads/detail_fragment.html"
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['form'] = AdMessageForm
+        if self.object.team.user == self.request.user:
+            context['view_count'] = ViewCount.objects.total(ViewCount.Kind.AD, self.object.pk)
         return context
 
 
-class AdListView(ListView):
+class AdListView(CachePolicyMixin, ListView):
     template_name = "ads/list.html"
+    paginate_by = 20
+
+    def get_surrogate_keys(self):
+        return [surrogate_key("ad-list", self.kwargs['sport'])]
+
+    def get_filter_form(self):
+        ''' Logged-in users can filter on distance from their own city. '''
+        user = self.request.user
+        city = user.city_id if user.is_authenticated else None
+
+        if not hasattr(self, 'filter_form'):
+            self.filter_form = AdFilterForm(self.request.GET or None, sport=self.kwargs['sport'], city=city)
+        return self.filter_form
+
+    def get_queryset(self):
+        sport = self.kwargs['sport']
+        filters = self.get_filter_form().get_filters()
+        queryset = Ad.objects.live().filter(sport=sport, **filters)
+        return queryset
+
+    def paginate_queryset(self, queryset, page_size):
+        '''
+        Cursor pagination instead of page numbers, so that deep pages
+        do not need an OFFSET. Ordering (newest or trending first) is set
+        by the paginator.
+        '''
+        ordering = self.get_filter_form().get_ordering()
+        paginator = CursorPaginator(queryset, page_size, field=ordering)
+        try:
+            page = paginator.page(self.request.GET.get('cursor'))
+        except InvalidCursor:
+            raise Http404()
+        return (paginator, page, page.object_list, page.has_next())
+
+    def get_context_data(self, **kwargs):
+        ''' Add the filter form, and the active filters to keep in the next page link. '''
+        context = super().get_context_data(**kwargs)
+        querystring = self.request.GET.copy()
+        querystring.pop('cursor', None)
+        context['filter_form'] = self.get_filter_form()
+        context['querystring'] = querystring.urlencode()
+        return context
+
+
+class AdSearchView(ListView):
+    '''
+    Full-text search over title and description, ranked by the stored
+    search vector. Falls back to typo tolerant (trigram) matching on the
+    team name when the full-text search finds nothing.
+    '''
+    template_name = "ads/search.html"
+    paginate_by = 20
+    paginator_class = EstimatedCountPaginator
 
     def get_queryset(self):
         sport = self.kwargs['sport']
-        queryset = Ad.objects.filter(sport=sport)
+        q = self.request.GET.get('q', '').strip()
+
+        if sport not in Ad.Sport.values:
+            raise Http404()
+
+        if not q:
+            return Ad.objects.none()
+
+        query = SearchQuery(q, config='swedish')
+        queryset = Ad.objects.live().filter(sport=sport, search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', '-created_at')
+
+        if not queryset.exists():
+            queryset = Ad.objects.live().filter(sport=sport, team__name__trigram_similar=q).annotate(
+                similarity=TrigramSimilarity('team__name', q)
+            ).order_by('-similarity', '-created_at')
+
         return queryset
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['q'] = self.request.GET.get('q', '')
+        return context
+
 
 class AdCreateView(CreateView):
     template_name = "ads/create.html"
@@ -65,8 +188,8 @@ class AdCreateView(CreateView):
         if not user.is_authenticated:
             return redirect_to_login(request.path, reverse("user:login"))
 
-        ''' is there any way you can do this through the user object? or will it lead to an additional query either way? '''
-        if Team.objects.filter(user=user, sport=sport).exists():
+        ''' get_team() remembers the team for form_valid(). '''
+        if get_team(request, sport) is not None:
             return super().dispatch(request, *args, **kwargs)
         else:
             return redirect(reverse('user:detail', kwargs={"username": user.username}))
@@ -86,11 +209,13 @@ class AdCreateView(CreateView):
         '''
         f = form.save(commit=False)
         sport = self.kwargs['sport']
-        user = self.request.user
-        team = Team.objects.get(user=user, sport=sport)
+        team = get_team(self.request, sport)
         f.team = team
         f.sport = sport
-        f.save()
+
+        with transaction.atomic():
+            f.save()
+            counters.ad_created(f)
         self.object = f
 
         if not team.is_looking:
@@ -132,6 +257,11 @@ class AdDeleteView(DeleteView):
         
         return self.object
 
+    def delete(self, request, *args, **kwargs):
+        ''' Hide the ad now, its rows are purged in the background. '''
+        delete_ad(self.get_object())
+        return HttpResponseRedirect(self.get_success_url())
+
     def get_success_url(self):
         '''
         Perhaps you would want to redirect to some sort of ads.. or team profile..???
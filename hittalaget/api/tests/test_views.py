@@ -0,0 +1,185 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from hittalaget.ads.tests.test_views import SetUpTestDataMixin
+from hittalaget.players.models import FootballPlayer
+
+
+class AdApiTest(SetUpTestDataMixin, TestCase):
+
+    def setUp(self):
+        self.ad = self.create_ad()
+        self.url = reverse("api:ad_detail", kwargs={"sport": "fotboll", "ad_id": self.ad.ad_id})
+
+    def test_detail(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['title'], "Hammarby IF söker målvakt")
+        self.assertIn('ETag', response)
+
+    def test_sparse_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {"fields": "ad_id,title"})
+        self.assertEqual(response.json(), {"ad_id": self.ad.ad_id, "title": self.ad.title})
+        self.assertNotIn('"ads_ad"."description"', queries[0]['sql'])
+
+    def test_unknown_field(self):
+        response = self.client.get(self.url, {"fields": "search_vector"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_on_save(self):
+        etag = self.client.get(self.url)['ETag']
+        self.ad.description = "Ny beskrivning"
+        self.ad.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.ad.version, 2)
+
+    def test_etag_depends_on_fields(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, {"fields": "title"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_not_found(self):
+        url = reverse("api:ad_detail", kwargs={"sport": "fotboll", "ad_id": 1})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
+        self.assertIn("error", response.json())
+
+    def test_list_pagination(self):
+        for _ in range(20):
+            self.create_ad()
+        url = reverse("api:ad_list", kwargs={"sport": "fotboll"})
+
+        first = self.client.get(url, {"fields": "ad_id"}).json()
+        self.assertEqual(len(first['results']), 20)
+
+        second = self.client.get(url, {"fields": "ad_id", "cursor": first['next']}).json()
+        self.assertEqual(len(second['results']), 1)
+        self.assertIsNone(second['next'])
+
+    def test_list_invalid_cursor(self):
+        url = reverse("api:ad_list", kwargs={"sport": "fotboll"})
+        self.assertEqual(self.client.get(url, {"cursor": "x"}).status_code, 400)
+
+    def test_list_not_modified(self):
+        url = reverse("api:ad_list", kwargs={"sport": "fotboll"})
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.create_ad()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_etag_depends_on_next_cursor(self):
+        for _ in range(19):
+            self.create_ad()
+        url = reverse("api:ad_list", kwargs={"sport": "fotboll"})
+        response = self.client.get(url)
+        self.assertIsNone(response.json()['next'])
+
+        self.create_ad()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.json()['next'])
+
+    def test_concurrent_saves_get_different_versions(self):
+        stale = type(self.ad).objects.get(pk=self.ad.pk)
+        self.ad.save()
+        stale.save()
+        self.assertEqual(stale.version, 3)
+
+
+class TeamApiTest(SetUpTestDataMixin, TestCase):
+
+    def test_detail(self):
+        url = reverse("api:team_detail", kwargs={
+            "sport": "fotboll", "team_id": self.team.team_id, "slug": self.team.slug,
+        })
+        response = self.client.get(url, {"fields": "name,image"})
+        self.assertEqual(response.json(), {"name": "Hammarby IF", "image": "/media/images/teams/default.jpg"})
+
+    def test_list(self):
+        response = self.client.get(reverse("api:team_list", kwargs={"sport": "fotboll"}), {"fields": "name"})
+        self.assertEqual(response.json(), {"results": [{"name": "Hammarby IF"}], "next": None})
+
+    def test_list_invalid_sport(self):
+        response = self.client.get(reverse("api:team_list", kwargs={"sport": "curling"}))
+        self.assertEqual(response.status_code, 404)
+
+
+class PlayerApiTest(SetUpTestDataMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        FootballPlayer.objects.create(
+            user=cls.user,
+            username=cls.user.username,
+            positions="målvakt",
+            foot="höger",
+            experience="korpen",
+            special_ability="snabb"
+        )
+
+    def test_detail(self):
+        url = reverse("api:player_detail", kwargs={"sport": "fotboll", "username": "anon"})
+        response = self.client.get(url, {"fields": "username,positions"})
+        self.assertEqual(response.json(), {"username": "anon", "positions": ["målvakt"]})
+
+    def test_invalid_sport(self):
+        url = reverse("api:player_detail", kwargs={"sport": "curling", "username": "anon"})
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class BatchApiTest(SetUpTestDataMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        FootballPlayer.objects.create(
+            user=cls.user,
+            username=cls.user.username,
+            positions="målvakt",
+            foot="höger",
+            experience="korpen",
+            special_ability="snabb"
+        )
+
+    def setUp(self):
+        self.url = reverse("api:batch", kwargs={"sport": "fotboll"})
+
+    def test_resolves_all_kinds_with_one_query_each(self):
+        ads = [self.create_ad() for _ in range(3)]
+        params = {
+            "teams": "{},1".format(self.team.team_id),
+            "ads": ",".join(str(ad.ad_id) for ad in ads),
+            "players": "anon,nobody",
+        }
+
+        with self.assertNumQueries(3):
+            data = self.client.get(self.url, params).json()
+
+        self.assertEqual(data['teams'][str(self.team.team_id)]['city'], "Stockholm")
+        self.assertIsNone(data['teams']['1'])
+        self.assertEqual(len(data['ads']), 3)
+        self.assertEqual(data['ads'][str(ads[0].ad_id)]['team']['name'], "Hammarby IF")
+        self.assertEqual(data['players']['anon']['positions'], ["målvakt"])
+        self.assertIsNone(data['players']['nobody'])
+
+    def test_no_ids_no_queries(self):
+        with self.assertNumQueries(0):
+            data = self.client.get(self.url).json()
+        self.assertEqual(data, {"teams": {}, "ads": {}, "players": {}})
+
+    def test_invalid_id(self):
+        self.assertEqual(self.client.get(self.url, {"ads": "abc"}).status_code, 400)
+
+    def test_too_many_ids(self):
+        ids = ",".join(str(i) for i in range(101))
+        self.assertEqual(self.client.get(self.url, {"teams": ids}).status_code, 400)
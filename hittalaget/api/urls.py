@@ -0,0 +1,14 @@
+from django.urls import path
+from . import views
+
+app_name = "api"
+
+urlpatterns = [
+  path("spelare/<str:sport>/", views.PlayerApiListView.as_view(), name="player_list"),
+  path("spelare/<str:sport>/<str:username>/", views.PlayerApiDetailView.as_view(), name="player_detail"),
+  path("lag/<str:sport>/", views.TeamApiListView.as_view(), name="team_list"),
+  path("lag/<str:sport>/<int:team_id>/<str:slug>/", views.TeamApiDetailView.as_view(), name="team_detail"),
+  path("annonser/<str:sport>/", views.AdApiListView.as_view(), name="ad_list"),
+  path("annonser/<str:sport>/<int:ad_id>/", views.AdApiDetailView.as_view(), name="ad_detail"),
+  path("hamta/<str:sport>/", views.BatchApiView.as_view(), name="batch"),
+]
@@ -0,0 +1,275 @@
+import hashlib
+
+from django.db.models.fields.files import FieldFile
+from django.http import Http404, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.generic import View
+from hittalaget.ads.models import Ad
+from hittalaget.ads.views import AdLookupMixin
+from hittalaget.core.pagination import CursorPaginator, InvalidCursor
+from hittalaget.players.models import FootballPlayer
+from hittalaget.players.views import PlayerLookupMixin
+from hittalaget.teams.models import Team
+from hittalaget.teams.views import TeamLookupMixin
+
+
+'''
+Read-only JSON API for the mobile client.
+
+- ?fields=name,city trims the response, and the query with .only().
+- Lists use cursor pagination (?cursor=), see core/pagination.py.
+- ETags are derived from the row versions (see core/versioning.py) and
+  the requested fields, so an unchanged resource gets a 304 before
+  anything is serialized.
+'''
+
+
+#   ---------------------------------------   #
+#   ~~~~~~~~~~~~~~   MIXINS   ~~~~~~~~~~~~~   #
+#   ---------------------------------------   #
+
+
+class BadRequest(ValueError):
+    pass
+
+
+class InvalidFields(BadRequest):
+    pass
+
+
+def make_etag(*parts):
+    ''' Strong ETag from anything with a stable repr. '''
+    return quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+class ApiMixin:
+    '''
+    Common parts of the API views. Set `fields` to the fields that may be
+    returned; all of them are returned when ?fields= is not given.
+    '''
+    fields = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except Http404:
+            return JsonResponse({"error": "Hittades inte."}, status=404)
+        except (BadRequest, InvalidCursor) as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+    def get_fields(self):
+        requested = self.request.GET.get('fields')
+        if not requested:
+            return list(self.fields)
+
+        fields = [field.strip() for field in requested.split(",") if field.strip()]
+        unknown = [field for field in fields if field not in self.fields]
+        if unknown:
+            raise InvalidFields("Okända fält: {}".format(", ".join(unknown)))
+        return fields
+
+    def trim(self, queryset, fields, *extra):
+        ''' Only load the requested fields, the row version and `extra`. '''
+        return queryset.select_related(None).only('version', *extra, *fields)
+
+    def serialize(self, obj, fields):
+        data = {}
+        for field in fields:
+            value = getattr(obj, field)
+            if isinstance(value, FieldFile):
+                value = value.url if value else None
+            data[field] = value
+        return data
+
+    def render(self, etag, get_data):
+        ''' 304 if the client has `etag`, otherwise the JSON from get_data(). '''
+        response = get_conditional_response(self.request, etag=etag)
+        if response is None:
+            response = JsonResponse(get_data())
+        response['ETag'] = etag
+        return response
+
+
+class ApiDetailMixin(ApiMixin):
+    ''' Reuses get_queryset() and get_object(queryset) of a *LookupMixin. '''
+
+    def get(self, request, *args, **kwargs):
+        fields = self.get_fields()
+        obj = self.get_object(self.trim(self.get_queryset(), fields))
+        etag = make_etag(obj._meta.label, obj.pk, obj.version, fields)
+        return self.render(etag, lambda: self.serialize(obj, fields))
+
+
+class ApiListMixin(ApiMixin):
+    ''' Set get_list_queryset(), and `ordering` to the field to paginate on. '''
+    paginate_by = 20
+    ordering = "id"
+
+    def get(self, request, *args, **kwargs):
+        fields = self.get_fields()
+        cursor = request.GET.get('cursor')
+        queryset = self.trim(self.get_list_queryset(), fields, self.ordering)
+        page = CursorPaginator(queryset, self.paginate_by, field=self.ordering).page(cursor)
+
+        etag = make_etag(
+            queryset.model._meta.label,
+            fields,
+            cursor,
+            [(obj.pk, obj.version) for obj in page],
+            page.next_cursor,
+        )
+        return self.render(etag, lambda: {
+            "results": [self.serialize(obj, fields) for obj in page],
+            "next": page.next_cursor,
+        })
+
+
+#   ---------------------------------------   #
+#   ~~~~~~~~~~~~~~   VIEWS   ~~~~~~~~~~~~~~   #
+#   ---------------------------------------   #
+
+
+PLAYER_FIELDS = (
+    "username",
+    "sport",
+    "positions",
+    "foot",
+    "experience",
+    "special_ability",
+    "is_available",
+    "image",
+)
+
+TEAM_FIELDS = (
+    "team_id",
+    "name",
+    "slug",
+    "sport",
+    "founded",
+    "home",
+    "level",
+    "is_looking",
+    "is_verified",
+    "website",
+    "image",
+)
+
+AD_FIELDS = (
+    "ad_id",
+    "title",
+    "slug",
+    "sport",
+    "description",
+    "positions",
+    "min_experience",
+    "special_ability",
+    "created_at",
+    "expires_at",
+    "is_expired",
+)
+
+
+class PlayerApiDetailView(ApiDetailMixin, PlayerLookupMixin, View):
+    fields = PLAYER_FIELDS
+
+
+class PlayerApiListView(ApiListMixin, PlayerLookupMixin, View):
+    fields = PLAYER_FIELDS
+
+    def get_list_queryset(self):
+        return self.get_queryset()
+
+
+class TeamApiDetailView(ApiDetailMixin, TeamLookupMixin, View):
+    fields = TEAM_FIELDS
+
+
+class TeamApiListView(ApiListMixin, TeamLookupMixin, View):
+    fields = TEAM_FIELDS
+
+    def get_list_queryset(self):
+        sport = self.kwargs['sport']
+        if sport not in Team.Sport.values:
+            raise Http404()
+        return self.get_queryset().filter(sport=sport)
+
+
+class AdApiDetailView(ApiDetailMixin, AdLookupMixin, View):
+    fields = AD_FIELDS
+
+
+class AdApiListView(ApiListMixin, AdLookupMixin, View):
+    ''' Live ads, newest first, like AdListView. '''
+    fields = AD_FIELDS
+    ordering = "created_at"
+
+    def get_list_queryset(self):
+        sport = self.kwargs['sport']
+        if sport not in Ad.Sport.values:
+            raise Http404()
+        return self.get_queryset().live().filter(sport=sport)
+
+
+class BatchApiView(ApiMixin, View):
+    '''
+    Resolve many resources in one request, e.g.
+
+        /api/hamta/fotboll/?teams=123456,234567&ads=345678&players=anon
+
+    with one IN query per model. Every requested id is a key in the
+    response, and ids that were not found map to null.
+    '''
+    max_ids = 100
+
+    players = {
+        "fotboll": FootballPlayer,
+    }
+
+    def get_ids(self, name, convert=str):
+        values = [value.strip() for value in self.request.GET.get(name, "").split(",") if value.strip()]
+        if len(values) > self.max_ids:
+            raise BadRequest("Högst {} {} per anrop.".format(self.max_ids, name))
+        try:
+            return list(dict.fromkeys(convert(value) for value in values))
+        except ValueError:
+            raise BadRequest("Ogiltigt id i {}.".format(name))
+
+    def resolve(self, queryset, field, ids, serialize):
+        if not ids:
+            return {}
+        found = queryset.in_bulk(ids, field_name=field)
+        return {str(value): serialize(found[value]) if value in found else None for value in ids}
+
+    def serialize_team(self, team):
+        return {**self.serialize(team, TEAM_FIELDS), "city": team.city.name}
+
+    def serialize_ad(self, ad):
+        team = {"team_id": ad.team.team_id, "name": ad.team.name}
+        return {**self.serialize(ad, AD_FIELDS), "team": team}
+
+    def serialize_player(self, player):
+        return {**self.serialize(player, PLAYER_FIELDS), "city": player.user.city.name}
+
+    def get(self, request, *args, **kwargs):
+        sport = self.kwargs['sport']
+        try:
+            players = self.players[sport].objects.select_related('user__city')
+        except KeyError:
+            raise Http404()
+
+        team_ids = self.get_ids("teams", int)
+        ad_ids = self.get_ids("ads", int)
+        usernames = self.get_ids("players")
+
+        return JsonResponse({
+            "teams": self.resolve(
+                Team.objects.filter(sport=sport).select_related('city'),
+                'team_id', team_ids, self.serialize_team,
+            ),
+            "ads": self.resolve(
+                Ad.objects.filter(sport=sport).select_related('team'),
+                'ad_id', ad_ids, self.serialize_ad,
+            ),
+            "players": self.resolve(players, 'username', usernames, self.serialize_player),
+        })
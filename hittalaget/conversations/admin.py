@@ -1,3 +1,42 @@
 from django.contrib import admin
+from hittalaget.core.pagination import EstimatedCountPaginator
+from .models import AdConversation, AdMessage, PmConversation, PmMessage
 
-# Register your models here.
+
+class LargeTableAdmin(admin.ModelAdmin):
+    '''
+    The conversation and message tables are the largest ones, so their
+    changelists show an estimated count instead of running COUNT(*), see
+    EstimatedCountPaginator. Foreign keys are raw id inputs, for the same
+    reason.
+    '''
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(AdConversation)
+class AdConversationAdmin(LargeTableAdmin):
+    list_display = ['conversation_id', 'ad', 'is_active', 'created_at']
+    list_filter = ['is_active']
+    list_select_related = ['ad']
+    raw_id_fields = ['ad', 'users']
+
+
+@admin.register(PmConversation)
+class PmConversationAdmin(LargeTableAdmin):
+    list_display = ['id', 'users_arr']
+    raw_id_fields = ['users']
+
+
+@admin.register(AdMessage)
+class AdMessageAdmin(LargeTableAdmin):
+    list_display = ['id', 'conversation', 'author']
+    list_select_related = ['conversation', 'author']
+    raw_id_fields = ['conversation', 'author']
+
+
+@admin.register(PmMessage)
+class PmMessageAdmin(LargeTableAdmin):
+    list_display = ['id', 'conversation', 'author']
+    list_select_related = ['conversation', 'author']
+    raw_id_fields = ['conversation', 'author']
@@ -0,0 +1,25 @@
+# Generated by Django 3.1.14 on 2026-10-19 16:00
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='adconversation',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='adconversation',
+            name='responded_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
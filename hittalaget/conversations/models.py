@@ -30,6 +30,15 @@ class AdConversation(Conversation):
     ad = models.ForeignKey(Ad, on_delete=models.CASCADE)
     conversation_id = models.IntegerField(unique=True) # add it as an index later for faster lookups
     is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    responded_at = models.DateTimeField(null=True, blank=True) # first reply from the team
+
+    @property
+    def response_time(self):
+        ''' Seconds from the first contact until the team replied, or None. '''
+        if self.responded_at is None:
+            return None
+        return int((self.responded_at - self.created_at).total_seconds())
 
     def get_absolute_url(self):
         return reverse("conversation:ad_detail", kwargs={"conversation_id": self.conversation_id})
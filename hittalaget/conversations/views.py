@@ -3,7 +3,10 @@ from django.contrib.auth.views import redirect_to_login
 from django.contrib import messages
 from django.core.exceptions import PermissionDenied
 from django.http import HttpResponseRedirect, Http404
+from django.db import transaction
+from django.db.models import Prefetch
 from django.shortcuts import render, redirect, get_object_or_404
+from django.utils import timezone
 from django.urls import reverse
 from django.views.generic import (
     CreateView,
@@ -13,10 +16,11 @@ from django.views.generic import (
     View,
     ListView,
 )
-from .models import PmConversation, AdConversation, AdMessage
+from .models import PmConversation, AdConversation, AdMessage, PmMessage
 from .forms import PmMessageForm, AdMessageForm
 from hittalaget.ads.models import Ad
-from hittalaget.players.models import FootballPlayer
+from hittalaget.players.views import get_profile
+from hittalaget.stats import counters
 
 User = get_user_model()
 
@@ -55,7 +59,10 @@ class ConversationListView(ListView):
         ''' Add second queryset. '''
         user = self.request.user
         context = super().get_context_data(**kwargs)
-        context['ad_conversations'] = AdConversation.objects.filter(users=user)
+        context['ad_conversations'] = (
+            AdConversation.objects.filter(users=user, ad__deleted_at__isnull=True)
+            .select_related('ad__team__user')
+        )
         return context 
 
 
@@ -92,8 +99,10 @@ class PmDetailView(DetailView):
 
         if not hasattr(self, 'object'):
             try:
-                ''' Get conversation if one exist between users. '''
-                obj = PmConversation.objects.get(users=user, users_arr__icontains=username)
+                ''' Get conversation if one exist between users, with the messages and their authors. '''
+                obj = PmConversation.objects.prefetch_related(
+                    Prefetch('messages', queryset=PmMessage.objects.select_related('author').order_by('pk'))
+                ).get(users=user, users_arr__icontains=username)
                 self.object = obj
             except PmConversation.DoesNotExist:
                 raise Http404()
@@ -226,8 +235,12 @@ class AdDetailView(DetailView):
 
         if not hasattr(self, 'object'):
             ''' Get conversation if it exist, oterwise raise a 404. '''
-            ''' select related => users (used in dispatch) '''
-            obj = get_object_or_404(AdConversation, conversation_id=conversation_id)
+            ''' The messages are listed with their authors, and compared with the team's user. '''
+            ''' Conversations of deleted ads are hidden until they are purged. '''
+            queryset = AdConversation.objects.select_related('ad__team__user').prefetch_related(
+                Prefetch('messages', queryset=AdMessage.objects.select_related('author').order_by('pk'))
+            )
+            obj = get_object_or_404(queryset, conversation_id=conversation_id, ad__deleted_at__isnull=True)
             self.object = obj
 
         return self.object
@@ -256,11 +269,12 @@ class AdDeleteView(DeleteView):
         if not hasattr(self, 'object'):
             ''' Get conversation if it exist, oterwise raise a 404. '''
             ''' select related => users (used in dispatch, and delete..) '''
-            obj = get_object_or_404(AdConversation, conversation_id=conversation_id)
+            obj = get_object_or_404(AdConversation, conversation_id=conversation_id, ad__deleted_at__isnull=True)
             self.object = obj
 
         return self.object
 
+    @transaction.atomic
     def delete(self, request, *args, **kwargs):
         conversation = self.get_object()
         user = request.user
@@ -268,11 +282,15 @@ class AdDeleteView(DeleteView):
         if len(conversation.users.all()) < 2:
             ''' Delete the conversation if there is only one user left. '''
             conversation.delete()
+            counters.conversation_deleted(conversation)
         else:
             ''' Remove the user from the conversation, and set is_active to False. '''
             conversation.users.remove(user)
+            was_active = conversation.is_active
             conversation.is_active = False
             conversation.save()
+            if was_active:
+                counters.conversation_closed(conversation)
             ''' Alert the remaining user in the conversation that the user has left. '''
             message = AdMessage()
             message.author = user
@@ -304,8 +322,12 @@ class AdCreateConversation(View):
         if ad.team.user == user:
             return redirect(ad.get_absoulte_url())
 
+        ''' Redirect if the ad has expired. '''
+        if ad.is_expired:
+            return redirect(ad.get_absolute_url())
+
         ''' Redirect if user does not have player profile. '''
-        if not FootballPlayer.objects.filter(user=user, sport=ad.sport).exists():
+        if get_profile(request, ad.sport) is None:
             # want to add message.. but not good idea to put message in dispatch..
             return redirect(ad.get_absolute_url())
 
@@ -316,11 +338,12 @@ class AdCreateConversation(View):
         ad_id = self.kwargs['ad_id']
         
         if not hasattr(self, 'ad'):
-            ad = get_object_or_404(Ad, ad_id=ad_id) # select_related('team')
+            ad = get_object_or_404(Ad.objects.select_related('team__user'), ad_id=ad_id)
             self.ad = ad
 
         return self.ad
         
+    @transaction.atomic
     def post(self, request, *args, **kwargs):
         user = request.user
         ad = self.get_ad()
@@ -333,6 +356,7 @@ class AdCreateConversation(View):
             conversation.ad = ad
             conversation.users_arr = [user.username, ad.team.user.username]
             conversation.save()
+            counters.conversation_started(conversation)
 
         ''' Assign conversation, and author to the message, and then create it. '''
         form = AdMessageForm(request.POST)
@@ -372,10 +396,13 @@ class AdCreateMessage(View):
         conversation_id = self.kwargs['conversation_id']
 
         if not hasattr(self, 'conversation'):
-            self.conversation = get_object_or_404(AdConversation, conversation_id=conversation_id)
+            self.conversation = get_object_or_404(
+                AdConversation, conversation_id=conversation_id, ad__deleted_at__isnull=True
+            )
         
         return self.conversation
 
+    @transaction.atomic
     def post(self, request, *args, **kwargs):
         user = request.user
         conversation = self.get_conversation()
@@ -389,6 +416,12 @@ class AdCreateMessage(View):
                 message.author = user
                 message.conversation = conversation
                 message.save()
+
+                ''' The first reply from the team sets the response time. '''
+                if conversation.responded_at is None and user == conversation.ad.team.user:
+                    conversation.responded_at = timezone.now()
+                    conversation.save(update_fields=['responded_at'])
+                    counters.conversation_responded(conversation)
         else:
             messages.error(request, "Denna konversation är stängd.")
             
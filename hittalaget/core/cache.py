@@ -0,0 +1,191 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+'''
+Version counters for cache keys.
+
+A version is the time (in microseconds) of the last change to what it
+names. Anything cached is stored under a key that includes the versions
+of what it was built from, so bumping a version is all it takes to
+invalidate it; nothing is ever purged by hand. Old entries simply stop
+being read and expire.
+
+There is a version per model, bumped when any of its rows is saved or
+deleted (for cached querysets and lists), and one per object (for cached
+fragments of detail pages). The models connect bump_versions() to their
+post_save and post_delete signals, and the versions are bumped when the
+transaction commits. Code that changes rows with update() or
+bulk_create() sends no signals, and bumps the versions itself.
+
+TieredCache, at the end, keeps hot values in the process as well.
+'''
+
+
+def version_key(name):
+    return "version:{}".format(name)
+
+
+def bump_cache_version(name):
+    version = time.time_ns() // 1000
+    cache.set(version_key(name), version, None)
+    for tiered_cache in TieredCache.instances:
+        tiered_cache.forget(name)
+    return version
+
+
+def get_cache_versions(names):
+    ''' {name: version} for all the names, with one cache read. '''
+    versions = cache.get_many([version_key(name) for name in names])
+    result = {}
+    for name in names:
+        version = versions.get(version_key(name))
+        result[name] = version if version is not None else bump_cache_version(name)
+    return result
+
+
+def get_cache_version(name):
+    return get_cache_versions([name])[name]
+
+
+#   ---------------------------------------   #
+#   ~~~~~~~~~~~~~~   MODELS   ~~~~~~~~~~~~~   #
+#   ---------------------------------------   #
+
+
+def model_version_name(model):
+    return model._meta.label_lower
+
+
+def object_version_name(model, pk):
+    return "{}:{}".format(model._meta.label_lower, pk)
+
+
+def bump_model_version(model):
+    return bump_cache_version(model_version_name(model))
+
+
+def bump_object_versions(model, pks):
+    version = time.time_ns() // 1000
+    cache.set_many({version_key(object_version_name(model, pk)): version for pk in pks}, None)
+
+
+def bump_versions(sender, instance, **kwargs):
+    '''
+    post_save and post_delete receiver. Bumps on commit, so that a
+    concurrent request can not cache the old row under the new version.
+    '''
+    pk = instance.pk
+
+    def bump():
+        bump_model_version(sender)
+        bump_object_versions(sender, [pk])
+
+    transaction.on_commit(bump)
+
+
+def cache_key(name, *dependencies):
+    '''
+    A cache key for `name` built from `dependencies`: model instances, or
+    model classes for things built from whole tables. It changes whenever
+    one of them changes. Instances with a row version (see versioning.py)
+    include it too, as it is also bumped by update().
+    '''
+    names = [
+        model_version_name(dependency) if isinstance(dependency, type)
+        else object_version_name(type(dependency), dependency.pk)
+        for dependency in dependencies
+    ]
+    versions = get_cache_versions(names)
+    parts = [name]
+    for dependency, version_name in zip(dependencies, names):
+        part = "{}.{}".format(version_name, versions[version_name])
+        if not isinstance(dependency, type) and getattr(dependency, 'version', None) is not None:
+            part += ".{}".format(dependency.version)
+        parts.append(part)
+    return ":".join(parts)
+
+
+#   ---------------------------------------   #
+#   ~~~~~~~~~~~~   TWO LEVELS   ~~~~~~~~~~~   #
+#   ---------------------------------------   #
+
+
+class TieredCache:
+    '''
+    Two-level cache for small, hot data: a bounded LRU in the process in
+    front of the shared cache. Values are stored with the versions of the
+    names they depend on, and one with an older version is never used, so
+    bumping a version invalidates both levels in every process.
+
+    A local value is used without any cache read for local_timeout
+    seconds, then its versions are checked again. Bumps made by this
+    process drop the local values at once, so only other processes can
+    see a change up to local_timeout seconds late. Local values are shared
+    by the requests of the process, so they must not be changed.
+    '''
+    instances = weakref.WeakSet()
+
+    def __init__(self, name, max_entries=1000, local_timeout=5, timeout=60 * 60):
+        self.name = name
+        self.max_entries = max_entries
+        self.local_timeout = local_timeout
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        TieredCache.instances.add(self)
+
+    def get_or_set(self, key, version_names, default):
+        '''
+        The value of `key`, or the result of calling `default` (which is
+        cached, unless it is None) if no level has a current one.
+        '''
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+
+        if entry is not None and now - entry['checked_at'] < self.local_timeout:
+            return entry['value']
+
+        versions = get_cache_versions(version_names)
+        if entry is not None and entry['versions'] == versions:
+            value = entry['value']
+        else:
+            shared_key = ":".join([self.name, key] + ["{}.{}".format(*item) for item in sorted(versions.items())])
+            value = cache.get(shared_key)
+            if value is None:
+                value = default()
+                if value is None:
+                    return None
+                cache.set(shared_key, value, self.timeout)
+
+        self.store(key, {'versions': versions, 'value': value, 'checked_at': now})
+        return value
+
+    def store(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def forget(self, version_name):
+        ''' Drop the local values that depend on `version_name`. '''
+        with self.lock:
+            for key in [key for key, entry in self.entries.items() if version_name in entry['versions']]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+''' Reference data and rows looked up on every hit, see e.g. city_choices(). '''
+reference_cache = TieredCache("reference")
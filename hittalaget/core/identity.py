@@ -0,0 +1,34 @@
+from django.core.exceptions import ObjectDoesNotExist
+
+
+class IdentityMap:
+    '''
+    Objects loaded during one request, keyed by model and lookup, so that
+    the mixins of a view (and the view itself) can all ask for e.g. the
+    user's team without each running the same query. Lookups that found
+    nothing are remembered as None. The first queryset used for a model
+    and lookup decides what is select_related.
+    '''
+
+    def __init__(self):
+        self.objects = {}
+
+    def get(self, queryset, **lookup):
+        ''' Return the object matching `lookup` in a model or queryset, or None. '''
+        if isinstance(queryset, type):
+            queryset = queryset._default_manager.all()
+
+        key = (queryset.model._meta.label, tuple(sorted(lookup.items())))
+        if key not in self.objects:
+            try:
+                self.objects[key] = queryset.get(**lookup)
+            except ObjectDoesNotExist:
+                self.objects[key] = None
+        return self.objects[key]
+
+
+def get_identity_map(request):
+    ''' The IdentityMap of the request, created on first use. '''
+    if not hasattr(request, '_identity_map'):
+        request._identity_map = IdentityMap()
+    return request._identity_map
@@ -0,0 +1,87 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import Resolver404, resolve
+from hittalaget.stats.buffer import hits
+
+
+class MicroCacheMiddleware:
+    '''
+    Caches whole responses to anonymous visitors for a few seconds, so a
+    spike of visits to a shared link renders each page once per
+    MICRO_CACHE_TIMEOUT instead of once per visit. Only GET requests
+    without cookies to the views in MICRO_CACHE_VIEWS are cached. They are
+    answered before the session and authentication middleware, which
+    therefore never run for them.
+
+    Expired pages are kept for MICRO_CACHE_STALE more seconds. The first
+    request for an expired page takes a lock and renders it again, while
+    the others are served the stale copy meanwhile (single flight).
+
+    Views counted by ViewCountMixin (response.hit) are counted again for
+    every response served from the cache.
+
+    Disabled when MICRO_CACHE_TIMEOUT is 0, as it is outside production.
+    '''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.MICRO_CACHE_TIMEOUT or not self.is_cacheable_request(request):
+            return self.get_response(request)
+
+        key = self.get_cache_key(request)
+        entry = cache.get(key)
+
+        if entry is not None and entry['expires_at'] > time.time():
+            return self.serve(entry, "HIT")
+
+        ''' Only the request that gets the lock renders the page again. '''
+        if not cache.add(key + ":lock", True, settings.MICRO_CACHE_LOCK_TIMEOUT):
+            if entry is not None:
+                return self.serve(entry, "STALE")
+            return self.get_response(request)
+
+        try:
+            response = self.get_response(request)
+            if self.is_cacheable_response(response):
+                entry = {
+                    'response': response,
+                    'hit': getattr(response, 'hit', None),
+                    'expires_at': time.time() + settings.MICRO_CACHE_TIMEOUT,
+                }
+                cache.set(key, entry, settings.MICRO_CACHE_TIMEOUT + settings.MICRO_CACHE_STALE)
+                response['X-Micro-Cache'] = "MISS"
+        finally:
+            cache.delete(key + ":lock")
+        return response
+
+    @staticmethod
+    def get_cache_key(request):
+        return "micro:" + hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+
+    def is_cacheable_request(self, request):
+        if request.method not in ("GET", "HEAD") or request.COOKIES:
+            return False
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        return match.view_name in settings.MICRO_CACHE_VIEWS
+
+    def is_cacheable_response(self, response):
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+        )
+
+    def serve(self, entry, status):
+        if entry['hit'] is not None:
+            hits.add(*entry['hit'])
+        response = entry['response']
+        response['X-Micro-Cache'] = status
+        return response
@@ -0,0 +1,154 @@
+import base64
+import json
+
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.core.paginator import InvalidPage, Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class CursorPage:
+    ''' One page of results, and the cursor that points to the next one. '''
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class CursorPaginator:
+    '''
+    Keyset pagination over (<field> DESC, id DESC). Instead of an OFFSET,
+    which makes postgres walk through every skipped row, each page starts
+    right after the last row of the previous page. That keeps page 500 as
+    cheap as page 1, as long as there is an index ending in <field>, id.
+
+    The cursor is an opaque url-safe string, e.g. ?cursor=MjAyMC0wMS0y...
+    '''
+
+    def __init__(self, queryset, per_page, field="created_at"):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.field = field
+
+    def encode_cursor(self, obj):
+        value = getattr(obj, self.field)
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        raw = "{}|{}".format(value, obj.pk)
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        ''' Return the (value, pk) pair stored in the cursor. '''
+        model_field = self.queryset.model._meta.get_field(self.field)
+        try:
+            padding = "=" * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode((cursor + padding).encode()).decode()
+            value, pk = raw.rsplit("|", 1)
+            return model_field.to_python(value), int(pk)
+        except (ValueError, TypeError, ValidationError):
+            raise InvalidCursor("Ogiltig cursor.")
+
+    def page(self, cursor=None):
+        queryset = self.queryset.order_by("-{}".format(self.field), "-pk")
+
+        if cursor:
+            value, pk = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(**{"{}__lt".format(self.field): value}) |
+                Q(**{self.field: value, "pk__lt": pk})
+            )
+
+        ''' Fetch one extra row to find out if there is a next page. '''
+        object_list = list(queryset[:self.per_page + 1])
+        next_cursor = None
+
+        if len(object_list) > self.per_page:
+            object_list = object_list[:self.per_page]
+            next_cursor = self.encode_cursor(object_list[-1])
+
+        return CursorPage(object_list, next_cursor)
+
+
+#   ---------------------------------------   #
+#   ~~~~~~~~~~~~~   COUNTS   ~~~~~~~~~~~~~~   #
+#   ---------------------------------------   #
+
+
+def estimate_count(queryset):
+    '''
+    The planner's estimate of the number of rows in `queryset`: reltuples
+    of the table for a whole table, else the row estimate of EXPLAIN. Both
+    are as fresh as the last ANALYZE (or autovacuum) of the table.
+    '''
+    connection = connections[queryset.db]
+
+    with connection.cursor() as cursor:
+        if not queryset.query.where and not queryset.query.distinct:
+            cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+            return int(row[0]) if row else -1
+
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+    '''
+    A Paginator that takes the number of rows from the planner (see
+    estimate_count()) instead of a COUNT(*), which has to scan every row.
+    Estimates below exact_count_threshold are counted exactly, so small
+    lists, and tables that have never been analyzed, show the real count.
+
+    With an estimate, the last pages may be one page short or empty, which
+    is what a list at our sizes can live with. is_estimated tells the
+    template to say "about".
+    '''
+    exact_count_threshold = 10000
+
+    def __init__(self, *args, exact_count_threshold=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if exact_count_threshold is not None:
+            self.exact_count_threshold = exact_count_threshold
+        self.is_estimated = False
+
+    @cached_property
+    def count(self):
+        if not isinstance(self.object_list, QuerySet):
+            return len(self.object_list)
+
+        estimate = estimate_count(self.object_list)
+        if estimate < self.exact_count_threshold:
+            return self.object_list.count()
+
+        self.is_estimated = True
+        return estimate
+
+    def page(self, number):
+        ''' Like Paginator.page(), but an estimated count does not cut the last page short. '''
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        if not self.is_estimated and top + self.orphans >= self.count:
+            top = self.count
+        return self._get_page(self.object_list[bottom:top], number, self)
@@ -0,0 +1,76 @@
+import functools
+import logging
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+'''
+Purging of the reverse proxy by surrogate key.
+
+Public pages are tagged with a Surrogate-Key header naming the objects
+they show (see CachePolicyMixin), e.g. "team-12 ad-34". When an object
+changes, purge() asks the proxy to drop every page tagged with one of its
+keys, once the transaction has committed. The models purge their keys
+from post_save and post_delete. Code that writes with update() purges
+the keys itself.
+
+SURROGATE_PURGE_BACKEND sends the purges: HttpPurger in production, and
+LocalPurgeSink, which only records them, everywhere else.
+'''
+
+
+def surrogate_key(*parts):
+    ''' surrogate_key("ad", 12) == "ad-12", surrogate_key("ad-list", "fotboll") == "ad-list-fotboll" '''
+    return "-".join(str(part) for part in parts)
+
+
+class LocalPurgeSink:
+    ''' Stand-in for the proxy. Keeps the purged keys, for tests and development. '''
+
+    def __init__(self):
+        self.purged = []
+
+    def purge(self, keys):
+        self.purged.extend(keys)
+
+
+class HttpPurger:
+    '''
+    Sends one POST to SURROGATE_PURGE_URL with the keys in a
+    Surrogate-Key header, as Fastly does (and Varnish with xkey can be
+    configured to). A failed purge is logged; the pages then expire on
+    their own, see CachePolicyMixin.cache_s_maxage.
+    '''
+
+    def purge(self, keys):
+        request = urllib.request.Request(
+            settings.SURROGATE_PURGE_URL,
+            method="POST",
+            headers={"Surrogate-Key": " ".join(keys)},
+        )
+        try:
+            urllib.request.urlopen(request, timeout=2).close()
+        except (urllib.error.URLError, OSError):
+            logger.exception("Could not purge %s surrogate keys.", len(keys))
+
+
+@functools.lru_cache(maxsize=None)
+def get_purger():
+    return import_string(settings.SURROGATE_PURGE_BACKEND)()
+
+
+def purge(keys):
+    keys = sorted(set(keys))
+    if keys:
+        transaction.on_commit(lambda: get_purger().purge(keys))
+
+
+def purge_surrogate_keys(sender, instance, **kwargs):
+    ''' post_save and post_delete receiver for models with surrogate_keys(). '''
+    purge(instance.surrogate_keys())
@@ -0,0 +1,26 @@
+from django import template
+from django.conf import settings
+from django.urls import reverse
+from django.utils.html import format_html
+
+register = template.Library()
+
+
+'''
+Hole punching: the parts of a page that depend on the visitor are left
+out of it, and loaded from their own view (see UserFragmentMixin) by
+
+    {% fragment 'team:detail_fragment' object.sport object.team_id object.slug %}
+
+which takes the same arguments as {% url %}. With FRAGMENT_INCLUDES =
+"esi" the proxy fills in the fragment before the page is sent, otherwise
+js/fragments.js fetches it in the browser.
+'''
+
+
+@register.simple_tag
+def fragment(view_name, *args, **kwargs):
+    src = reverse(view_name, args=args, kwargs=kwargs)
+    if settings.FRAGMENT_INCLUDES == "esi":
+        return format_html('<esi:include src="{}" />', src)
+    return format_html('<div data-fragment="{}"></div>', src)
@@ -0,0 +1,107 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from hittalaget.ads.tests.test_views import SetUpTestDataMixin
+from hittalaget.core.cache import TieredCache, bump_cache_version, cache_key, version_key
+from hittalaget.players.models import FootballHistory, FootballPlayer
+from hittalaget.teams.models import Team
+from hittalaget.users.models import City
+
+
+class CacheKeyTest(SetUpTestDataMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_key_is_stable(self):
+        self.assertEqual(cache_key("a", self.team, Team), cache_key("a", self.team, Team))
+        self.assertNotEqual(cache_key("a", self.team), cache_key("b", self.team))
+
+    def test_row_version_is_part_of_the_key(self):
+        key = cache_key("a", self.team)
+        Team.objects.filter(pk=self.team.pk).update(name="AIK")
+        self.team.version += 1
+        self.assertNotEqual(cache_key("a", self.team), key)
+
+
+class CacheKeyBumpTest(SetUpTestDataMixin, TransactionTestCase):
+    ''' The versions are bumped on commit, so these tests commit. '''
+
+    def setUp(self):
+        cache.clear()
+        self.setUpTestData()
+
+    def test_save_changes_object_and_model_keys(self):
+        object_key = cache_key("a", self.city)
+        model_key = cache_key("a", City)
+        other_key = cache_key("a", self.team)
+
+        self.city.name = "Göteborg"
+        self.city.save()
+
+        self.assertNotEqual(cache_key("a", self.city), object_key)
+        self.assertNotEqual(cache_key("a", City), model_key)
+        self.assertEqual(cache_key("a", self.team), other_key)
+
+    def test_key_changes_on_commit(self):
+        key = cache_key("a", self.city)
+        with transaction.atomic():
+            self.city.name = "Göteborg"
+            self.city.save()
+            self.assertEqual(cache_key("a", self.city), key)
+        self.assertNotEqual(cache_key("a", self.city), key)
+
+    def test_history_changes_player_key(self):
+        player = FootballPlayer.objects.create(
+            user=self.user,
+            username=self.user.username,
+            positions="målvakt",
+            foot="höger",
+            experience="korpen",
+            special_ability="snabb",
+        )
+        key = cache_key("a", player)
+        FootballHistory.objects.create(player=player, start_year=2000, end_year=2001, team_name="AIK")
+        self.assertNotEqual(cache_key("a", player), key)
+
+
+class TieredCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.tiered = TieredCache("test", max_entries=2)
+        self.calls = 0
+
+    def load(self):
+        self.calls += 1
+        return self.calls
+
+    def test_value_is_computed_once(self):
+        self.assertEqual(self.tiered.get_or_set("a", ["x"], self.load), 1)
+        self.assertEqual(self.tiered.get_or_set("a", ["x"], self.load), 1)
+        self.tiered.clear()
+        self.assertEqual(self.tiered.get_or_set("a", ["x"], self.load), 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_only_its_versions_invalidate_a_value(self):
+        self.tiered.get_or_set("a", ["x"], self.load)
+        bump_cache_version("y")
+        self.assertEqual(self.tiered.get_or_set("a", ["x"], self.load), 1)
+        cache.set(version_key("x"), 1, None)
+        self.tiered.forget("x")
+        self.assertEqual(self.tiered.get_or_set("a", ["x"], self.load), 2)
+
+    def test_bump_in_other_process_is_seen_after_local_timeout(self):
+        self.tiered.local_timeout = 0
+        self.tiered.get_or_set("a", ["x"], self.load)
+        cache.set(version_key("x"), 1, None)
+        self.assertEqual(self.tiered.get_or_set("a", ["x"], self.load), 2)
+
+    def test_local_level_is_bounded(self):
+        for key in "abc":
+            self.tiered.get_or_set(key, ["x"], self.load)
+        self.assertEqual(list(self.tiered.entries), ["b", "c"])
+
+    def test_none_is_not_cached(self):
+        self.assertIsNone(self.tiered.get_or_set("a", ["x"], lambda: None))
+        self.assertEqual(self.tiered.get_or_set("a", ["x"], self.load), 1)
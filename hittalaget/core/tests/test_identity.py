@@ -0,0 +1,27 @@
+from django.test import RequestFactory, TestCase
+from hittalaget.ads.tests.test_views import SetUpTestDataMixin
+from hittalaget.core.identity import IdentityMap, get_identity_map
+from hittalaget.teams.models import Team
+
+
+class IdentityMapTest(SetUpTestDataMixin, TestCase):
+
+    def test_loads_each_lookup_once(self):
+        identity_map = IdentityMap()
+        with self.assertNumQueries(1):
+            first = identity_map.get(Team, user_id=self.user.pk, sport="fotboll")
+            second = identity_map.get(Team.objects.all(), sport="fotboll", user_id=self.user.pk)
+        self.assertIs(first, second)
+        self.assertEqual(first, self.team)
+
+    def test_remembers_missing_objects(self):
+        identity_map = IdentityMap()
+        with self.assertNumQueries(1):
+            self.assertIsNone(identity_map.get(Team, user_id=self.user.pk, sport="curling"))
+            self.assertIsNone(identity_map.get(Team, user_id=self.user.pk, sport="curling"))
+
+    def test_one_map_per_request(self):
+        factory = RequestFactory()
+        request = factory.get("/")
+        self.assertIs(get_identity_map(request), get_identity_map(request))
+        self.assertIsNot(get_identity_map(request), get_identity_map(factory.get("/")))
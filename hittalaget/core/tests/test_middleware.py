@@ -0,0 +1,57 @@
+import time
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from hittalaget.ads.tests.test_views import SetUpTestDataMixin
+from hittalaget.core.middleware import MicroCacheMiddleware
+from hittalaget.stats.buffer import hits
+from hittalaget.stats.models import ViewCount
+from hittalaget.stats.tests.test_buffer import ResetHitsMixin
+
+
+@override_settings(MICRO_CACHE_TIMEOUT=5)
+class MicroCacheMiddlewareTest(ResetHitsMixin, SetUpTestDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.url = reverse("team:detail", kwargs={
+            "sport": "fotboll",
+            "team_id": self.team.team_id,
+            "slug": self.team.slug,
+        })
+
+    def test_anonymous_page_is_cached(self):
+        self.assertEqual(self.client.get(self.url)['X-Micro-Cache'], "MISS")
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Micro-Cache'], "HIT")
+        self.assertContains(response, "Hammarby IF")
+
+    def test_requests_with_cookies_are_not_cached(self):
+        self.client.cookies['sessionid'] = "abc"
+        self.client.get(self.url)
+        self.assertNotIn('X-Micro-Cache', self.client.get(self.url))
+
+    def test_only_listed_views_are_cached(self):
+        self.client.get(reverse("user:login"))
+        self.assertNotIn('X-Micro-Cache', self.client.get(reverse("user:login")))
+
+    def test_stale_copy_is_served_while_another_request_renders(self):
+        self.client.get(self.url)
+        key = MicroCacheMiddleware.get_cache_key(RequestFactory().get(self.url))
+        entry = cache.get(key)
+        entry['expires_at'] = time.time() - 1
+        cache.set(key, entry)
+        cache.set(key + ":lock", True)
+
+        self.assertEqual(self.client.get(self.url)['X-Micro-Cache'], "STALE")
+        cache.delete(key + ":lock")
+        self.assertEqual(self.client.get(self.url)['X-Micro-Cache'], "MISS")
+
+    def test_cached_views_are_counted(self):
+        self.client.get(self.url)
+        self.client.get(self.url)
+        hits.flush()
+        self.assertEqual(ViewCount.objects.total(ViewCount.Kind.TEAM, self.team.pk), 2)
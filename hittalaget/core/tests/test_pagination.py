@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from hittalaget.core.pagination import EstimatedCountPaginator
+from hittalaget.users.models import City
+
+User = get_user_model()
+
+
+class EstimatedCountPaginatorTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        City.objects.bulk_create([City(name="Stad {}".format(i)) for i in range(30)])
+
+    def count_queries(self, queries):
+        return [query for query in queries if "COUNT(" in query['sql']]
+
+    def test_small_lists_are_counted_exactly(self):
+        paginator = EstimatedCountPaginator(City.objects.filter(name__startswith="Stad").order_by("pk"), 10)
+        self.assertEqual(paginator.count, 30)
+        self.assertFalse(paginator.is_estimated)
+        self.assertEqual(len(paginator.page(3)), 10)
+
+    def test_large_lists_are_estimated(self):
+        queryset = City.objects.filter(name__startswith="Stad").order_by("pk")
+        paginator = EstimatedCountPaginator(queryset, 10, exact_count_threshold=0)
+
+        with CaptureQueriesContext(connection) as queries:
+            count = paginator.count
+        self.assertEqual(self.count_queries(queries), [])
+        self.assertTrue(paginator.is_estimated)
+        self.assertGreaterEqual(count, 0)
+
+    def test_whole_table_uses_reltuples(self):
+        paginator = EstimatedCountPaginator(City.objects.order_by("pk"), 10, exact_count_threshold=0)
+        with CaptureQueriesContext(connection) as queries:
+            paginator.count
+        self.assertIn("reltuples", queries[0]['sql'])
+
+    def test_empty_queryset(self):
+        paginator = EstimatedCountPaginator(City.objects.none(), 10)
+        self.assertEqual(paginator.count, 0)
+
+
+class AdminChangelistTest(TestCase):
+
+    def test_changelists(self):
+        admin = User.objects.create_superuser(
+            username="admin",
+            email="admin@test.com",
+            password="secret",
+            birthday="2000-1-1",
+            city=City.objects.create(name="Stockholm"),
+        )
+        self.client.force_login(admin)
+        for name in ["ads_ad", "conversations_adconversation", "conversations_admessage", "conversations_pmmessage"]:
+            response = self.client.get(reverse("admin:{}_changelist".format(name)))
+            self.assertEqual(response.status_code, 200)
+            self.assertIsInstance(response.context['cl'].paginator, EstimatedCountPaginator)
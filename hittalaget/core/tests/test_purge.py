@@ -0,0 +1,95 @@
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from hittalaget.ads.models import Ad
+from hittalaget.ads.tests.test_views import SetUpTestDataMixin
+from hittalaget.core.purge import get_purger
+from hittalaget.deletions.cascade import delete_ad
+from hittalaget.teams.models import Team
+from hittalaget.users.models import City, User
+
+
+class CachePolicyTest(SetUpTestDataMixin, TestCase):
+
+    def setUp(self):
+        self.url = self.team.get_absolute_url()
+
+    def test_anonymous_page_is_public(self):
+        response = self.client.get(self.url)
+        self.assertIn("public", response['Cache-Control'])
+        self.assertIn("s-maxage", response['Cache-Control'])
+        self.assertEqual(response['Surrogate-Key'], "team-{}".format(self.team.pk))
+        self.assertFalse(response.has_header('Vary'))
+        self.assertTrue(response.has_header('ETag'))
+
+    def test_unchanged_page_is_not_sent_again(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_logged_in_user_gets_the_shared_page(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url)
+        self.assertIn("public", response['Cache-Control'])
+        self.assertFalse(response.has_header('Vary'))
+        self.assertNotContains(response, "csrfmiddlewaretoken")
+        self.assertContains(response, 'data-fragment="{}~fragment/"'.format(self.url))
+
+    def test_fragment_is_private(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url + "~fragment/")
+        self.assertIn("private", response['Cache-Control'])
+        self.assertEqual(response['Vary'], "Cookie")
+        self.assertContains(response, "csrfmiddlewaretoken")
+
+    def test_logged_in_ad_list_is_private(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("ad:list", kwargs={"sport": "fotboll"}))
+        self.assertIn("private", response['Cache-Control'])
+        self.assertFalse(response.has_header('Surrogate-Key'))
+
+    @override_settings(FRAGMENT_INCLUDES="esi")
+    def test_esi_include(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, '<esi:include src="{}~fragment/" />'.format(self.url))
+        self.assertContains(response, '<esi:include src="{}" />'.format(reverse("user:navigation")))
+
+    def test_ad_list_is_tagged(self):
+        response = self.client.get(reverse("ad:list", kwargs={"sport": "fotboll"}))
+        self.assertEqual(response['Surrogate-Key'], "ad-list-fotboll")
+
+
+class PurgeTest(TransactionTestCase):
+    ''' Purges are sent on commit, so these tests commit. '''
+
+    def setUp(self):
+        city = City.objects.create(name="Stockholm")
+        user = User.objects.create_user(username="anon", email="anon@test.com", birthday="2000-1-1", city=city)
+        self.team = Team.objects.create(
+            name="Hammarby IF",
+            founded=1897,
+            home="Tele2 Arena",
+            city=city,
+            sport="fotboll",
+            user=user,
+            level="allsvenskan",
+        )
+        self.purged = get_purger().purged
+        self.purged.clear()
+
+    def test_change_purges_keys(self):
+        self.team.name = "AIK"
+        self.team.save()
+        self.assertEqual(self.purged, ["team-{}".format(self.team.pk)])
+
+    def test_delete_ad_purges_ad_and_list(self):
+        ad = Ad.objects.create(
+            team=self.team,
+            description="Vi söker förstärkning.",
+            positions="målvakt",
+            min_experience="korpen",
+            special_ability="snabb",
+            sport="fotboll",
+        )
+        self.purged.clear()
+        delete_ad(ad)
+        self.assertEqual(self.purged, ["ad-{}".format(ad.pk), "ad-list-fotboll"])
@@ -0,0 +1,218 @@
+import datetime
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from hittalaget.ads.tests.test_views import SetUpTestDataMixin
+from hittalaget.conversations.models import AdConversation, AdMessage, PmConversation, PmMessage
+from hittalaget.core.cache import reference_cache
+from hittalaget.players.models import FootballHistory, FootballPlayer
+from hittalaget.stats.buffer import hits
+from hittalaget.stats.models import ViewCount
+from hittalaget.stats.tests.test_buffer import ResetHitsMixin
+from hittalaget.teams.models import Team
+
+
+'''
+A fixed query budget for every page. Each page is requested with a few
+rows to list, and again with many more, with all caches cleared, so that
+the budget is the one of a cold cache. It must be the same both times: a
+query per listed row (N+1) makes the second count larger. Pages that
+list nothing are requested once.
+'''
+
+FEW = 2
+MANY = 30
+
+
+class QueryBudgetMixin(ResetHitsMixin):
+
+    def count_queries(self, url):
+        cache.clear()
+        reference_cache.clear()
+        hits.reset()  # so that no flush falls in the measured request
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assertQueryBudget(self, budget, url, add_rows):
+        ''' `add_rows(n)` adds n more of the rows that the page lists. '''
+        add_rows(FEW)
+        few = self.count_queries(url)
+        add_rows(MANY - FEW)
+        many = self.count_queries(url)
+        self.assertEqual((few, many), (budget, budget))
+
+    def assertFixedBudget(self, budget, url):
+        ''' For pages without a list, so there are no rows to add. '''
+        self.assertEqual(self.count_queries(url), budget)
+
+    def view_counts(self, kind, object_id):
+        ''' An add_rows() for the daily view counts of one object, summed by its page. '''
+        def add_view_counts(n):
+            first = ViewCount.objects.filter(kind=kind, object_id=object_id).count() + 1
+            ViewCount.objects.bulk_create([
+                ViewCount(kind=kind, object_id=object_id, date=timezone.localdate() - datetime.timedelta(days=day), count=1)
+                for day in range(first, first + n)
+            ])
+        return add_view_counts
+
+
+class PlayerQueryBudgetTest(QueryBudgetMixin, SetUpTestDataMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.player = FootballPlayer.objects.create(
+            user=cls.user,
+            username=cls.user.username,
+            positions="målvakt",
+            foot="höger",
+            experience="korpen",
+            special_ability="snabb",
+        )
+
+    def add_history(self, n):
+        FootballHistory.objects.bulk_create([
+            FootballHistory(player=self.player, start_year=2000, end_year=2001, team_name="Lag {}".format(i))
+            for i in range(n)
+        ])
+
+    def test_detail(self):
+        self.assertQueryBudget(2, self.player.get_absolute_url(), self.add_history)
+
+    def test_detail_fragment(self):
+        self.client.force_login(self.user)
+        url = reverse("player:detail_fragment", kwargs={"sport": "fotboll", "username": self.user.username})
+        self.assertQueryBudget(5, url, self.add_history)
+
+
+class TeamQueryBudgetTest(QueryBudgetMixin, SetUpTestDataMixin, TestCase):
+
+    def add_ads(self, n):
+        for i in range(n):
+            self.create_ad()
+
+    def test_detail(self):
+        self.assertFixedBudget(1, self.team.get_absolute_url())
+
+    def test_detail_fragment(self):
+        self.client.force_login(self.user)
+        url = reverse("team:detail_fragment", kwargs={
+            "sport": "fotboll", "team_id": self.team.team_id, "slug": self.team.slug,
+        })
+        self.assertQueryBudget(4, url, self.view_counts(ViewCount.Kind.TEAM, self.team.pk))
+
+    def test_stats(self):
+        self.client.force_login(self.user)
+        self.assertQueryBudget(10, reverse("team:stats", kwargs={"sport": "fotboll"}), self.add_ads)
+
+
+class AdQueryBudgetTest(QueryBudgetMixin, SetUpTestDataMixin, TestCase):
+
+    def add_ads(self, n):
+        for i in range(n):
+            self.create_ad()
+
+    def test_list(self):
+        self.assertQueryBudget(1, reverse("ad:list", kwargs={"sport": "fotboll"}), self.add_ads)
+
+    def test_list_logged_in(self):
+        self.client.force_login(self.user)
+        self.assertQueryBudget(3, reverse("ad:list", kwargs={"sport": "fotboll"}), self.add_ads)
+
+    def test_search(self):
+        url = reverse("ad:search", kwargs={"sport": "fotboll"}) + "?q=målvakt"
+        self.assertQueryBudget(4, url, self.add_ads)
+
+    def test_feed(self):
+        self.assertQueryBudget(1, reverse("ad:feed", kwargs={"sport": "fotboll"}), self.add_ads)
+
+    def test_detail(self):
+        ad = self.create_ad()
+        self.assertFixedBudget(1, ad.get_absolute_url())
+
+    def test_detail_fragment(self):
+        ad = self.create_ad()
+        self.client.force_login(self.user)
+        url = reverse("ad:detail_fragment", kwargs={"sport": "fotboll", "ad_id": ad.ad_id, "slug": ad.slug})
+        self.assertQueryBudget(4, url, self.view_counts(ViewCount.Kind.AD, ad.pk))
+
+
+class UserQueryBudgetTest(QueryBudgetMixin, SetUpTestDataMixin, TestCase):
+
+    def test_detail(self):
+        ''' The teams and profiles of a user are at most one per sport. '''
+        FootballPlayer.objects.create(
+            user=self.user,
+            username=self.user.username,
+            positions="målvakt",
+            foot="höger",
+            experience="korpen",
+            special_ability="snabb",
+        )
+        self.assertFixedBudget(2, reverse("user:detail", kwargs={"username": self.user.username}))
+
+    def test_navigation(self):
+        self.client.force_login(self.user)
+        self.assertFixedBudget(2, reverse("user:navigation"))
+
+
+class ConversationQueryBudgetTest(QueryBudgetMixin, SetUpTestDataMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.player = cls.create_team("spelare", cls.city).user
+        cls.ad = cls.create_ad()
+        cls.conversation = cls.create_ad_conversation(cls.ad, cls.player)
+        cls.pm = cls.create_pm_conversation(cls.user, cls.player)
+
+    @classmethod
+    def create_ad_conversation(cls, ad, player):
+        conversation = AdConversation.objects.create(ad=ad, users_arr=[ad.team.user.username, player.username])
+        conversation.users.add(ad.team.user, player)
+        return conversation
+
+    @classmethod
+    def create_pm_conversation(cls, user, other):
+        conversation = PmConversation.objects.create(users_arr=[user.username, other.username])
+        conversation.users.add(user, other)
+        return conversation
+
+    def add_conversations(self, n):
+        for i in range(n):
+            team = self.create_team("lag{}".format(Team.objects.count()), self.city)
+            self.create_ad_conversation(self.create_ad(team=team), self.player)
+            self.create_pm_conversation(team.user, self.player)
+
+    def add_ad_messages(self, n):
+        AdMessage.objects.bulk_create([
+            AdMessage(conversation=self.conversation, author=author, content="Hej!")
+            for i in range(n) for author in [self.user, self.player]
+        ])
+
+    def add_pm_messages(self, n):
+        PmMessage.objects.bulk_create([
+            PmMessage(conversation=self.pm, author=author, content="Hej!")
+            for i in range(n) for author in [self.user, self.player]
+        ])
+
+    def test_list(self):
+        self.client.force_login(self.player)
+        self.assertQueryBudget(4, reverse("conversation:list"), self.add_conversations)
+
+    def test_ad_detail(self):
+        self.client.force_login(self.player)
+        url = reverse("conversation:ad_detail", kwargs={"conversation_id": self.conversation.conversation_id})
+        self.assertQueryBudget(5, url, self.add_ad_messages)
+
+    def test_pm_detail(self):
+        self.client.force_login(self.player)
+        url = reverse("conversation:pm_detail", kwargs={"username": self.user.username})
+        self.assertQueryBudget(4, url, self.add_pm_messages)
@@ -0,0 +1,25 @@
+from django.db.models import F
+
+
+'''
+Row versions. Models with a `version` field get it bumped on every save
+(connect bump_version to pre_save and refresh_version to post_save), and
+code that changes such rows with update() bumps it with VERSION_BUMP. The
+JSON API derives its ETags from it, see hittalaget/api/views.py.
+
+The bump is done by the database, so that two concurrent saves end up
+with two different versions instead of both writing n + 1.
+'''
+
+VERSION_BUMP = F('version') + 1
+
+
+def bump_version(sender, instance, **kwargs):
+    if not instance._state.adding:
+        instance.version = VERSION_BUMP
+
+
+def refresh_version(sender, instance, created=False, **kwargs):
+    ''' Read back the version written by bump_version(). Connect it before other post_save receivers. '''
+    if not created and not isinstance(instance.version, int):
+        instance.version = sender._base_manager.filter(pk=instance.pk).values_list('version', flat=True).get()
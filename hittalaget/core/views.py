@@ -0,0 +1,76 @@
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from .cache import cache_key
+
+
+class FragmentCacheMixin:
+    '''
+    Adds fragment_key and fragment_timeout to the context of a detail
+    view, for caching the parts of the page that are the same for every
+    visitor with {% cache fragment_timeout <name> fragment_key %}. The key
+    is derived from the versions of get_fragment_dependencies(), see
+    core/cache.py, so the fragments never need to be purged.
+    '''
+    fragment_timeout = 60 * 60
+
+    def get_fragment_dependencies(self):
+        return [self.object]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['fragment_key'] = cache_key(type(self).__name__, *self.get_fragment_dependencies())
+        context['fragment_timeout'] = self.fragment_timeout
+        return context
+
+
+class CachePolicyMixin:
+    '''
+    Cache headers for pages that look the same to every anonymous visitor.
+
+    Anonymous GETs may be cached by the reverse proxy for cache_s_maxage
+    seconds, and are tagged with get_surrogate_keys() so that they can be
+    purged when what they show changes (see core/purge.py). Browsers must
+    revalidate, with the ETag set by ConditionalGetMiddleware. Pages for
+    logged-in users are private, and the page depends on the session
+    cookie, hence Vary: Cookie.
+
+    Pages that load everything that depends on the user as fragments (see
+    UserFragmentMixin) set shared_with_users. They never read the session,
+    and the same copy is served to everyone.
+
+    Views served by the proxy are not counted by ViewCountMixin, which is
+    why cache_s_maxage is kept short even though pages are purged.
+    '''
+    cache_s_maxage = 60 * 5
+    shared_with_users = False
+
+    def get_surrogate_keys(self):
+        return []
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        if request.method not in ('GET', 'HEAD') or response.status_code != 200:
+            return response
+
+        if not self.shared_with_users and request.user.is_authenticated:
+            patch_cache_control(response, private=True, no_cache=True)
+        else:
+            patch_cache_control(response, public=True, max_age=0, s_maxage=self.cache_s_maxage)
+            response['Surrogate-Key'] = " ".join(self.get_surrogate_keys())
+        if not self.shared_with_users:
+            patch_vary_headers(response, ['Cookie'])
+        return response
+
+
+class UserFragmentMixin:
+    '''
+    A fragment of a public page with the parts that depend on the visitor:
+    the navigation, edit links for the owner, and forms with a CSRF token.
+    The page includes it with {% fragment %} (see templatetags/fragments.py),
+    and the fragment is never cached by anyone but is cheap to render.
+    '''
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Cookie'])
+        return response
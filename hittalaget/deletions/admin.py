@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import DeletionJob
+
+
+@admin.register(DeletionJob)
+class DeletionJobAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'object_id', 'step', 'deleted_rows', 'created_at', 'finished_at']
+    list_filter = ['kind', 'step']
@@ -0,0 +1,140 @@
+from django.db import transaction
+from django.utils import timezone
+from hittalaget.ads.cache import bump_feed_version
+from hittalaget.ads.models import Ad
+from hittalaget.conversations.models import AdConversation, AdMessage
+from hittalaget.core.cache import bump_model_version, bump_object_versions
+from hittalaget.core.purge import purge, surrogate_key
+from hittalaget.core.versioning import VERSION_BUMP
+from hittalaget.stats import counters
+from hittalaget.teams.models import Team
+from hittalaget.users.cache import invalidate_users
+from hittalaget.users.models import User
+from .models import DeletionJob
+
+
+'''
+Deleting a team used to cascade through all of its ads, conversations
+and messages in the request. Instead, delete_team() and delete_ad() mark
+the rows as deleted, which hides them (see AdManager and TeamManager),
+close the conversations and queue a DeletionJob. The process_deletions
+command then purges the rows bottom up, at most batch_size rows per
+transaction, so no request or batch holds locks on a whole club.
+'''
+
+
+def team_rows(team_id):
+    return [
+        ("messages", AdMessage.objects.filter(conversation__ad__team_id=team_id)),
+        ("conversations", AdConversation.objects.filter(ad__team_id=team_id)),
+        ("ads", Ad.all_objects.filter(team_id=team_id)),
+        ("team", Team.all_objects.filter(pk=team_id)),
+    ]
+
+
+def ad_rows(ad_id):
+    return [
+        ("messages", AdMessage.objects.filter(conversation__ad_id=ad_id)),
+        ("conversations", AdConversation.objects.filter(ad_id=ad_id)),
+        ("ads", Ad.all_objects.filter(pk=ad_id)),
+    ]
+
+
+STEPS = {
+    DeletionJob.Kind.TEAM: team_rows,
+    DeletionJob.Kind.AD: ad_rows,
+}
+
+
+#   ---------------------------------------   #
+#   ~~~~~~~~~~~~~   MARKING   ~~~~~~~~~~~~~   #
+#   ---------------------------------------   #
+
+
+@transaction.atomic
+def delete_teams(teams):
+    ''' Mark a queryset of teams, and their ads, as deleted. '''
+    now = timezone.now()
+    teams = list(teams.values_list('pk', 'sport', 'user_id'))
+    team_ids = [pk for pk, sport, user_id in teams]
+
+    AdConversation.objects.filter(ad__team_id__in=team_ids, is_active=True).update(is_active=False)
+    Ad.objects.filter(team_id__in=team_ids).update(deleted_at=now, version=VERSION_BUMP)
+    Team.objects.filter(pk__in=team_ids).update(deleted_at=now, version=VERSION_BUMP)
+    DeletionJob.objects.bulk_create([
+        DeletionJob(kind=DeletionJob.Kind.TEAM, object_id=pk) for pk in team_ids
+    ])
+    counters.reconcile_sports({sport for pk, sport, user_id in teams})
+
+    ''' update() does not send signals, so the owners and caches are invalidated here. '''
+    user_ids = {user_id for pk, sport, user_id in teams}
+    invalidate_users(user_ids)
+    transaction.on_commit(lambda: bump_object_versions(User, user_ids))
+    transaction.on_commit(lambda: bump_model_version(Team))
+    transaction.on_commit(lambda: bump_model_version(Ad))
+    purge(
+        [surrogate_key("team", pk) for pk in team_ids] +
+        [surrogate_key("ad-list", sport) for pk, sport, user_id in teams]
+    )
+
+    for sport in {sport for pk, sport, user_id in teams}:
+        transaction.on_commit(lambda sport=sport: bump_feed_version(sport))
+
+    return len(team_ids)
+
+
+def delete_team(team):
+    delete_teams(Team.objects.filter(pk=team.pk))
+
+
+@transaction.atomic
+def delete_ad(ad):
+    Ad.objects.filter(pk=ad.pk).update(deleted_at=timezone.now(), version=VERSION_BUMP)
+    counters.ad_deleted(ad)
+    AdConversation.objects.filter(ad=ad, is_active=True).update(is_active=False)
+    DeletionJob.objects.create(kind=DeletionJob.Kind.AD, object_id=ad.pk)
+    counters.reconcile_sports([ad.sport])
+
+    transaction.on_commit(lambda: bump_model_version(Ad))
+    transaction.on_commit(lambda: bump_feed_version(ad.sport))
+    purge(ad.surrogate_keys())
+
+
+#   ---------------------------------------   #
+#   ~~~~~~~~~~~~~   PURGING   ~~~~~~~~~~~~~   #
+#   ---------------------------------------   #
+
+
+@transaction.atomic
+def process_batch(batch_size):
+    '''
+    Delete at most batch_size rows of the oldest pending job. Jobs locked
+    by another worker are skipped. Returns the job, or None when there is
+    nothing left to do.
+    '''
+    job = (
+        DeletionJob.objects
+        .filter(finished_at__isnull=True)
+        .order_by('created_at')
+        .select_for_update(skip_locked=True)
+        .first()
+    )
+    if job is None:
+        return None
+
+    steps = STEPS[job.kind](job.object_id)
+    names = [name for name, queryset in steps]
+
+    for name, queryset in steps[names.index(job.step):]:
+        job.step = name
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if ids:
+            queryset.model._base_manager.filter(pk__in=ids).delete()
+            job.deleted_rows += len(ids)
+            break
+    else:
+        job.step = "done"
+        job.finished_at = timezone.now()
+
+    job.save()
+    return job
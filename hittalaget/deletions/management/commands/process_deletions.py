@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from hittalaget.deletions.cascade import process_batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Purge the rows of deleted teams and ads in batches. Meant to be "
+        "run periodically, e.g. from cron every minute."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        jobs = set()
+        finished = 0
+
+        while True:
+            job = process_batch(options["batch_size"])
+            if job is None:
+                break
+            jobs.add(job.pk)
+            if job.finished_at:
+                finished += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            "{} deletion jobs processed, {} finished.".format(len(jobs), finished)
+        ))
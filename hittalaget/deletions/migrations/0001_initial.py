@@ -0,0 +1,30 @@
+# Generated by Django 3.1.14 on 2026-10-19 16:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('team', 'Team'), ('ad', 'Ad')], max_length=10)),
+                ('object_id', models.PositiveIntegerField()),
+                ('step', models.CharField(default='messages', max_length=20)),
+                ('deleted_rows', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='deletionjob',
+            index=models.Index(condition=models.Q(finished_at__isnull=True), fields=['created_at'], name='deletion_job_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.db import models
+
+
+class DeletionJob(models.Model):
+    '''
+    A team or ad that has been marked as deleted, and whose rows are
+    purged in batches by the process_deletions command. `step` is the
+    kind of row currently being deleted, see cascade.STEPS.
+    '''
+
+    class Kind(models.TextChoices):
+        TEAM = "team"
+        AD = "ad"
+
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    object_id = models.PositiveIntegerField()
+    step = models.CharField(max_length=20, default="messages")
+    deleted_rows = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(finished_at__isnull=True),
+                name="deletion_job_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return "{} {}: {} ({} rows)".format(self.kind, self.object_id, self.step, self.deleted_rows)
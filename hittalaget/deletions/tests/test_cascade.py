@@ -0,0 +1,91 @@
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from hittalaget.ads.models import Ad
+from hittalaget.ads.tests.test_views import SetUpTestDataMixin
+from hittalaget.conversations.models import AdConversation, AdMessage
+from hittalaget.deletions.models import DeletionJob
+from hittalaget.teams.models import Team
+
+import io
+
+
+class CascadeTest(SetUpTestDataMixin, TestCase):
+
+    def setUp(self):
+        self.ads = [self.create_ad() for _ in range(2)]
+        for ad in self.ads:
+            conversation = AdConversation.objects.create(ad=ad, users_arr=["spelare", "anon"])
+            for _ in range(2):
+                AdMessage.objects.create(conversation=conversation, author=self.user, content="Hej!")
+        self.client.force_login(self.user)
+
+    def process_deletions(self, **kwargs):
+        out = io.StringIO()
+        call_command("process_deletions", stdout=out, **kwargs)
+        return out.getvalue()
+
+    def test_delete_team_hides_team_and_ads(self):
+        response = self.client.post(reverse("team:delete", kwargs={"sport": "fotboll"}))
+        self.assertEqual(response.status_code, 302)
+
+        self.assertFalse(Team.objects.filter(pk=self.team.pk).exists())
+        self.assertFalse(Ad.objects.exists())
+        self.assertEqual(Ad.all_objects.count(), 2)
+        self.assertFalse(AdConversation.objects.filter(is_active=True).exists())
+        self.assertEqual(DeletionJob.objects.get().kind, DeletionJob.Kind.TEAM)
+
+    def test_purge_team_in_batches(self):
+        self.client.post(reverse("team:delete", kwargs={"sport": "fotboll"}))
+        output = self.process_deletions(batch_size=1)
+
+        self.assertIn("1 deletion jobs processed, 1 finished.", output)
+        self.assertFalse(AdMessage.objects.exists())
+        self.assertFalse(AdConversation.objects.exists())
+        self.assertFalse(Ad.all_objects.exists())
+        self.assertFalse(Team.all_objects.filter(pk=self.team.pk).exists())
+
+        job = DeletionJob.objects.get()
+        self.assertEqual((job.step, job.deleted_rows), ("done", 9))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_team_can_be_recreated_before_purge(self):
+        self.client.post(reverse("team:delete", kwargs={"sport": "fotboll"}))
+        Team.objects.create(
+            name="Nya laget",
+            founded=2020,
+            home="Arenan",
+            city=self.city,
+            sport="fotboll",
+            user=self.user,
+            level="korpen",
+        )
+        self.assertEqual(Team.all_objects.filter(user=self.user).count(), 2)
+
+    def test_delete_ad(self):
+        ad = self.ads[0]
+        self.client.post(reverse("ad:delete", kwargs={"sport": "fotboll", "ad_id": ad.ad_id, "slug": ad.slug}))
+        self.assertEqual(list(Ad.objects.all()), [self.ads[1]])
+
+        self.process_deletions()
+        self.assertFalse(Ad.all_objects.filter(pk=ad.pk).exists())
+        self.assertEqual(AdMessage.objects.count(), 2)
+        self.assertEqual(DeletionJob.objects.get().deleted_rows, 4)
+
+    def test_conversations_of_deleted_ad_are_hidden(self):
+        ad = self.ads[0]
+        conversation = AdConversation.objects.get(ad=ad)
+        conversation.users.add(self.user)
+        self.client.post(reverse("ad:delete", kwargs={"sport": "fotboll", "ad_id": ad.ad_id, "slug": ad.slug}))
+
+        kwargs = {"conversation_id": conversation.conversation_id}
+        self.assertEqual(self.client.get(reverse("conversation:ad_detail", kwargs=kwargs)).status_code, 404)
+        self.assertEqual(self.client.post(reverse("conversation:ad_delete", kwargs=kwargs)).status_code, 404)
+        response = self.client.post(reverse("conversation:ad_create_message", kwargs=kwargs), {"content": "Hej!"})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(AdMessage.objects.filter(conversation=conversation).count(), 2)
+
+    def test_delete_user_hides_teams(self):
+        self.client.post(reverse("user:delete_account"))
+        self.assertFalse(Team.objects.filter(user=self.user).exists())
+        self.assertEqual(DeletionJob.objects.count(), 1)
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.14 on 2026-10-19 15:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='footballplayer',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
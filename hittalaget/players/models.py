@@ -1,11 +1,23 @@
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from hittalaget.core.cache import bump_object_versions, bump_versions
+from hittalaget.core.purge import purge_surrogate_keys, surrogate_key
+from hittalaget.core.versioning import bump_version, refresh_version
 from django.urls import reverse
 from multiselectfield import MultiSelectField
+from hittalaget.users.models import City, bump_owner_version
 import datetime
 
 
+class PlayerQuerySet(models.QuerySet):
+
+    def near(self, city, distance):
+        ''' Players living within `distance` km of `city`, see CityQuerySet.near(). '''
+        return self.filter(user__city__in=City.objects.near(city, distance))
+
+
 class FootballPlayer(models.Model):
 
     class Position(models.TextChoices):
@@ -74,8 +86,16 @@ class FootballPlayer(models.Model):
         null=True
     )
 
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    objects = PlayerQuerySet.as_manager()
+
     def get_absolute_url(self):
         return reverse("player:detail", kwargs={"sport": "fotboll", "username": self.username })
+
+    def surrogate_keys(self):
+        ''' The key of the cached pages that show the player, see core/purge.py. '''
+        return [surrogate_key("player", self.pk)]
     
 
 class History(models.Model):
@@ -90,4 +110,30 @@ class History(models.Model):
 class FootballHistory(History):
     ''' Each instance is a history entry attached to a particular football player. '''
     player = models.ForeignKey(FootballPlayer, on_delete=models.CASCADE, related_name="history_entries")    
+
+    def surrogate_keys(self):
+        ''' Shown on the page of the player. '''
+        return [surrogate_key("player", self.player_id)]
     
+
+
+def bump_player_version(sender, instance, **kwargs):
+    ''' History entries are shown as part of their player profile. '''
+    player_id = instance.player_id
+    transaction.on_commit(lambda: bump_object_versions(FootballPlayer, [player_id]))
+
+
+pre_save.connect(bump_version, sender=FootballPlayer)
+post_save.connect(refresh_version, sender=FootballPlayer)
+post_save.connect(bump_versions, sender=FootballPlayer)
+post_save.connect(bump_owner_version, sender=FootballPlayer)
+post_delete.connect(bump_versions, sender=FootballPlayer)
+post_delete.connect(bump_owner_version, sender=FootballPlayer)
+post_save.connect(bump_versions, sender=FootballHistory)
+post_save.connect(bump_player_version, sender=FootballHistory)
+post_delete.connect(bump_versions, sender=FootballHistory)
+post_delete.connect(bump_player_version, sender=FootballHistory)
+post_save.connect(purge_surrogate_keys, sender=FootballPlayer)
+post_delete.connect(purge_surrogate_keys, sender=FootballPlayer)
+post_save.connect(purge_surrogate_keys, sender=FootballHistory)
+post_delete.connect(purge_surrogate_keys, sender=FootballHistory)
@@ -40,6 +40,11 @@ class FootballPlayerTest(TestCase):
         })
         self.assertTrue(self.football_player.get_absolute_url, expected_url)
 
+    def test_near(self):
+        far_away = City.objects.create(name="Göteborg")
+        self.assertEqual(list(FootballPlayer.objects.near(self.city, 10)), [self.football_player])
+        self.assertEqual(list(FootballPlayer.objects.near(far_away, 10)), [])
+
 
 
 
@@ -1,5 +1,6 @@
 from django.contrib.auth import get_user_model
-from django.test import TestCase, Client
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, Client
 from django.urls import reverse
 from hittalaget.players.models import FootballPlayer, FootballHistory
 from hittalaget.players.forms import FootballPlayerForm, FootballHistoryForm
@@ -108,7 +109,19 @@ class DetailViewTest(SetUpTestDataMixin, TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, "players/detail.html")
         self.assertEqual(response.context['object'], self.user.football_player)
+
+    def test_GET_fragment(self):
+        response = self.client.get(self.url + "~fragment/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "players/detail_fragment.html")
         self.assertIn("status", response.context)
+        self.assertFalse(response.context['is_owner'])
+
+    def test_GET_fragment_as_owner(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url + "~fragment/")
+        self.assertTrue(response.context['is_owner'])
+        self.assertContains(response, reverse("player:create_history", kwargs={"sport": "fotboll"}))
 
     def test_GET_invalid_sport(self):
         url = reverse("player:detail", kwargs={
@@ -127,6 +140,33 @@ class DetailViewTest(SetUpTestDataMixin, TestCase):
         self.assertEqual(response.status_code, 404)
 
 
+class DetailViewCacheTest(SetUpTestDataMixin, TransactionTestCase):
+    ''' The cache versions are bumped on commit, so these tests commit. '''
+
+    def setUp(self):
+        cache.clear()
+        self.setUpTestData()
+        self.url = reverse("player:detail", kwargs={
+            "sport": "fotboll",
+            "username": self.user.username,
+        })
+
+    def test_history_is_cached_until_it_changes(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            # only the player, the history entries are in the fragment
+            self.client.get(self.url)
+
+        FootballHistory.objects.create(
+            player=self.user.football_player,
+            start_year=2010,
+            end_year=2012,
+            team_name="Hammarby IF",
+        )
+        response = self.client.get(self.url)
+        self.assertContains(response, "Hammarby IF")
+
+
 class CreateViewTest(SetUpTestDataMixin, TestCase):
 
     @classmethod
@@ -265,6 +305,12 @@ class UpdateViewTest(SetUpMixin, TestCase):
         self.assertIsInstance(response.context['form'], FootballPlayerForm)
         # must add more checks => see template
 
+    def test_profile_is_loaded_once(self):
+        ''' user (the session is cached) and profile: ProfileCheckMixin and GetObjectMixin share the profile. '''
+        self.client.force_login(self.user)
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
     def test_authorized_POST_with_profile(self):
         self.client.force_login(self.user)
         form_data = {
@@ -12,6 +12,7 @@ urlpatterns = [
   path("<str:sport>/lagg-till-historik/", views.CreatePlayerHistory.as_view(), name="create_history"),
   path("<str:sport>/historik/<int:id>/uppdatera/", views.UpdatePlayerHistory.as_view(), name="update_history"),
   path("<str:sport>/historik/<int:id>/ta-bort/", views.DeletePlayerHistory.as_view(), name="delete_history"),
+  path("<str:sport>/<str:username>/~fragment/", views.PlayerDetailFragmentView.as_view(), name="detail_fragment"),
   path("<str:sport>/<str:username>/", views.PlayerDetailView.as_view(), name="detail"),
 ]
 
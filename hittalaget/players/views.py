@@ -16,6 +16,11 @@ from django.views.generic import (
 )
 from .forms import FootballPlayerForm, FootballHistoryForm
 from .models import FootballPlayer, FootballHistory
+from hittalaget.core.identity import get_identity_map
+from hittalaget.core.purge import surrogate_key
+from hittalaget.core.views import CachePolicyMixin, FragmentCacheMixin, UserFragmentMixin
+from hittalaget.stats.models import ViewCount
+from hittalaget.stats.views import ViewCountMixin
 
 
 
@@ -36,6 +41,26 @@ Next iteration:
 #   ---------------------------------------   #
 
 
+def get_profile(request, sport):
+    """
+    Return the logged-in user's profile for the sport, or None. It is
+    loaded at most once per request, see core/identity.py, and not at all
+    if the cached user has no profile for the sport, see users/cache.py.
+    Raises a 404 for unknown sports.
+    """
+    models = {
+        "fotboll": FootballPlayer,
+    }
+    try:
+        model = models[sport]
+    except KeyError:
+        raise Http404()
+    pointers = getattr(request.user, "player_pointers", None)
+    if pointers is not None and sport not in pointers:
+        return None
+    return get_identity_map(request).get(model, user_id=request.user.pk)
+
+
 class GetFormClassMixin:
     """
     Return the right form for the right sport. Used by
@@ -59,22 +84,13 @@ class GetObjectMixin:
     Used by PlayerUpdateView, PlayerDeleteView and UpdatePlayerStatus.
     """
     def get_object(self, queryset=None):
-        user = self.request.user
-        sport = self.kwargs['sport']
-        
-        profiles = {
-            "fotboll": "football_player",
-        }
-
         '''
         The dispatch() method of classes that uses this mixin will check
-        if user has profile and for KeyError, so we don't have to repeat
-        that process here. We simply have to get and return the object.
+        if user has profile, and get_profile() remembers it, so this does
+        not run another query.
         '''
-            
         if not hasattr(self, "object") or self.object is None:
-            profile = getattr(user, profiles[sport])
-            self.object = profile
+            self.object = get_profile(self.request, self.kwargs['sport'])
         return self.object
 
 
@@ -100,49 +116,63 @@ class ProfileCheckMixin:
     def dispatch(self, request, *args, **kwargs):
         user = request.user
         sport = kwargs['sport']
-
-        profiles = {
-            "fotboll": "football_player",
-        }
     
         # redirect client to login page if unauthorized
         if not user.is_authenticated:
             return redirect_to_login(request.path, reverse("user:login"))
 
+        if get_profile(request, sport) is not None:
+            return super().dispatch(request, *args, **kwargs)
+        else:
+            return redirect(reverse("player:create", kwargs={"sport": sport}))
+
+
+class PlayerLookupMixin:
+    '''
+    Find a player profile by sport and username. Used by PlayerDetailView
+    and the JSON API, which passes its own trimmed queryset.
+    '''
+    def get_queryset(self):
+        models = {
+            "fotboll": FootballPlayer,
+        }
         try:
-            if hasattr(user, profiles[sport]):
-                return super().dispatch(request, *args, **kwargs)
-            else:
-                return redirect(reverse("player:create", kwargs={"sport": sport}))
+            return models[self.kwargs['sport']].objects.select_related('user')
         except KeyError:
             raise Http404()
 
+    def get_object(self, queryset=None):
+        if queryset is None:
+            queryset = self.get_queryset()
+        if not hasattr(self, "object"):
+            self.object = get_object_or_404(queryset, username=self.kwargs['username'])
+        return self.object
+
 
 #   ---------------------------------------   #
 #   ~~~~~~~~~~~   PLAYER VIEWS   ~~~~~~~~~~   #            
 #   ---------------------------------------   #
 
 
-class PlayerDetailView(DetailView):
+class PlayerDetailView(CachePolicyMixin, PlayerLookupMixin, ViewCountMixin, FragmentCacheMixin, DetailView):
+    """
+    The same page for every visitor, the status and the owner's links are
+    in PlayerDetailFragmentView.
+    """
     template_name = "players/detail.html"
+    view_count_kind = ViewCount.Kind.PLAYER
+    shared_with_users = True
 
-    def get_object(self, queryset=None):
-        sport = self.kwargs['sport']
-        username = self.kwargs['username']
+    def get_surrogate_keys(self):
+        return [surrogate_key("player", self.object.pk)]
 
-        models = {
-            "fotboll": FootballPlayer,
-        }
-        
-        try:
-            if not hasattr(self, "object"):
-                self.object = get_object_or_404(
-                    models[sport].objects.select_related('user'),
-                    username=username
-                )
-        except KeyError:
-            raise Http404()
-        return self.object
+    def get_fragment_dependencies(self):
+        """ The history entries bump the version of their player. """
+        return [self.object, self.object.user]
+
+
+class PlayerDetailFragmentView(UserFragmentMixin, PlayerLookupMixin, DetailView):
+    template_name = "players/detail_fragment.html"
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -151,6 +181,10 @@ class PlayerDetailView(DetailView):
             context['status'] = "söker klubb"
         else:
             context['status'] = "upptagen"
+        context['is_owner'] = profile.user_id == self.request.user.pk
+        if context['is_owner']:
+            context['view_count'] = ViewCount.objects.total(ViewCount.Kind.PLAYER, profile.pk)
+            context['history_entries'] = profile.history_entries.all()
         return context
 
 
@@ -169,18 +203,11 @@ class PlayerCreateView(GetFormClassMixin, GetSuccessUrlMixin, CreateView):
         if not user.is_authenticated:
             return redirect_to_login(request.path, reverse("user:login"))
 
-        profiles = {
-            "fotboll": "football_player",
-        }
-
-        try:
-            if hasattr(user, profiles[sport]):
-                profile = getattr(user, profiles[sport])
-                return redirect(profile.get_absolute_url())
-            else:
-                return super().dispatch(request, *args, **kwargs)
-        except KeyError:
-            raise Http404()
+        profile = get_profile(request, sport)
+        if profile is not None:
+            return redirect(profile.get_absolute_url())
+        else:
+            return super().dispatch(request, *args, **kwargs)
 
 
     def form_valid(self, form):
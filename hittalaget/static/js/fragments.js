@@ -0,0 +1,6 @@
+/* Loads the fragments of the page that depend on the visitor, see core/templatetags/fragments.py. */
+document.querySelectorAll("[data-fragment]").forEach(function (element) {
+  fetch(element.dataset.fragment, { credentials: "same-origin" })
+    .then(function (response) { return response.ok ? response.text() : ""; })
+    .then(function (html) { element.outerHTML = html; });
+});
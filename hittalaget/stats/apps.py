@@ -0,0 +1,24 @@
+from django.apps import AppConfig
+from django.core.signals import request_finished
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+
+
+class StatsConfig(AppConfig):
+    name = 'hittalaget.stats'
+
+    def ready(self):
+        ''' Flush buffered hits after the requests, see buffer.py. '''
+        from .buffer import hits
+        request_finished.connect(hits.flush_if_due, dispatch_uid="flush_hits")
+
+        ''' The counters per sport, see counters.py. '''
+        from hittalaget.ads.models import Ad
+        from hittalaget.players.models import FootballPlayer
+        from hittalaget.teams.models import Team
+        from .counters import count_delete, count_save, load_sport_counter, remember_sport_counter
+
+        for model in [FootballPlayer, Team, Ad]:
+            post_init.connect(remember_sport_counter, sender=model)
+            pre_save.connect(load_sport_counter, sender=model)
+            post_save.connect(count_save, sender=model)
+            post_delete.connect(count_delete, sender=model)
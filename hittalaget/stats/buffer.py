@@ -0,0 +1,93 @@
+import logging
+import threading
+import time
+
+from collections import Counter
+from django.db import connection, DatabaseError
+from django.utils import timezone
+from .models import ViewCount
+
+logger = logging.getLogger(__name__)
+
+
+class HitBuffer:
+    '''
+    Collects page views in memory and writes them to ViewCount in one
+    batched upsert, instead of one UPDATE per request on the same hot rows.
+
+    The buffer is flushed when a request finishes after flush_interval
+    seconds have passed, or when max_keys distinct objects are pending,
+    see StatsConfig.ready(). Hits of a worker that stops in between are
+    lost, which is fine for view counts.
+    '''
+
+    def __init__(self, flush_interval=30, max_keys=1000):
+        self.flush_interval = flush_interval
+        self.max_keys = max_keys
+        self.pending = Counter()
+        self.lock = threading.Lock()
+        self.last_flush = time.monotonic()
+
+    def add(self, kind, object_id):
+        key = (kind, object_id, timezone.localdate())
+
+        with self.lock:
+            self.pending[key] += 1
+
+    def flush_if_due(self, **kwargs):
+        ''' request_finished receiver. '''
+        with self.lock:
+            due = self.pending and (
+                len(self.pending) >= self.max_keys or
+                time.monotonic() - self.last_flush >= self.flush_interval
+            )
+
+        if due:
+            self.flush()
+
+    def flush(self):
+        ''' Write all pending counts. Returns the number of rows upserted. '''
+        with self.lock:
+            pending, self.pending = self.pending, Counter()
+            self.last_flush = time.monotonic()
+
+        if not pending:
+            return 0
+
+        try:
+            upsert(pending)
+        except DatabaseError:
+            ''' Put the counts back, so that they are retried on the next flush. '''
+            with self.lock:
+                self.pending.update(pending)
+            logger.exception("Could not flush %s view counts.", len(pending))
+            return 0
+
+        return len(pending)
+
+    def reset(self):
+        ''' Drop all pending counts and restart the interval, for tests. '''
+        with self.lock:
+            self.pending = Counter()
+            self.last_flush = time.monotonic()
+
+
+def upsert(counts):
+    ''' INSERT ... ON CONFLICT DO UPDATE for a {(kind, object_id, date): count} dict. '''
+    table = ViewCount._meta.db_table
+    rows = sorted(counts.items())  # fixed order, so that concurrent flushes do not deadlock
+    values = ", ".join(["(%s, %s, %s, %s)"] * len(rows))
+    params = [value for (kind, object_id, date), count in rows for value in (kind, object_id, date, count)]
+
+    sql = (
+        "INSERT INTO {table} (kind, object_id, date, count) VALUES {values} "
+        "ON CONFLICT (kind, object_id, date) "
+        "DO UPDATE SET count = {table}.count + EXCLUDED.count"
+    ).format(table=table, values=values)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+hits = HitBuffer()
+
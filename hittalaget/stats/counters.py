@@ -0,0 +1,293 @@
+from django.db import transaction
+from django.db.models import Count, F, Func, Q, Value
+from hittalaget.ads.models import Ad, LIVE_ADS
+from hittalaget.conversations.models import AdConversation
+from hittalaget.core.cache import bump_model_version, model_version_name, reference_cache
+from hittalaget.players.models import FootballPlayer
+from hittalaget.teams.models import Team
+from .models import AdStats, SportStats, TeamStats
+
+
+'''
+Incremental counters for the team dashboard.
+
+The views call the event functions below inside the transaction of the
+write they count, right after the write, so a counter never commits
+without its write. Each event is one UPDATE per counter row. Rows that
+do not exist yet (teams and ads from before the counters, or rows lost
+to drift) are rebuilt from the source tables instead, after the write,
+so they are correct from the start.
+
+reconcile_teams() and reconcile_ads() recompute the counters from the
+source tables and repair the rows that have drifted. They are used by the
+reconcile_stats command, and after bulk writes that bypass the views.
+
+The site-wide counters per sport (SportStats) are kept from the signals
+of the counted models instead, see SPORTS below, as they change with
+every write to a player, team or ad.
+'''
+
+TEAM_COUNTERS = ['ads', 'live_ads', 'contacts', 'active_conversations', 'closed_conversations']
+AD_COUNTERS = ['contacts', 'active_conversations', 'closed_conversations', 'response_times']
+SPORT_COUNTERS = ['available_players', 'recruiting_teams', 'live_ads']
+
+
+def increment(model, pk, rebuild, **deltas):
+    updated = model.objects.filter(pk=pk).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+    if not updated:
+        rebuild([pk])
+
+
+def increment_team(team_id, **deltas):
+    increment(TeamStats, team_id, reconcile_teams, **deltas)
+
+
+def increment_ad(ad_id, **deltas):
+    increment(AdStats, ad_id, reconcile_ads, **deltas)
+
+
+def increment_sport(sport, **deltas):
+    increment(SportStats, sport, reconcile_sports, **deltas)
+    transaction.on_commit(lambda: bump_model_version(SportStats))
+
+
+#   ---------------------------------------   #
+#   ~~~~~~~~~~~~~~   EVENTS   ~~~~~~~~~~~~~   #
+#   ---------------------------------------   #
+
+
+def ad_created(ad):
+    increment_team(ad.team_id, ads=1, live_ads=1)
+    reconcile_ads([ad.pk])
+
+
+def ad_deleted(ad):
+    '''
+    Call after the ad is marked as deleted, and before its conversations
+    are closed. Its AdStats row is kept until the ad is purged.
+    '''
+    try:
+        stats = AdStats.objects.values(*AD_COUNTERS).get(pk=ad.pk)
+    except AdStats.DoesNotExist:
+        stats = ad_counts([ad.pk])[ad.pk]
+
+    increment_team(
+        ad.team_id,
+        ads=-1,
+        live_ads=0 if ad.is_expired else -1,
+        contacts=-stats['contacts'],
+        active_conversations=-stats['active_conversations'],
+        closed_conversations=-stats['closed_conversations'],
+    )
+
+
+def conversation_started(conversation):
+    increment_team(conversation.ad.team_id, contacts=1, active_conversations=1)
+    increment_ad(conversation.ad_id, contacts=1, active_conversations=1)
+
+
+def conversation_closed(conversation):
+    increment_team(conversation.ad.team_id, active_conversations=-1, closed_conversations=1)
+    increment_ad(conversation.ad_id, active_conversations=-1, closed_conversations=1)
+
+
+def conversation_deleted(conversation):
+    field = "active_conversations" if conversation.is_active else "closed_conversations"
+    increment_team(conversation.ad.team_id, contacts=-1, **{field: -1})
+    increment_ad(conversation.ad_id, contacts=-1, **{field: -1})
+
+
+def conversation_responded(conversation):
+    ''' Call when the team has replied for the first time, see AdConversation.response_time. '''
+    updated = AdStats.objects.filter(pk=conversation.ad_id).update(
+        response_times=Func(F('response_times'), Value(conversation.response_time), function="array_append")
+    )
+    if not updated:
+        reconcile_ads([conversation.ad_id])
+
+
+#   ---------------------------------------   #
+#   ~~~~~~~~~~~~   RECONCILE   ~~~~~~~~~~~~   #
+#   ---------------------------------------   #
+
+
+def conversation_counts():
+    return {
+        "contacts": Count('id'),
+        "active_conversations": Count('id', filter=Q(is_active=True)),
+        "closed_conversations": Count('id', filter=Q(is_active=False)),
+    }
+
+
+def team_counts(team_ids):
+    ''' {team_id: {counter: value}} computed from the source tables. '''
+    counts = {team_id: dict.fromkeys(TEAM_COUNTERS, 0) for team_id in team_ids}
+
+    ads = (
+        Ad.objects.filter(team_id__in=team_ids)
+        .values('team_id')
+        .annotate(ads=Count('id'), live_ads=Count('id', filter=LIVE_ADS))
+    )
+    conversations = (
+        AdConversation.objects.filter(ad__team_id__in=team_ids, ad__deleted_at__isnull=True)
+        .values('ad__team_id')
+        .annotate(**conversation_counts())
+    )
+
+    for row in ads:
+        counts[row.pop('team_id')].update(row)
+    for row in conversations:
+        counts[row.pop('ad__team_id')].update(row)
+    return counts
+
+
+def ad_counts(ad_ids):
+    ''' {ad_id: {counter: value}} computed from the source tables. '''
+    counts = {ad_id: dict(dict.fromkeys(AD_COUNTERS, 0), response_times=[]) for ad_id in ad_ids}
+
+    conversations = (
+        AdConversation.objects.filter(ad_id__in=ad_ids)
+        .values('ad_id')
+        .annotate(**conversation_counts())
+    )
+    responded = (
+        AdConversation.objects.filter(ad_id__in=ad_ids, responded_at__isnull=False)
+        .order_by('responded_at')
+        .only('ad_id', 'created_at', 'responded_at')
+    )
+
+    for row in conversations:
+        counts[row.pop('ad_id')].update(row)
+    for conversation in responded:
+        counts[conversation.ad_id]['response_times'].append(conversation.response_time)
+    return counts
+
+
+def reconcile(model, counts, fields, fix=True):
+    '''
+    Compare the stored rows with `counts` and, if fix is True, repair the
+    ones that differ and create the missing ones. Returns the pks of the
+    rows that had drifted.
+    '''
+    stored = model.objects.in_bulk(counts.keys())
+    drifted, missing = [], []
+
+    for pk, values in counts.items():
+        row = stored.get(pk)
+        if row is None:
+            missing.append(model(pk=pk, **values))
+        elif any(getattr(row, field) != values[field] for field in fields):
+            for field in fields:
+                setattr(row, field, values[field])
+            drifted.append(row)
+
+    if fix:
+        model.objects.bulk_update(drifted, fields)
+        model.objects.bulk_create(missing, ignore_conflicts=True)
+
+    return [row.pk for row in drifted + missing]
+
+
+def sport_counts(sports):
+    ''' {sport: {counter: value}} computed from the source tables. '''
+    counts = {sport: dict.fromkeys(SPORT_COUNTERS, 0) for sport in sports}
+
+    sources = [
+        ('available_players', FootballPlayer.objects.filter(is_available=True)),
+        ('recruiting_teams', Team.objects.filter(is_looking=True)),
+        ('live_ads', Ad.objects.live()),
+    ]
+    for counter, queryset in sources:
+        rows = queryset.filter(sport__in=sports).values('sport').annotate(count=Count('id'))
+        for row in rows:
+            counts[row['sport']][counter] = row['count']
+    return counts
+
+
+def reconcile_teams(team_ids, fix=True):
+    return reconcile(TeamStats, team_counts(team_ids), TEAM_COUNTERS, fix=fix)
+
+
+def reconcile_ads(ad_ids, fix=True):
+    return reconcile(AdStats, ad_counts(ad_ids), AD_COUNTERS, fix=fix)
+
+
+def reconcile_sports(sports, fix=True):
+    drifted = reconcile(SportStats, sport_counts(sports), SPORT_COUNTERS, fix=fix)
+    if fix and drifted:
+        transaction.on_commit(lambda: bump_model_version(SportStats))
+    return drifted
+
+
+#   ---------------------------------------   #
+#   ~~~~~~~~~~~~~~   SPORTS   ~~~~~~~~~~~~~   #
+#   ---------------------------------------   #
+
+
+SPORT_COUNTED_FIELDS = {
+    FootballPlayer: {'sport', 'is_available'},
+    Team: {'sport', 'is_looking', 'deleted_at'},
+    Ad: {'sport', 'is_expired', 'deleted_at'},
+}
+
+
+def sport_counter(instance):
+    ''' (sport, counter) of the SportStats counter that counts `instance`, or None. '''
+    if isinstance(instance, FootballPlayer):
+        counted, counter = instance.is_available, 'available_players'
+    elif isinstance(instance, Team):
+        counted, counter = instance.is_looking and instance.deleted_at is None, 'recruiting_teams'
+    else:
+        counted, counter = not instance.is_expired and instance.deleted_at is None, 'live_ads'
+    return (instance.sport, counter) if counted else None
+
+
+def remember_sport_counter(sender, instance, **kwargs):
+    '''
+    post_init receiver. Notes what a row loaded from the database counts
+    for, so that saving it needs no query to find out. Rows loaded with
+    some of the fields deferred are looked up on save instead.
+    '''
+    if instance.pk is not None and not SPORT_COUNTED_FIELDS[sender] & instance.get_deferred_fields():
+        instance._sport_counter = sport_counter(instance)
+
+
+def load_sport_counter(sender, instance, raw=False, **kwargs):
+    ''' pre_save receiver, for rows that post_init could not note. '''
+    if instance.pk is not None and not raw and not hasattr(instance, '_sport_counter'):
+        old = sender._base_manager.filter(pk=instance.pk).only(*SPORT_COUNTED_FIELDS[sender]).first()
+        instance._sport_counter = sport_counter(old) if old is not None else None
+
+
+def count_save(sender, instance, raw=False, **kwargs):
+    ''' post_save receiver. Moves the row between counters if it has changed. '''
+    if raw:
+        return
+    before, after = getattr(instance, '_sport_counter', None), sport_counter(instance)
+    if before != after:
+        if before is not None:
+            increment_sport(before[0], **{before[1]: -1})
+        if after is not None:
+            increment_sport(after[0], **{after[1]: 1})
+    instance._sport_counter = after
+
+
+def count_delete(sender, instance, **kwargs):
+    ''' post_delete receiver. '''
+    counter = sport_counter(instance)
+    if counter is not None:
+        increment_sport(counter[0], **{counter[1]: -1})
+
+
+def sport_stats():
+    '''
+    {sport: SportStats} for the home page, from the cache (see
+    core/cache.py), so that a view costs no aggregate query.
+    '''
+    return reference_cache.get_or_set(
+        "sport-stats",
+        [model_version_name(SportStats)],
+        lambda: {row.sport: row for row in SportStats.objects.order_by('sport')},
+    )
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from hittalaget.ads.models import Ad
+from hittalaget.stats.counters import reconcile_ads, reconcile_sports, reconcile_teams
+from hittalaget.teams.models import Team
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the team and ad dashboard counters, and the counters "
+        "per sport of the home page, from the source tables, and repair the "
+        "rows that have drifted. Run it once after deploying the counters, "
+        "and then e.g. nightly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the drift, do not repair it.",
+        )
+
+    def handle(self, *args, **options):
+        fix = not options["dry_run"]
+        self.verbosity = options["verbosity"]
+        batch_size = options["batch_size"]
+
+        teams = self.run(Team, reconcile_teams, batch_size, fix)
+        ads = self.run(Ad, reconcile_ads, batch_size, fix)
+        with transaction.atomic():
+            sports = len(reconcile_sports(Team.Sport.values, fix=fix))
+
+        self.stdout.write(self.style.SUCCESS("{} {} team rows, {} ad rows and {} sport rows.".format(
+            "Repaired" if fix else "Drift in", teams, ads, sports,
+        )))
+
+    def run(self, model, reconcile, batch_size, fix):
+        ''' Reconcile the rows of `model` in batches of ids. Returns the number of drifted rows. '''
+        ids = list(model.objects.order_by('id').values_list('id', flat=True))
+        drifted = 0
+
+        for i in range(0, len(ids), batch_size):
+            with transaction.atomic():
+                for pk in reconcile(ids[i:i + batch_size], fix=fix):
+                    drifted += 1
+                    if self.verbosity > 1:
+                        self.stdout.write("{} {}".format(model._meta.model_name, pk))
+
+        return drifted
@@ -0,0 +1,127 @@
+import datetime
+import functools
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Sum
+from django.http import Http404
+from django.http.request import split_domain_port, validate_host
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from django.utils import timezone
+from hittalaget.ads.models import Ad
+from hittalaget.players.models import FootballPlayer
+from hittalaget.stats.models import ViewCount
+from hittalaget.teams.models import Team
+from hittalaget.users.models import city_choices
+
+
+'''
+Pages are warmed by rendering their views for an anonymous visitor, in
+the worker processes, which fills the caches the views read through:
+the cached rows (reference_cache), the {% cache %} fragments and the
+feeds. Only shared caches are of any use to the web servers, so this is
+pointless with the LocMemCache used in development.
+
+The pages are rendered for the public host of the site (WARM_UP_HOST, or
+--host), as the feeds are cached with absolute links to it.
+'''
+
+DETAIL_MODELS = {
+    ViewCount.Kind.AD: Ad,
+    ViewCount.Kind.TEAM: Team,
+    ViewCount.Kind.PLAYER: FootballPlayer,
+}
+
+
+def warm_page(path, host, secure):
+    ''' Render the page at `path` on `host`. Returns the path if it rendered, else None. '''
+    domain = split_domain_port(host)[0]
+    request = RequestFactory().get(path, secure=secure, HTTP_HOST=host, SERVER_NAME=domain)
+    request.user = AnonymousUser()
+    request.is_warm_up = True  # not a view, see ViewCountMixin
+
+    match = resolve(path)
+    try:
+        response = match.func(request, *match.args, **match.kwargs)
+    except Http404:
+        return None
+    if hasattr(response, 'render'):
+        response.render()
+    return path if response.status_code == 200 else None
+
+
+def most_viewed_paths(days, limit):
+    ''' The paths of the `limit` most viewed detail pages of each kind in the last `days` days. '''
+    since = timezone.localdate() - datetime.timedelta(days=days)
+    paths = []
+
+    for kind, model in DETAIL_MODELS.items():
+        object_ids = list(
+            ViewCount.objects.filter(kind=kind, date__gte=since)
+            .values('object_id')
+            .annotate(total=Sum('count'))
+            .order_by('-total')
+            .values_list('object_id', flat=True)[:limit]
+        )
+        queryset = model.objects.filter(pk__in=object_ids)
+        if model is Ad:
+            queryset = queryset.live()
+        paths.extend(obj.get_absolute_url() for obj in queryset)
+
+    return paths
+
+
+class Command(BaseCommand):
+    help = (
+        "Prime the caches after a deploy: the cities, the first page of "
+        "the ad list and the feed of every sport, and the most viewed "
+        "detail pages."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=4, help="Number of worker processes, 1 to warm in this process.")
+        parser.add_argument("--days", type=int, default=7, help="Count the views of the last days.")
+        parser.add_argument("--limit", type=int, default=200, help="Most viewed pages to warm per kind.")
+        parser.add_argument("--host", default=settings.WARM_UP_HOST, help="Host to render the pages for.")
+        parser.add_argument("--secure", action="store_true", default=settings.WARM_UP_SECURE, help="Render the pages for https.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+
+        host = options["host"]
+        if not validate_host(split_domain_port(host)[0], settings.ALLOWED_HOSTS):
+            raise CommandError("{} is not in ALLOWED_HOSTS.".format(host))
+        warm = functools.partial(warm_page, host=host, secure=options["secure"])
+
+        city_choices()
+        warmed = ["cities"]
+
+        paths = []
+        for sport in Team.Sport.values:
+            paths.append(reverse("ad:list", kwargs={"sport": sport}))
+            paths.append(reverse("ad:feed", kwargs={"sport": sport}))
+        paths.extend(most_viewed_paths(options["days"], options["limit"]))
+
+        if options["processes"] > 1:
+            ''' The workers are forked, and must not share the connections of this process. '''
+            connections.close_all()
+            with ProcessPoolExecutor(options["processes"], mp_context=multiprocessing.get_context("fork")) as pool:
+                results = list(pool.map(warm, paths, chunksize=10))
+        else:
+            results = [warm(path) for path in paths]
+
+        for path in results:
+            if path is not None:
+                warmed.append(path)
+                if options["verbosity"] > 1:
+                    self.stdout.write(path)
+
+        self.stdout.write(self.style.SUCCESS("Warmed {} keys in {:.2f} seconds ({} failed).".format(
+            len(warmed), time.monotonic() - started, len(paths) + 1 - len(warmed),
+        )))
@@ -0,0 +1,28 @@
+# Generated by Django 3.1.14 on 2026-10-19 15:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ViewCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('ad', 'Ad'), ('team', 'Team'), ('player', 'Player')], max_length=10)),
+                ('object_id', models.PositiveIntegerField()),
+                ('date', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='viewcount',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id', 'date'), name='unique_view_count'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.1.14 on 2026-10-19 16:01
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0003_team_version'),
+        ('ads', '0007_ad_version'),
+        ('stats', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdStats',
+            fields=[
+                ('ad', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='ads.ad')),
+                ('contacts', models.IntegerField(default=0)),
+                ('active_conversations', models.IntegerField(default=0)),
+                ('closed_conversations', models.IntegerField(default=0)),
+                ('response_times', django.contrib.postgres.fields.ArrayField(base_field=models.PositiveIntegerField(), default=list, size=None)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TeamStats',
+            fields=[
+                ('team', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='teams.team')),
+                ('ads', models.IntegerField(default=0)),
+                ('live_ads', models.IntegerField(default=0)),
+                ('contacts', models.IntegerField(default=0)),
+                ('active_conversations', models.IntegerField(default=0)),
+                ('closed_conversations', models.IntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.1.14 on 2026-10-19 16:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats', '0002_team_ad_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SportStats',
+            fields=[
+                ('sport', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('available_players', models.IntegerField(default=0)),
+                ('recruiting_teams', models.IntegerField(default=0)),
+                ('live_ads', models.IntegerField(default=0)),
+            ],
+        ),
+    ]
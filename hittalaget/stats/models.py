@@ -0,0 +1,84 @@
+from django.contrib.postgres.fields import ArrayField
+from django.db import models
+
+
+class ViewCountQuerySet(models.QuerySet):
+
+    def total(self, kind, object_id):
+        ''' Total number of views for one object, all days included. '''
+        result = self.filter(kind=kind, object_id=object_id).aggregate(total=models.Sum('count'))
+        return result['total'] or 0
+
+
+class ViewCount(models.Model):
+    '''
+    Number of views per object and day. Rows are written in batches by
+    the HitBuffer in buffer.py, never once per request.
+    '''
+
+    class Kind(models.TextChoices):
+        AD = "ad"
+        TEAM = "team"
+        PLAYER = "player"
+
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    object_id = models.PositiveIntegerField()
+    date = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    objects = ViewCountQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id', 'date'], name="unique_view_count"),
+        ]
+
+    def __str__(self):
+        return "{} {} {}: {}".format(self.kind, self.object_id, self.date, self.count)
+
+
+class TeamStats(models.Model):
+    '''
+    Counters for the team dashboard. Kept up to date by the functions in
+    counters.py in the same transaction as the writes they count, and
+    repaired by the reconcile_stats command.
+    '''
+    team = models.OneToOneField('teams.Team', on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    ads = models.IntegerField(default=0)
+    live_ads = models.IntegerField(default=0)
+    contacts = models.IntegerField(default=0)
+    active_conversations = models.IntegerField(default=0)
+    closed_conversations = models.IntegerField(default=0)
+
+    def __str__(self):
+        return "{}: {} live ads, {} contacts".format(self.team_id, self.live_ads, self.contacts)
+
+
+class AdStats(models.Model):
+    ''' Counters per ad, see TeamStats. response_times are in seconds. '''
+    ad = models.OneToOneField('ads.Ad', on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    contacts = models.IntegerField(default=0)
+    active_conversations = models.IntegerField(default=0)
+    closed_conversations = models.IntegerField(default=0)
+    response_times = ArrayField(models.PositiveIntegerField(), default=list)
+
+    def __str__(self):
+        return "{}: {} contacts".format(self.ad_id, self.contacts)
+
+
+class SportStats(models.Model):
+    '''
+    Site-wide counters per sport for the home page: available players,
+    teams looking for players and live ads. Kept up to date from the
+    signals of the counted models, see counters.py, and repaired by the
+    reconcile_stats command.
+    '''
+    sport = models.CharField(max_length=255, primary_key=True)
+    available_players = models.IntegerField(default=0)
+    recruiting_teams = models.IntegerField(default=0)
+    live_ads = models.IntegerField(default=0)
+
+    def __str__(self):
+        return "{}: {} players, {} teams, {} ads".format(
+            self.sport, self.available_players, self.recruiting_teams, self.live_ads,
+        )
@@ -0,0 +1,115 @@
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError
+from django.test import TestCase
+from django.utils import timezone
+from hittalaget.stats.buffer import HitBuffer, hits
+from hittalaget.stats.models import ViewCount
+from hittalaget.teams.models import Team
+from hittalaget.users.models import City
+from unittest import mock
+
+User = get_user_model()
+
+
+class ResetHitsMixin:
+    '''
+    For tests of pages that count views: starts and ends every test with
+    an empty hit buffer, so that no hits leak between tests and no flush
+    falls due in the middle of one.
+    '''
+
+    def setUp(self):
+        super().setUp()
+        hits.reset()
+        self.addCleanup(hits.reset)
+
+
+class HitBufferTest(TestCase):
+
+    def setUp(self):
+        self.buffer = HitBuffer(flush_interval=60, max_keys=100)
+
+    def test_hits_are_buffered_until_flush(self):
+        self.buffer.add(ViewCount.Kind.AD, 1)
+        self.buffer.add(ViewCount.Kind.AD, 1)
+        self.buffer.add(ViewCount.Kind.TEAM, 1)
+        self.assertEqual(ViewCount.objects.count(), 0)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.buffer.flush(), 2)
+
+        self.assertEqual(ViewCount.objects.total(ViewCount.Kind.AD, 1), 2)
+        self.assertEqual(ViewCount.objects.total(ViewCount.Kind.TEAM, 1), 1)
+
+    def test_flush_adds_to_existing_row(self):
+        ViewCount.objects.create(kind=ViewCount.Kind.AD, object_id=1, date=timezone.localdate(), count=5)
+        self.buffer.add(ViewCount.Kind.AD, 1)
+        self.buffer.flush()
+        self.assertEqual(ViewCount.objects.get().count, 6)
+
+    def test_flush_when_max_keys_is_reached(self):
+        buffer = HitBuffer(flush_interval=60, max_keys=2)
+        buffer.add(ViewCount.Kind.AD, 1)
+        buffer.flush_if_due()
+        self.assertEqual(ViewCount.objects.count(), 0)
+        buffer.add(ViewCount.Kind.AD, 2)
+        buffer.flush_if_due()
+        self.assertEqual(ViewCount.objects.count(), 2)
+
+    def test_flush_when_interval_has_passed(self):
+        buffer = HitBuffer(flush_interval=0)
+        buffer.add(ViewCount.Kind.AD, 1)
+        self.assertEqual(ViewCount.objects.count(), 0)
+        buffer.flush_if_due()
+        self.assertEqual(ViewCount.objects.count(), 1)
+
+    def test_reset_drops_pending_hits(self):
+        self.buffer.add(ViewCount.Kind.AD, 1)
+        self.buffer.reset()
+        self.assertEqual(self.buffer.flush(), 0)
+
+    def test_failed_flush_keeps_counts(self):
+        self.buffer.add(ViewCount.Kind.AD, 1)
+        with mock.patch("hittalaget.stats.buffer.upsert", side_effect=DatabaseError):
+            self.assertEqual(self.buffer.flush(), 0)
+        self.buffer.flush()
+        self.assertEqual(ViewCount.objects.total(ViewCount.Kind.AD, 1), 1)
+
+
+class ViewCountMixinTest(ResetHitsMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.city = City.objects.create(name="Stockholm")
+        cls.user = User.objects.create_user(
+            username="anon",
+            email="anon@test.com",
+            birthday="2000-1-1",
+            city=cls.city
+        )
+        cls.team = Team.objects.create(
+            name="Hammarby IF",
+            founded=1897,
+            home="Tele2 Arena",
+            city=cls.city,
+            sport="fotboll",
+            user=cls.user,
+            level="allsvenskan",
+        )
+
+    def test_detail_view_counts_hits(self):
+        for _ in range(3):
+            self.client.get(self.team.get_absolute_url())
+        hits.flush()
+        self.assertEqual(ViewCount.objects.total(ViewCount.Kind.TEAM, self.team.pk), 3)
+
+    def test_owner_sees_view_count(self):
+        ViewCount.objects.create(kind=ViewCount.Kind.TEAM, object_id=self.team.pk, date=timezone.localdate(), count=7)
+        self.client.force_login(self.user)
+        response = self.client.get(self.team.get_absolute_url() + "~fragment/")
+        self.assertEqual(response.context['view_count'], 7)
+
+    @mock.patch.object(hits, "flush_interval", 0)
+    def test_hits_are_flushed_when_the_request_finishes(self):
+        self.client.get(self.team.get_absolute_url())
+        self.assertEqual(ViewCount.objects.total(ViewCount.Kind.TEAM, self.team.pk), 1)
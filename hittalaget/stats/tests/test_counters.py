@@ -0,0 +1,220 @@
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from hittalaget.ads.models import Ad
+from hittalaget.ads.tests.test_views import SetUpTestDataMixin
+from hittalaget.core.cache import reference_cache
+from hittalaget.conversations.models import AdConversation
+from hittalaget.deletions.cascade import delete_ad
+from hittalaget.players.models import FootballPlayer
+from hittalaget.stats.counters import reconcile_ads, reconcile_sports, reconcile_teams
+from hittalaget.stats.models import AdStats, SportStats, TeamStats
+
+import io
+
+
+class CountersTest(SetUpTestDataMixin, TestCase):
+    '''
+    Goes through the views that write ads and conversations, and checks
+    that the counters match what reconciliation computes from scratch.
+    '''
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.player = cls.create_team("spelare", cls.city).user
+        FootballPlayer.objects.create(
+            user=cls.player,
+            username=cls.player.username,
+            positions="målvakt",
+            foot="höger",
+            experience="korpen",
+            special_ability="snabb"
+        )
+
+    def create_ad_through_view(self):
+        self.client.force_login(self.user)
+        self.client.post(reverse("ad:create", kwargs={"sport": "fotboll"}), {
+            "description": "Vi söker förstärkning.",
+            "positions": "målvakt",
+            "min_experience": "korpen",
+            "special_ability": "snabb",
+        })
+        return Ad.objects.latest('created_at')
+
+    def contact(self, ad):
+        self.client.force_login(self.player)
+        self.client.post(reverse("conversation:ad_create_conversation", kwargs={"ad_id": ad.ad_id}), {"content": "Hej!"})
+        return AdConversation.objects.latest('created_at')
+
+    def reply(self, conversation):
+        self.client.force_login(self.user)
+        url = reverse("conversation:ad_create_message", kwargs={"conversation_id": conversation.conversation_id})
+        self.client.post(url, {"content": "Välkommen på träning!"})
+
+    def assertNoDrift(self):
+        self.assertEqual(reconcile_teams([self.team.pk], fix=False), [])
+        self.assertEqual(reconcile_ads(list(Ad.objects.values_list('pk', flat=True)), fix=False), [])
+
+    def test_create_ad(self):
+        ad = self.create_ad_through_view()
+        stats = TeamStats.objects.get(team=self.team)
+        self.assertEqual((stats.ads, stats.live_ads), (1, 1))
+        self.assertTrue(AdStats.objects.filter(ad=ad).exists())
+        self.assertNoDrift()
+
+    def test_contact_and_reply(self):
+        ad = self.create_ad_through_view()
+        conversation = self.contact(ad)
+        self.reply(conversation)
+        self.reply(conversation)
+
+        ad_stats = AdStats.objects.get(ad=ad)
+        self.assertEqual((ad_stats.contacts, ad_stats.active_conversations), (1, 1))
+        self.assertEqual(len(ad_stats.response_times), 1)
+        self.assertEqual(TeamStats.objects.get(team=self.team).contacts, 1)
+        self.assertNoDrift()
+
+    def test_leave_conversation(self):
+        conversation = self.contact(self.create_ad_through_view())
+        self.client.post(reverse("conversation:ad_delete", kwargs={"conversation_id": conversation.conversation_id}))
+
+        stats = TeamStats.objects.get(team=self.team)
+        self.assertEqual((stats.active_conversations, stats.closed_conversations), (0, 1))
+        self.assertNoDrift()
+
+    def test_delete_ad(self):
+        ad = self.create_ad_through_view()
+        self.contact(ad)
+        self.client.force_login(self.user)
+        self.client.post(reverse("ad:delete", kwargs={"sport": "fotboll", "ad_id": ad.ad_id, "slug": ad.slug}))
+
+        stats = TeamStats.objects.get(team=self.team)
+        self.assertEqual((stats.ads, stats.live_ads, stats.contacts), (0, 0, 0))
+        self.assertNoDrift()
+
+    def test_missing_row_is_built_from_source(self):
+        self.create_ad()
+        self.create_ad_through_view()
+        stats = TeamStats.objects.get(team=self.team)
+        self.assertEqual(stats.ads, 2)
+
+    def leave(self, user, conversation):
+        self.client.force_login(user)
+        self.client.post(reverse("conversation:ad_delete", kwargs={"conversation_id": conversation.conversation_id}))
+
+    def drop_stats(self):
+        ''' As for teams and ads from before the counters. '''
+        TeamStats.objects.all().delete()
+        AdStats.objects.all().delete()
+
+    def test_leave_conversation_without_stats_rows(self):
+        conversation = self.contact(self.create_ad_through_view())
+        self.drop_stats()
+        self.leave(self.user, conversation)
+
+        stats = TeamStats.objects.get(team=self.team)
+        self.assertEqual((stats.active_conversations, stats.closed_conversations), (0, 1))
+        self.assertNoDrift()
+
+    def test_delete_conversation_without_stats_rows(self):
+        conversation = self.contact(self.create_ad_through_view())
+        self.leave(self.user, conversation)
+        self.drop_stats()
+        self.leave(self.player, conversation)
+
+        stats = TeamStats.objects.get(team=self.team)
+        self.assertEqual((stats.contacts, stats.closed_conversations), (0, 0))
+        self.assertNoDrift()
+
+    def test_delete_ad_without_stats_rows(self):
+        ad = self.create_ad_through_view()
+        self.contact(ad)
+        self.drop_stats()
+        self.client.force_login(self.user)
+        self.client.post(reverse("ad:delete", kwargs={"sport": "fotboll", "ad_id": ad.ad_id, "slug": ad.slug}))
+
+        stats = TeamStats.objects.get(team=self.team)
+        self.assertEqual((stats.ads, stats.live_ads, stats.contacts), (0, 0, 0))
+        self.assertNoDrift()
+
+    def test_delete_ad_without_ad_stats_row(self):
+        ad = self.create_ad_through_view()
+        self.contact(ad)
+        AdStats.objects.all().delete()
+        self.client.force_login(self.user)
+        self.client.post(reverse("ad:delete", kwargs={"sport": "fotboll", "ad_id": ad.ad_id, "slug": ad.slug}))
+
+        stats = TeamStats.objects.get(team=self.team)
+        self.assertEqual((stats.contacts, stats.active_conversations, stats.closed_conversations), (0, 0, 0))
+        self.assertNoDrift()
+
+    def test_dashboard(self):
+        conversation = self.contact(self.create_ad_through_view())
+        self.reply(conversation)
+        response = self.client.get(reverse("team:stats", kwargs={"sport": "fotboll"}))
+        self.assertEqual(response.context['stats'].contacts, 1)
+        self.assertEqual(len(response.context['ads']), 1)
+        self.assertIn('median_response_time', response.context)
+
+
+class SportCountersTest(SetUpTestDataMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        reference_cache.clear()
+
+    def stats(self):
+        return SportStats.objects.get(sport="fotboll")
+
+    def assertNoDrift(self):
+        self.assertEqual(reconcile_sports(["fotboll"], fix=False), [])
+
+    def test_status_changes_are_counted(self):
+        self.client.force_login(self.user)
+        self.client.post(reverse("team:update_status", kwargs={"sport": "fotboll"}))
+        self.assertEqual(self.stats().recruiting_teams, 1)
+        self.client.post(reverse("team:update_status", kwargs={"sport": "fotboll"}))
+        self.assertEqual(self.stats().recruiting_teams, 0)
+        self.assertNoDrift()
+
+    def test_ads_are_counted(self):
+        ad = self.create_ad()
+        self.assertEqual(self.stats().live_ads, 1)
+        ad.is_expired = True
+        ad.save()
+        self.assertEqual(self.stats().live_ads, 0)
+        self.assertNoDrift()
+
+        delete_ad(self.create_ad())
+        self.assertEqual(self.stats().live_ads, 0)
+        self.assertNoDrift()
+
+    def test_home_page_runs_no_aggregate(self):
+        self.create_ad()
+        self.client.get(reverse("index"))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("index"))
+        self.assertEqual(response.context['sport_stats']["fotboll"].live_ads, 1)
+        self.assertContains(response, "1 aktiva annonser")
+
+
+class ReconcileStatsCommandTest(SetUpTestDataMixin, TestCase):
+
+    def reconcile(self, *args):
+        out = io.StringIO()
+        call_command("reconcile_stats", *args, stdout=out)
+        return out.getvalue()
+
+    def test_repairs_drift(self):
+        self.create_ad()
+        TeamStats.objects.create(team=self.team, ads=5, live_ads=5)
+
+        self.assertIn("Drift in 1 team rows", self.reconcile("--dry-run"))
+        self.assertEqual(TeamStats.objects.get(team=self.team).ads, 5)
+
+        self.assertIn("Repaired 1 team rows, 1 ad rows", self.reconcile())
+        stats = TeamStats.objects.get(team=self.team)
+        self.assertEqual((stats.ads, stats.live_ads), (1, 1))
+        self.assertIn("Repaired 0 team rows, 0 ad rows and 0 sport rows", self.reconcile())
@@ -0,0 +1,76 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from hittalaget.core.cache import reference_cache
+from hittalaget.stats.buffer import hits
+from hittalaget.stats.models import ViewCount
+from hittalaget.stats.tests.test_buffer import ResetHitsMixin
+from hittalaget.teams.models import Team
+from hittalaget.users.models import City
+
+User = get_user_model()
+
+
+@override_settings(ALLOWED_HOSTS=["hittalaget.se", "intern.hittalaget.se"])
+class WarmCachesTest(ResetHitsMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.city = City.objects.create(name="Stockholm")
+        cls.user = User.objects.create_user(
+            username="anon",
+            email="anon@test.com",
+            birthday="2000-1-1",
+            city=cls.city
+        )
+        cls.team = Team.objects.create(
+            name="Hammarby IF",
+            founded=1897,
+            home="Tele2 Arena",
+            city=cls.city,
+            sport="fotboll",
+            user=cls.user,
+            level="allsvenskan",
+        )
+        ViewCount.objects.create(kind=ViewCount.Kind.TEAM, object_id=cls.team.pk, date=timezone.localdate(), count=5)
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        reference_cache.clear()
+
+    def warm(self, host="hittalaget.se"):
+        out = StringIO()
+        call_command("warm_caches", processes=1, verbosity=2, host=host, secure=True, stdout=out)
+        return out.getvalue()
+
+    def test_most_viewed_pages_are_warmed(self):
+        output = self.warm()
+        self.assertIn(self.team.get_absolute_url(), output)
+        self.assertIn("/annonser/fotboll/", output)
+        self.assertIn("Warmed", output)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.team.get_absolute_url(), HTTP_HOST="hittalaget.se")
+        self.assertEqual(response.status_code, 200)
+
+    def test_feed_links_to_host(self):
+        self.warm()
+        response = self.client.get(reverse("ad:feed", kwargs={"sport": "fotboll"}), HTTP_HOST="intern.hittalaget.se")
+        self.assertContains(response, "https://hittalaget.se/annonser/fotboll/")
+        self.assertNotContains(response, "intern.hittalaget.se")
+        self.assertNotContains(response, "testserver")
+
+    def test_host_not_allowed(self):
+        with self.assertRaises(CommandError):
+            self.warm(host="testserver")
+
+    def test_warm_up_is_not_counted(self):
+        self.warm()
+        self.assertEqual(len(hits.pending), 0)
@@ -0,0 +1,31 @@
+from django.views.generic import TemplateView
+from .buffer import hits
+from .counters import sport_stats
+
+
+class ViewCountMixin:
+    '''
+    Count a view of self.object in the hit buffer (see buffer.py). Used by
+    the detail views of ads, teams and players. Set view_count_kind to a
+    ViewCount.Kind. The view is also noted on the response, so that the
+    micro cache (core/middleware.py) counts the copies it serves.
+    Pages rendered by the warm_caches command are not counted.
+    '''
+    view_count_kind = None
+
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        if not getattr(request, 'is_warm_up', False):
+            hits.add(self.view_count_kind, self.object.pk)
+        response.hit = (self.view_count_kind, self.object.pk)
+        return response
+
+
+class IndexView(TemplateView):
+    ''' The home page, with the counters per sport, see counters.sport_stats(). '''
+    template_name = "pages/index.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['sport_stats'] = sport_stats()
+        return context
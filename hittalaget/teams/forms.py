@@ -3,9 +3,15 @@ from django.core.exceptions import ValidationError
 from .models import Team
 from .levels import football_levels
 from django.http import HttpResponseRedirect, Http404, HttpResponse
+from hittalaget.users.models import city_choices
 import datetime
 
 
+LEVELS = {
+    "fotboll": football_levels,
+}
+
+
 class TeamForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
@@ -14,16 +20,15 @@ class TeamForm(forms.ModelForm):
 
         ''' Generate choices based on the sport passed from the view. '''
         ''' make sure there are no key error '''
-
-        level = {
-            "fotboll": football_levels,
-        }        
-        
         try:
-            self.fields['level'].widget = forms.Select(choices=level[self.sport])
+            self.fields['level'].widget = forms.Select(choices=LEVELS[self.sport])
         except KeyError:
             raise Http404()
 
+        ''' The cities are cached, instead of queried for every form. '''
+        city = self.fields['city']
+        city.choices = [("", city.empty_label)] + city_choices()
+
     class Meta:
         model = Team
         fields = ['founded', 'home', 'city', 'website', 'level']
@@ -0,0 +1,20 @@
+# Generated by Django 3.1.14 on 2026-10-19 15:49
+
+from django.contrib.postgres.operations import TrigramExtension
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0001_initial'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='team',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='team_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
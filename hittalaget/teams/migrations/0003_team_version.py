@@ -0,0 +1,18 @@
+# Generated by Django 3.1.14 on 2026-10-19 15:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0002_team_name_trgm_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='team',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
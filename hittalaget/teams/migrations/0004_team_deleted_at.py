@@ -0,0 +1,26 @@
+# Generated by Django 3.1.14 on 2026-10-19 16:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0003_team_version'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='team',
+            name='unique_team',
+        ),
+        migrations.AddField(
+            model_name='team',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='team',
+            constraint=models.UniqueConstraint(condition=models.Q(deleted_at__isnull=True), fields=('user', 'sport'), name='unique_team'),
+        ),
+    ]
@@ -1,8 +1,12 @@
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
-from hittalaget.users.models import City
+from hittalaget.core.cache import bump_versions
+from hittalaget.core.purge import purge_surrogate_keys, surrogate_key
+from hittalaget.core.versioning import bump_version, refresh_version
+from hittalaget.users.models import City, bump_owner_version
 from django.utils.text import slugify
-from django.db.models.signals import pre_save 
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.urls import reverse
 
 
@@ -10,6 +14,20 @@ def get_upload_path(instance, filename):
     return "images/teams/{}/{}".format(instance.sport, filename)
 
 
+class TeamQuerySet(models.QuerySet):
+
+    def near(self, city, distance):
+        ''' Teams within `distance` km of `city`, see CityQuerySet.near(). '''
+        return self.filter(city__in=City.objects.near(city, distance))
+
+
+class TeamManager(models.Manager.from_queryset(TeamQuerySet)):
+    ''' Hides deleted teams until they are purged, see hittalaget/deletions. '''
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Team(models.Model):
 
     class Sport(models.TextChoices):
@@ -38,15 +56,33 @@ class Team(models.Model):
         default='images/teams/default.jpg'
     )
 
+    version = models.PositiveIntegerField(default=1, editable=False)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = TeamManager()
+    all_objects = TeamQuerySet.as_manager() # includes deleted teams
+
     class Meta:
-        ''' A user can only have one team for each sport. '''
+        ''' A user can only have one team for each sport, not counting deleted ones. '''
         constraints = [
-            models.UniqueConstraint(fields=['user', 'sport'], name="unique_team"),
+            models.UniqueConstraint(
+                fields=['user', 'sport'],
+                condition=models.Q(deleted_at__isnull=True),
+                name="unique_team",
+            ),
+        ]
+        ''' Trigram index for typo tolerant search on team names (pg_trgm). '''
+        indexes = [
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name="team_name_trgm_idx"),
         ]
 
     def get_absolute_url(self):
         return reverse("team:detail", kwargs={"sport": self.sport, "team_id": self.team_id, "slug": self.slug})
 
+    def surrogate_keys(self):
+        ''' The key of the cached pages that show the team, see core/purge.py. '''
+        return [surrogate_key("team", self.pk)]
+
     def __str__(self):
         return self.name
 
@@ -59,7 +95,7 @@ def pre_save_six_digit_team_id(sender, instance, **kwargs):
     rand_id = randint(100000, 999999)
     
     if not instance.team_id: 
-        while Team.objects.filter(team_id=rand_id).exists():
+        while Team.all_objects.filter(team_id=rand_id).exists():
             rand_id = randint(100000, 999999)
         else:
             instance.team_id = rand_id
@@ -69,4 +105,12 @@ def pre_save_slugify_name(sender, instance, **kwargs):
         instance.slug = slugify(instance.name)
 
 pre_save.connect(pre_save_six_digit_team_id, sender=Team)
-pre_save.connect(pre_save_slugify_name, sender=Team)
\ No newline at end of file
+pre_save.connect(pre_save_slugify_name, sender=Team)
+pre_save.connect(bump_version, sender=Team)
+post_save.connect(refresh_version, sender=Team)
+post_save.connect(bump_versions, sender=Team)
+post_save.connect(bump_owner_version, sender=Team)
+post_delete.connect(bump_versions, sender=Team)
+post_delete.connect(bump_owner_version, sender=Team)
+post_save.connect(purge_surrogate_keys, sender=Team)
+post_delete.connect(purge_surrogate_keys, sender=Team)
\ No newline at end of file
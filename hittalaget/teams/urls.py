@@ -8,6 +8,8 @@ urlpatterns = [
   path("<str:sport>/uppdatera/", views.TeamUpdateView.as_view(), name="update"),
   path("<str:sport>/ta-bort/", views.TeamDeleteView.as_view(), name="delete"),
   path("<str:sport>/uppdatera-status/", views.UpdateTeamStatus.as_view(), name="update_status"),
+  path("<str:sport>/statistik/", views.TeamStatsView.as_view(), name="stats"),
+  path("<str:sport>/<int:team_id>/<str:slug>/~fragment/", views.TeamDetailFragmentView.as_view(), name="detail_fragment"),
   path("<str:sport>/<int:team_id>/<str:slug>/", views.TeamDetailView.as_view(), name="detail"),
 ]
 
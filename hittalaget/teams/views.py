@@ -12,6 +12,18 @@ from django.views.generic import (
 )
 from .forms import TeamForm, TeamCreateForm
 from .models import Team
+from hittalaget.users.models import City, private_user_fields
+
+import datetime
+import statistics
+from hittalaget.core.cache import model_version_name, reference_cache
+from hittalaget.core.identity import get_identity_map
+from hittalaget.core.purge import surrogate_key
+from hittalaget.core.views import CachePolicyMixin, FragmentCacheMixin, UserFragmentMixin
+from hittalaget.deletions.cascade import delete_team
+from hittalaget.stats.counters import ad_counts, team_counts
+from hittalaget.stats.models import AdStats, TeamStats, ViewCount
+from hittalaget.stats.views import ViewCountMixin
 
 
 '''
@@ -28,6 +40,18 @@ Next iteration:
 #   ---------------------------------------   #
 
 
+def get_team(request, sport):
+    '''
+    Return the logged-in user's team for the sport, or None. It is loaded
+    at most once per request, see core/identity.py, and not at all if the
+    cached user has no team for the sport, see users/cache.py.
+    '''
+    pointers = getattr(request.user, "team_pointers", None)
+    if pointers is not None and sport not in pointers:
+        return None
+    return get_identity_map(request).get(Team, user_id=request.user.pk, sport=sport)
+
+
 class TeamCheckMixin:
     '''
     Redirect to team:create page if client does not a team. Used by
@@ -55,14 +79,40 @@ class TeamCheckMixin:
 class GetObjectMixin:
     ''' Used by TeamUpdateView, TeamDeleteView, and UpdateTeamStatus. '''
     def get_object(self, queryset=None):
-        user = self.request.user
-        sport = self.kwargs['sport']
-
         if not hasattr(self, 'object'):
-            try:
-                self.object = Team.objects.get(sport=sport, user=user)
-            except Team.DoesNotExist:
-                self.object = None
+            self.object = get_team(self.request, self.kwargs['sport'])
+        return self.object
+
+
+class TeamLookupMixin:
+    '''
+    Find a team by sport, team_id and slug. Used by TeamDetailView and
+    the JSON API, which passes its own trimmed queryset. Teams found with
+    the default queryset are cached, see core/cache.py.
+    '''
+    def get_queryset(self):
+        return Team.objects.select_related('user', 'city').defer(*private_user_fields('user'))
+
+    def get_object(self, queryset=None):
+        if hasattr(self, "object"):
+            return self.object
+
+        lookup = {
+            "sport": self.kwargs['sport'],
+            "team_id": self.kwargs['team_id'],
+            "slug": self.kwargs['slug'],
+        }
+        if queryset is None:
+            key = "team:{sport}:{team_id}:{slug}".format(**lookup)
+            self.object = reference_cache.get_or_set(
+                key,
+                [model_version_name(Team), model_version_name(City)],
+                lambda: self.get_queryset().filter(**lookup).first(),
+            )
+            if self.object is None:
+                raise Http404()
+        else:
+            self.object = get_object_or_404(queryset, **lookup)
         return self.object
 
 
@@ -71,24 +121,22 @@ class GetObjectMixin:
 #   ---------------------------------------   #
 
 
-class TeamDetailView(DetailView):
+class TeamDetailView(CachePolicyMixin, TeamLookupMixin, ViewCountMixin, FragmentCacheMixin, DetailView):
+    ''' The same page for every visitor, the rest is in TeamDetailFragmentView. '''
     template_name = "teams/detail.html"
+    view_count_kind = ViewCount.Kind.TEAM
+    shared_with_users = True
 
-    def get_object(self, queryset=None):
-        sport = self.kwargs['sport']
-        team_id = self.kwargs['team_id']
-        slug = self.kwargs['slug']
-
-        if not hasattr(self, "object"):
-            obj = get_object_or_404(
-                Team.objects.select_related('user', 'city'),
-                sport=sport,
-                team_id=team_id,
-                slug=slug
-            )
-            self.object = obj
-        
-        return self.object
+    def get_fragment_dependencies(self):
+        return [self.object, self.object.user, self.object.city]
+
+    def get_surrogate_keys(self):
+        return [surrogate_key("team", self.object.pk)]
+
+
+class TeamDetailFragmentView(UserFragmentMixin, TeamLookupMixin, DetailView):
+    ''' The status, and the owner's links and view count. '''
+    template_name = "teams/detail_fragment.html"
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -97,6 +145,8 @@ class TeamDetailView(DetailView):
             context['status'] = "Ja"
         else:
             context['status'] = "Nej"
+        if obj.user == self.request.user:
+            context['view_count'] = ViewCount.objects.total(ViewCount.Kind.TEAM, obj.pk)
         return context
 
 
@@ -114,9 +164,8 @@ class TeamCreateView(CreateView):
             return redirect_to_login(request.path, reverse("user:login"))
 
         ''' Redirect to team:detail page if user already has a team. '''
-        try:
-            team = Team.objects.get(sport=sport, user=user)
-        except Team.DoesNotExist:
+        team = get_team(request, sport)
+        if team is None:
             return super().dispatch(request, *args, **kwargs)
         else:  
             return redirect(team.get_absolute_url())
@@ -159,6 +208,11 @@ class TeamUpdateView(TeamCheckMixin, GetObjectMixin, UpdateView):
 
 class TeamDeleteView(TeamCheckMixin, GetObjectMixin, DeleteView):
     template_name = "teams/delete_confirmation.html"
+
+    def delete(self, request, *args, **kwargs):
+        ''' Hide the team and its ads now, the rows are purged in the background. '''
+        delete_team(self.get_object())
+        return HttpResponseRedirect(self.get_success_url())
     
     def get_success_url(self):
         messages.success(self.request, "Laget har tagits bort!")
@@ -178,3 +232,35 @@ class UpdateTeamStatus(TeamCheckMixin, GetObjectMixin, View):
         obj.save()
         messages.success(request, "Status har uppdaterats!")
         return redirect(obj.get_absolute_url())
+
+
+class TeamStatsView(TeamCheckMixin, GetObjectMixin, DetailView):
+    '''
+    Dashboard for the owner of the team. Reads the counter rows kept by
+    stats/counters.py, so nothing is aggregated over conversations or
+    messages here. Rows that do not exist yet are computed, not saved.
+    '''
+    template_name = "teams/stats.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        team = self.object
+
+        try:
+            stats = TeamStats.objects.get(team=team)
+        except TeamStats.DoesNotExist:
+            stats = TeamStats(team=team, **team_counts([team.pk])[team.pk])
+
+        ads = list(team.ad_set.order_by('-created_at'))
+        ad_stats = AdStats.objects.in_bulk([ad.pk for ad in ads])
+        missing = [ad.pk for ad in ads if ad.pk not in ad_stats]
+        for pk, values in ad_counts(missing).items():
+            ad_stats[pk] = AdStats(pk=pk, **values)
+
+        response_times = [seconds for pk in ad_stats for seconds in ad_stats[pk].response_times]
+
+        context['stats'] = stats
+        context['ads'] = [(ad, ad_stats[ad.pk]) for ad in ads]
+        if response_times:
+            context['median_response_time'] = datetime.timedelta(seconds=int(statistics.median(response_times)))
+        return context
@@ -0,0 +1,108 @@
+import datetime
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, Concat
+from django.utils import timezone
+from hittalaget.core.cache import bump_model_version, bump_object_versions
+from hittalaget.conversations.models import AdConversation, PmConversation
+from hittalaget.deletions.cascade import delete_teams
+from hittalaget.players.models import FootballHistory, FootballPlayer
+from hittalaget.stats.models import ViewCount
+from hittalaget.teams.models import Team
+from .cache import invalidate_users
+from .models import User
+
+
+"""
+Anonymization of deleted accounts, used by the anonymize_users command.
+
+UserDeleteView only deactivates the account. Here, a batch of deactivated
+users is processed with a fixed number of set-based statements, however
+many rows they own:
+
+- player profiles and their history are deleted,
+- teams (and so their ads) are handed to the background deletion, see
+  hittalaget/deletions,
+- the users leave their conversations, and their usernames in users_arr
+  are replaced with "raderad-<id>",
+- the user row itself is scrubbed. Messages keep pointing at it, so
+  their authorship is anonymized with it.
+"""
+
+ANONYMOUS_PREFIX = "raderad-"
+ANONYMOUS_BIRTHDAY = datetime.datetime(1900, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def anonymous_username(user_id):
+  return "{}{}".format(ANONYMOUS_PREFIX, user_id)
+
+
+def replace_usernames(model, users):
+  """
+  Replace the usernames of `users` (pk, username pairs) in users_arr,
+  with one UPDATE over the conversations that contain any of them.
+  """
+  old = [username for pk, username in users]
+  new = [anonymous_username(pk) for pk, username in users]
+
+  sql = (
+    "UPDATE {table} SET users_arr = ARRAY("
+    "SELECT COALESCE(m.new, a.name) "
+    "FROM unnest(users_arr) WITH ORDINALITY AS a(name, position) "
+    "LEFT JOIN unnest(%s::varchar[], %s::varchar[]) AS m(old, new) ON m.old = a.name "
+    "ORDER BY a.position"
+    ") WHERE users_arr && %s::varchar[]"
+  ).format(table=model._meta.db_table)
+
+  with connection.cursor() as cursor:
+    cursor.execute(sql, [old, new, old])
+    return cursor.rowcount
+
+
+@transaction.atomic
+def anonymize_batch(batch_size):
+  """
+  Anonymize at most batch_size deactivated users. Users locked by another
+  run are skipped. Returns (users, rows changed).
+  """
+  users = list(
+    User.objects
+    .filter(is_active=False, deactivated_at__isnull=False, anonymized_at__isnull=True)
+    .order_by("deactivated_at")
+    .select_for_update(skip_locked=True)
+    .values_list("pk", "username")[:batch_size]
+  )
+  if not users:
+    return 0, 0
+
+  user_ids = [pk for pk, username in users]
+  players = FootballPlayer.objects.filter(user_id__in=user_ids)
+  rows = 0
+
+  rows += ViewCount.objects.filter(kind=ViewCount.Kind.PLAYER, object_id__in=players.values("pk")).delete()[0]
+  rows += FootballHistory.objects.filter(player__user_id__in=user_ids).delete()[0]
+  rows += players.delete()[0]
+  rows += delete_teams(Team.objects.filter(user_id__in=user_ids))
+
+  for model in (AdConversation, PmConversation):
+    rows += replace_usernames(model, users)
+    rows += model.users.through.objects.filter(user_id__in=user_ids).delete()[0]
+
+  user_id = Cast("id", output_field=CharField())
+  rows += User.objects.filter(pk__in=user_ids).update(
+    username=Concat(Value(ANONYMOUS_PREFIX), user_id),
+    email=Concat(Value(ANONYMOUS_PREFIX), user_id, Value("@hittalaget.invalid")),
+    first_name="",
+    last_name="",
+    birthday=ANONYMOUS_BIRTHDAY,
+    height=None,
+    password=make_password(None),
+    anonymized_at=timezone.now(),
+  )
+  invalidate_users(user_ids)
+  transaction.on_commit(lambda: bump_object_versions(User, user_ids))
+  transaction.on_commit(lambda: bump_model_version(User))
+
+  return len(users), rows
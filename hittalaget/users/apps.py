@@ -1,5 +1,17 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class UsersConfig(AppConfig):
     name = 'hittalaget.users'
+
+    def ready(self):
+        from hittalaget.teams.models import Team
+        from .cache import PLAYER_MODELS, invalidate_on_pointer_change, invalidate_on_user_change
+        from .models import User
+
+        post_save.connect(invalidate_on_user_change, sender=User)
+        post_delete.connect(invalidate_on_user_change, sender=User)
+        for model in list(PLAYER_MODELS.values()) + [Team]:
+            post_save.connect(invalidate_on_pointer_change, sender=model)
+            post_delete.connect(invalidate_on_pointer_change, sender=model)
@@ -0,0 +1,13 @@
+from django.contrib.auth.backends import ModelBackend
+from .cache import get_cached_user
+
+
+class CachedModelBackend(ModelBackend):
+  """
+  ModelBackend that loads request.user from the cached snapshot of the
+  user, see cache.py. Logging in and permissions work as in ModelBackend.
+  """
+
+  def get_user(self, user_id):
+    user = get_cached_user(user_id)
+    return user if self.user_can_authenticate(user) else None
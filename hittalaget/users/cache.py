@@ -0,0 +1,117 @@
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import OuterRef, Subquery
+from hittalaget.players.models import FootballPlayer
+from hittalaget.teams.models import Team
+from .models import City, User
+
+
+"""
+Cached snapshots of logged-in users, read by CachedModelBackend.
+
+AuthenticationMiddleware used to load request.user from the database on
+every request. Instead, the snapshot of the user is kept in the cache:
+the user row, its city, and pointers ({sport: pk}) to the user's player
+profiles and teams. Pages that only need to know whether the user has a
+profile or a team (see get_profile() and get_team()) read the pointers
+instead of running a query.
+
+The snapshot is deleted whenever one of its parts changes: on every save
+of the user (UserUpdateView, UserPasswordChangeView, deactivation, and
+update_last_login on login), when a profile or team is created or
+deleted, and explicitly by the set-based deletes that send no signals.
+"""
+
+USER_TIMEOUT = 60 * 60 * 24
+
+PLAYER_MODELS = {
+  "fotboll": FootballPlayer,
+}
+
+
+def user_key(user_id):
+  return "users:user:{}".format(user_id)
+
+
+def values(obj):
+  return [getattr(obj, field.attname) for field in obj._meta.concrete_fields]
+
+
+def pointer(queryset):
+  return Subquery(queryset.filter(user=OuterRef("pk")).values("pk")[:1])
+
+
+def make_snapshot(user_id):
+  """ Read the snapshot with one query, the pointers are subqueries. """
+  players = {sport: pointer(model.objects.all()) for sport, model in PLAYER_MODELS.items()}
+  teams = {sport: pointer(Team.objects.filter(sport=sport)) for sport in Team.Sport.values}
+
+  user = (
+    User.objects.select_related("city")
+    .annotate(**{"player_" + sport: query for sport, query in players.items()})
+    .annotate(**{"team_" + sport: query for sport, query in teams.items()})
+    .filter(pk=user_id)
+    .first()
+  )
+  if user is None:
+    return None
+
+  return {
+    "user": values(user),
+    "city": values(user.city),
+    "players": {sport: getattr(user, "player_" + sport) for sport in players if getattr(user, "player_" + sport)},
+    "teams": {sport: getattr(user, "team_" + sport) for sport in teams if getattr(user, "team_" + sport)},
+  }
+
+
+def load_snapshot(snapshot):
+  """ Build the User, with its city and pointers, without any query. """
+  user = User.from_db(DEFAULT_DB_ALIAS, [field.attname for field in User._meta.concrete_fields], snapshot["user"])
+  city = City.from_db(DEFAULT_DB_ALIAS, [field.attname for field in City._meta.concrete_fields], snapshot["city"])
+  User.city.field.set_cached_value(user, city)
+  user.player_pointers = snapshot["players"]
+  user.team_pointers = snapshot["teams"]
+  return user
+
+
+def get_cached_user(user_id):
+  """ The user with pk `user_id`, from the cache if possible, or None. """
+  key = user_key(user_id)
+  snapshot = cache.get(key)
+
+  if snapshot is None:
+    snapshot = make_snapshot(user_id)
+    if snapshot is None:
+      return None
+    cache.set(key, snapshot, USER_TIMEOUT)
+
+  return load_snapshot(snapshot)
+
+
+def invalidate_users(user_ids):
+  """
+  Delete the snapshots now, and again when the transaction commits, so
+  that a request that read the old rows meanwhile cannot keep them cached.
+  """
+  keys = [user_key(user_id) for user_id in user_ids]
+  cache.delete_many(keys)
+  transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_user(user_id):
+  invalidate_users([user_id])
+
+
+#   ---------------------------------------   #
+#   ~~~~~~~~~~~~~~   SIGNALS   ~~~~~~~~~~~~   #
+#   ---------------------------------------   #
+
+
+def invalidate_on_user_change(sender, instance, **kwargs):
+  invalidate_user(instance.pk)
+
+
+def invalidate_on_pointer_change(sender, instance, created=True, **kwargs):
+  """ Profiles and teams are only pointed to, so only creation and deletion matter. """
+  if created:
+    invalidate_user(instance.user_id)
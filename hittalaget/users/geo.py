@@ -0,0 +1,58 @@
+import math
+
+from django.db import transaction
+from .models import City, CityDistance
+
+
+EARTH_RADIUS = 6371  # km
+KM_PER_DEGREE_LATITUDE = 111.2
+
+
+def haversine(lat1, lng1, lat2, lng2):
+  """ Great-circle distance in km between two points. """
+  lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+  a = (
+    math.sin((lat2 - lat1) / 2) ** 2 +
+    math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+  )
+  return 2 * EARTH_RADIUS * math.asin(math.sqrt(a))
+
+
+def city_distances(cities, max_distance=CityDistance.MAX_DISTANCE):
+  """
+  Yield (from_id, to_id, km) for every pair of cities within max_distance,
+  in both directions. `cities` is a list of (id, latitude, longitude).
+
+  Cities are swept in latitude order, so each city is only compared to the
+  ones in the band of latitudes that can be within max_distance, instead of
+  to every other city.
+  """
+  cities = sorted(cities, key=lambda city: city[1])
+  band = max_distance / KM_PER_DEGREE_LATITUDE
+
+  for i, (from_id, lat1, lng1) in enumerate(cities):
+    for to_id, lat2, lng2 in cities[i + 1:]:
+      if lat2 - lat1 > band:
+        break
+      km = haversine(lat1, lng1, lat2, lng2)
+      if km <= max_distance:
+        km = math.ceil(km)
+        yield from_id, to_id, km
+        yield to_id, from_id, km
+
+
+def rebuild_city_distances(batch_size=5000):
+  """ Recompute the whole CityDistance table. Returns the number of rows. """
+  cities = City.objects.exclude(latitude=None).exclude(longitude=None).values_list(
+    "id", "latitude", "longitude"
+  )
+  rows = [
+    CityDistance(from_city_id=from_id, to_city_id=to_id, distance=km)
+    for from_id, to_id, km in city_distances(list(cities))
+  ]
+
+  with transaction.atomic():
+    CityDistance.objects.all().delete()
+    CityDistance.objects.bulk_create(rows, batch_size=batch_size)
+
+  return len(rows)
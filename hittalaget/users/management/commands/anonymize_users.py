@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+from hittalaget.users.anonymize import anonymize_batch
+
+
+class Command(BaseCommand):
+  help = (
+    "Anonymize deleted (deactivated) accounts in batches: delete their "
+    "player profiles and teams, and scrub their names from conversations "
+    "and the user table. Meant to be run periodically, e.g. nightly."
+  )
+
+  def add_arguments(self, parser):
+    parser.add_argument("--batch-size", type=int, default=500)
+
+  def handle(self, *args, **options):
+    start = time.monotonic()
+    total_users = total_rows = batches = 0
+
+    while True:
+      batch_start = time.monotonic()
+      users, rows = anonymize_batch(options["batch_size"])
+      if not users:
+        break
+
+      batches += 1
+      total_users += users
+      total_rows += rows
+      self.stdout.write("Batch {}: {} users, {} rows in {:.2f}s.".format(
+        batches, users, rows, time.monotonic() - batch_start,
+      ))
+
+    seconds = time.monotonic() - start
+    self.stdout.write(self.style.SUCCESS(
+      "{} users anonymized, {} rows changed in {:.2f}s ({:.0f} users/s).".format(
+        total_users, total_rows, seconds, total_users / max(seconds, 1e-6),
+      )
+    ))
@@ -0,0 +1,35 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+  help = (
+    "Delete expired sessions in batches, so that no single statement "
+    "locks a large part of django_session. Replaces clearsessions, "
+    "meant to be run periodically, e.g. nightly."
+  )
+
+  def add_arguments(self, parser):
+    parser.add_argument("--batch-size", type=int, default=5000)
+
+  def handle(self, *args, **options):
+    start = time.monotonic()
+    now = timezone.now()
+    deleted = 0
+
+    while True:
+      keys = list(
+        Session.objects
+        .filter(expire_date__lt=now)
+        .values_list("session_key", flat=True)[:options["batch_size"]]
+      )
+      if not keys:
+        break
+      deleted += Session.objects.filter(session_key__in=keys).delete()[0]
+
+    self.stdout.write(self.style.SUCCESS(
+      "{} expired sessions deleted in {:.2f}s.".format(deleted, time.monotonic() - start)
+    ))
@@ -0,0 +1,58 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from hittalaget.core.cache import bump_model_version
+from hittalaget.users.geo import rebuild_city_distances
+from hittalaget.users.models import City
+
+
+class Command(BaseCommand):
+  help = (
+    "Import city coordinates from a CSV file with the columns "
+    "name,latitude,longitude, and rebuild the city distance table."
+  )
+
+  def add_arguments(self, parser):
+    parser.add_argument("path", help="CSV file with the columns name,latitude,longitude.")
+
+  def handle(self, *args, **options):
+    try:
+      with open(options["path"], newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    except OSError as e:
+      raise CommandError(e)
+
+    cities = {city.name: city for city in City.objects.all()}
+    created, updated = [], []
+
+    for row in rows:
+      try:
+        name = row["name"].strip()
+        latitude = float(row["latitude"])
+        longitude = float(row["longitude"])
+      except (KeyError, TypeError, ValueError):
+        raise CommandError("Invalid row: {}".format(row))
+
+      city = cities.get(name)
+      if city is None:
+        city = City(name=name, latitude=latitude, longitude=longitude)
+        cities[name] = city
+        created.append(city)
+      else:
+        city.latitude = latitude
+        city.longitude = longitude
+        updated.append(city)
+
+    with transaction.atomic():
+      City.objects.bulk_create(created)
+      City.objects.bulk_update(updated, ["latitude", "longitude"])
+    bump_model_version(City)  # bulk writes send no signals, see core/cache.py
+
+    distances = rebuild_city_distances()
+
+    self.stdout.write(self.style.SUCCESS(
+      "{} cities created, {} updated, {} city distances stored.".format(
+        len(created), len(updated), distances
+      )
+    ))
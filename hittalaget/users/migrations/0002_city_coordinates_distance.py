@@ -0,0 +1,41 @@
+# Generated by Django 3.1.14 on 2026-10-19 15:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='city',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='city',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='CityDistance',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('distance', models.PositiveSmallIntegerField()),
+                ('from_city', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='users.city')),
+                ('to_city', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='users.city')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='citydistance',
+            index=models.Index(fields=['from_city', 'distance', 'to_city'], name='city_distance_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='citydistance',
+            constraint=models.UniqueConstraint(fields=('from_city', 'to_city'), name='unique_city_distance'),
+        ),
+    ]
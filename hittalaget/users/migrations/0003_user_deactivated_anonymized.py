@@ -0,0 +1,32 @@
+# Generated by Django 3.1.14 on 2026-10-19 16:05
+
+from django.db import migrations, models
+
+
+# deactivated_at is not backfilled. Accounts closed by their owners before
+# this migration cannot be told apart from accounts deactivated by an
+# admin (both only have is_active=False), so none of them are anonymized.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_city_coordinates_distance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='anonymized_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='deactivated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('anonymized_at__isnull', True), ('deactivated_at__isnull', False)), fields=['deactivated_at'], name='user_to_anonymize_idx'),
+        ),
+    ]
@@ -1,15 +1,67 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
 from django.urls import reverse
+from hittalaget.core.cache import bump_object_versions, bump_versions, model_version_name, reference_cache
+
+
+class CityQuerySet(models.QuerySet):
+
+  def near(self, city, distance):
+    """
+    Cities within `distance` km of `city` (a City or its id). Reads the
+    precomputed CityDistance rows, so it is a plain indexed lookup that
+    can be used as a subquery, e.g. Team.objects.filter(city__in=...).
+    """
+    city_id = getattr(city, "pk", city)
+    nearby = CityDistance.objects.filter(
+      from_city_id=city_id,
+      distance__lte=distance
+    ).values("to_city_id")
+    return self.filter(models.Q(id=city_id) | models.Q(id__in=nearby))
 
 
 class City(models.Model):
   name = models.CharField(max_length=50, unique=True)
+  latitude = models.FloatField(blank=True, null=True)
+  longitude = models.FloatField(blank=True, null=True)
+
+  objects = CityQuerySet.as_manager()
 
   def __str__(self):
     return self.name
 
 
+def city_choices():
+  """ (pk, name) of every city, for selects. Cached, see core/cache.py. """
+  return reference_cache.get_or_set(
+    "cities",
+    [model_version_name(City)],
+    lambda: list(City.objects.order_by("name").values_list("pk", "name")),
+  )
+
+
+class CityDistance(models.Model):
+  """
+  Precomputed distance (km, rounded up) between two cities. Only pairs
+  within MAX_DISTANCE are stored, in both directions. Rebuilt by the
+  import_cities command.
+  """
+  MAX_DISTANCE = 100
+
+  from_city = models.ForeignKey(City, on_delete=models.CASCADE, related_name="+")
+  to_city = models.ForeignKey(City, on_delete=models.CASCADE, related_name="+")
+  distance = models.PositiveSmallIntegerField()
+
+  class Meta:
+    constraints = [
+      models.UniqueConstraint(fields=["from_city", "to_city"], name="unique_city_distance"),
+    ]
+    indexes = [
+      models.Index(fields=["from_city", "distance", "to_city"], name="city_distance_idx"),
+    ]
+
+
 class User(AbstractUser):
   username = models.CharField(max_length=30, unique=True)
   first_name = models.CharField(max_length=30, verbose_name='first name')
@@ -18,6 +70,18 @@ class User(AbstractUser):
   birthday = models.DateTimeField()
   height = models.FloatField(blank=True, null=True)
   city = models.ForeignKey(City, on_delete=models.CASCADE, related_name="users")
+  deactivated_at = models.DateTimeField(null=True, blank=True) # set by UserDeleteView
+  anonymized_at = models.DateTimeField(null=True, blank=True) # set by the anonymize_users command
+
+  class Meta(AbstractUser.Meta):
+    ''' Deleted accounts that the anonymize_users command has not processed yet. '''
+    indexes = [
+      models.Index(
+        fields=["deactivated_at"],
+        condition=models.Q(deactivated_at__isnull=False, anonymized_at__isnull=True),
+        name="user_to_anonymize_idx",
+      ),
+    ]
 
   def get_absolute_url(self):
     return reverse("user:detail", kwargs={ "username": self.username })
@@ -31,4 +95,26 @@ class User(AbstractUser):
     self.email = self.email.lower()
 
 
+def private_user_fields(relation):
+  """
+  The fields of the user at `relation` (e.g. "team__user") other than its
+  id and username, to defer() in querysets whose rows are cached, so that
+  no password hashes or contact details are pickled into the cache.
+  """
+  return [
+    "{}__{}".format(relation, field.name)
+    for field in User._meta.concrete_fields
+    if field.name not in ("id", "username")
+  ]
+
+
+def bump_owner_version(sender, instance, **kwargs):
+  """ Profiles and teams are listed on their user's page. """
+  user_id = instance.user_id
+  transaction.on_commit(lambda: bump_object_versions(User, [user_id]))
+
 
+post_save.connect(bump_versions, sender=City)
+post_delete.connect(bump_versions, sender=City)
+post_save.connect(bump_versions, sender=User)
+post_delete.connect(bump_versions, sender=User)
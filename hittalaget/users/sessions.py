@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.contrib.auth import HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+
+
+"""
+Session engine (SESSION_ENGINE) that reads through the cache and writes
+behind to the database.
+
+Reads are served from the cache, and fall back to django_session on a
+miss, as in Django's cached_db engine. Writes always go to the cache,
+but reach the database at most once per SESSION_WRITE_BEHIND seconds for
+each session. Changes in between are written with the next save after
+that. New sessions, and changes to who is logged in (login, logout,
+password changes), are written through at once, so losing the cache can
+only lose recent non-auth data, never log anyone in or out.
+
+Expired rows are deleted by the clean_sessions command.
+"""
+
+
+class SessionStore(CachedDBStore):
+
+  def __init__(self, session_key=None):
+    super().__init__(session_key)
+    self._loaded_auth = (None, None)
+
+  @property
+  def db_key(self):
+    """ Present while the database copy is recent enough. """
+    return self.cache_key + ":db"
+
+  def auth(self, data):
+    return data.get(SESSION_KEY), data.get(HASH_SESSION_KEY)
+
+  def load(self):
+    data = super().load()
+    self._loaded_auth = self.auth(data)
+    return data
+
+  def save(self, must_create=False):
+    write_through = (
+      must_create
+      or self.session_key is None
+      or self.auth(self._session) != self._loaded_auth
+    )
+
+    if write_through or self._cache.add(self.db_key, True, settings.SESSION_WRITE_BEHIND):
+      super().save(must_create)
+      self._cache.set(self.db_key, True, settings.SESSION_WRITE_BEHIND)
+      self._loaded_auth = self.auth(self._session)
+    else:
+      self._cache.set(self.cache_key, self._session, self.get_expiry_age())
+
+  def delete(self, session_key=None):
+    if session_key is None and self.session_key is not None:
+      session_key = self.session_key
+    super().delete(session_key)
+    if session_key is not None:
+      self._cache.delete(self.cache_key_prefix + session_key + ":db")
@@ -0,0 +1,82 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from hittalaget.deletions.cascade import delete_team
+from hittalaget.teams.models import Team
+from hittalaget.users.backends import CachedModelBackend
+from hittalaget.users.cache import get_cached_user
+from hittalaget.users.models import City, User
+
+
+class CachedUserTest(TestCase):
+
+  @classmethod
+  def setUpTestData(cls):
+    cls.city = City.objects.create(name="Stockholm")
+    cls.user = User.objects.create_user(
+      username="anon",
+      email="anon@test.com",
+      password="test123",
+      birthday="2000-1-1",
+      city=cls.city
+    )
+
+  def setUp(self):
+    cache.clear()
+
+  def create_team(self):
+    return Team.objects.create(
+      name="Hammarby IF",
+      founded=1897,
+      home="Tele2 Arena",
+      city=self.city,
+      sport="fotboll",
+      user=self.user,
+      level="allsvenskan",
+    )
+
+  def test_user_is_loaded_once(self):
+    with self.assertNumQueries(1):
+      get_cached_user(self.user.pk)
+    with self.assertNumQueries(0):
+      user = get_cached_user(self.user.pk)
+      self.assertEqual(user, self.user)
+      self.assertEqual(user.city, self.city)
+      self.assertEqual(user.team_pointers, {})
+
+  def test_authenticated_page_does_not_load_user(self):
+    self.client.force_login(self.user)
+    self.client.get(reverse("index"))
+    with self.assertNumQueries(0):
+      response = self.client.get(reverse("index"))
+    self.assertEqual(response.context['user'], self.user)
+
+  def test_invalidated_on_save(self):
+    get_cached_user(self.user.pk)
+    self.user.first_name = "Anna"
+    self.user.save()
+    self.assertEqual(get_cached_user(self.user.pk).first_name, "Anna")
+
+  def test_invalidated_on_team_changes(self):
+    get_cached_user(self.user.pk)
+    team = self.create_team()
+    self.assertEqual(get_cached_user(self.user.pk).team_pointers, {"fotboll": team.pk})
+    delete_team(team)
+    self.assertEqual(get_cached_user(self.user.pk).team_pointers, {})
+
+  def test_inactive_user_is_not_loaded(self):
+    get_cached_user(self.user.pk)
+    self.user.is_active = False
+    self.user.save()
+    self.assertIsNone(CachedModelBackend().get_user(self.user.pk))
+
+  def test_password_change_keeps_session(self):
+    self.client.force_login(self.user)
+    self.client.get(reverse("index"))
+    self.client.post(reverse("user:password_change"), {
+      "old_password": "test123",
+      "new_password1": "nytt-losenord-123",
+      "new_password2": "nytt-losenord-123",
+    })
+    response = self.client.get(reverse("index"))
+    self.assertTrue(response.context['user'].check_password("nytt-losenord-123"))
@@ -0,0 +1,143 @@
+import io
+import os
+import tempfile
+
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+from django.urls import reverse
+from hittalaget.ads.models import Ad
+from hittalaget.conversations.models import AdConversation, AdMessage, PmConversation
+from hittalaget.players.models import FootballPlayer
+from hittalaget.teams.models import Team
+from hittalaget.users.models import City, CityDistance, User
+
+
+class ImportCitiesCommandTest(TestCase):
+
+  def write_csv(self, content):
+    f = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, encoding="utf-8")
+    f.write(content)
+    f.close()
+    self.addCleanup(os.remove, f.name)
+    return f.name
+
+  def test_import(self):
+    City.objects.create(name="Stockholm")
+    path = self.write_csv(
+      "name,latitude,longitude\n"
+      "Stockholm,59.3293,18.0686\n"
+      "Uppsala,59.8586,17.6389\n"
+    )
+    call_command("import_cities", path, stdout=open(os.devnull, "w"))
+
+    stockholm = City.objects.get(name="Stockholm")
+    self.assertEqual(stockholm.latitude, 59.3293)
+    self.assertEqual(City.objects.count(), 2)
+    self.assertEqual(CityDistance.objects.filter(from_city=stockholm).get().distance, 64)
+
+  def test_invalid_row(self):
+    path = self.write_csv("name,latitude,longitude\nStockholm,abc,18.0686\n")
+    with self.assertRaises(CommandError):
+      call_command("import_cities", path)
+
+
+class AnonymizeUsersCommandTest(TestCase):
+
+  @classmethod
+  def setUpTestData(cls):
+    cls.city = City.objects.create(name="Stockholm")
+    cls.user = cls.create_user("anon")
+    cls.other = cls.create_user("other")
+
+    FootballPlayer.objects.create(
+      user=cls.user,
+      username=cls.user.username,
+      positions="målvakt",
+      foot="höger",
+      experience="korpen",
+      special_ability="snabb"
+    )
+    team = Team.objects.create(
+      name="Hammarby IF",
+      founded=1897,
+      home="Tele2 Arena",
+      city=cls.city,
+      sport="fotboll",
+      user=cls.other,
+      level="allsvenskan",
+    )
+    cls.pm = PmConversation.objects.create(users_arr=["anon", "other"])
+    cls.pm.users.add(cls.user, cls.other)
+
+    ad = Ad.objects.create(
+      team=team,
+      description="Vi söker förstärkning.",
+      positions="målvakt",
+      min_experience="korpen",
+      special_ability="snabb",
+      sport="fotboll",
+    )
+    cls.conversation = AdConversation.objects.create(ad=ad, users_arr=["anon", "other"])
+    cls.conversation.users.add(cls.user, cls.other)
+    AdMessage.objects.create(conversation=cls.conversation, author=cls.user, content="Hej!")
+
+  @classmethod
+  def create_user(cls, username):
+    return User.objects.create_user(
+      username=username,
+      email="{}@test.com".format(username),
+      birthday="2000-1-1",
+      city=cls.city
+    )
+
+  def anonymize(self, **kwargs):
+    out = io.StringIO()
+    call_command("anonymize_users", stdout=out, **kwargs)
+    return out.getvalue()
+
+  def delete_account(self, user):
+    self.client.force_login(user)
+    self.client.post(reverse("user:delete_account"))
+
+  def test_anonymizes_deleted_account(self):
+    self.delete_account(self.user)
+    output = self.anonymize()
+
+    self.assertIn("1 users anonymized", output)
+    user = User.objects.get(pk=self.user.pk)
+    self.assertEqual(user.username, "raderad-{}".format(user.pk))
+    self.assertEqual(user.email, "raderad-{}@hittalaget.invalid".format(user.pk))
+    self.assertFalse(user.has_usable_password())
+    self.assertIsNotNone(user.anonymized_at)
+
+    self.assertFalse(FootballPlayer.objects.filter(user=user).exists())
+    self.assertEqual(AdMessage.objects.get().author, user)
+
+    for conversation in (self.pm, self.conversation):
+      conversation.refresh_from_db()
+      self.assertEqual(conversation.users_arr, [user.username, "other"])
+      self.assertEqual(list(conversation.users.all()), [self.other])
+
+  def test_deletes_teams(self):
+    self.delete_account(self.other)
+    self.anonymize()
+    self.assertFalse(Team.objects.exists())
+    self.assertEqual(Team.all_objects.count(), 1)
+
+  def test_batches_and_skips_active_users(self):
+    self.delete_account(self.user)
+    self.delete_account(self.other)
+    active = self.create_user("active")
+
+    output = self.anonymize(batch_size=1)
+    self.assertIn("Batch 2: 1 users", output)
+    self.assertIn("2 users anonymized", output)
+    self.assertIn("0 users anonymized", self.anonymize())
+
+    active.refresh_from_db()
+    self.assertEqual(active.username, "active")
+
+  def test_deactivated_without_deletion_is_kept(self):
+    self.user.is_active = False
+    self.user.save()
+    self.assertIn("0 users anonymized", self.anonymize())
@@ -1,7 +1,8 @@
 from django.test import TestCase
 from django.urls import reverse
-from hittalaget.users.models import City, User
+from hittalaget.users.models import City, CityDistance, User
 from hittalaget.users.forms import CreateUserForm
+from hittalaget.users.geo import haversine, rebuild_city_distances
 
 
 class CityModelTest(TestCase):
@@ -14,6 +15,38 @@ class CityModelTest(TestCase):
     self.assertTrue(self.city, "Stockholm")
 
 
+class CityDistanceTest(TestCase):
+
+  @classmethod
+  def setUpTestData(cls):
+    cls.stockholm = City.objects.create(name="Stockholm", latitude=59.3293, longitude=18.0686)
+    cls.uppsala = City.objects.create(name="Uppsala", latitude=59.8586, longitude=17.6389)
+    cls.norrtalje = City.objects.create(name="Norrtälje", latitude=59.7580, longitude=18.7049)
+    cls.goteborg = City.objects.create(name="Göteborg", latitude=57.7089, longitude=11.9746)
+    cls.unknown = City.objects.create(name="Okänd")
+    rebuild_city_distances()
+
+  def test_haversine(self):
+    km = haversine(59.3293, 18.0686, 57.7089, 11.9746)
+    self.assertAlmostEqual(km, 398, delta=2)
+
+  def test_only_pairs_within_max_distance_are_stored(self):
+    self.assertFalse(CityDistance.objects.filter(from_city=self.stockholm, to_city=self.goteborg).exists())
+    self.assertTrue(CityDistance.objects.filter(from_city=self.stockholm, to_city=self.uppsala).exists())
+    self.assertTrue(CityDistance.objects.filter(from_city=self.uppsala, to_city=self.stockholm).exists())
+    self.assertEqual(CityDistance.objects.count(), 6)
+
+  def test_near(self):
+    self.assertEqual(set(City.objects.near(self.stockholm, 60)), {self.stockholm, self.norrtalje})
+    self.assertEqual(
+      set(City.objects.near(self.stockholm.id, 100)),
+      {self.stockholm, self.norrtalje, self.uppsala}
+    )
+
+  def test_near_without_coordinates(self):
+    self.assertEqual(list(City.objects.near(self.unknown, 100)), [self.unknown])
+
+
 class UserModelTest(TestCase):
 
   @classmethod
@@ -0,0 +1,75 @@
+import datetime
+import os
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from hittalaget.users.sessions import SessionStore
+
+
+class SessionStoreTest(TestCase):
+
+  def setUp(self):
+    cache.clear()
+
+  def db_data(self, session):
+    return SessionStore().decode(Session.objects.get(pk=session.session_key).session_data)
+
+  def test_changes_are_written_behind(self):
+    session = SessionStore()
+    session["a"] = 1
+    session.save()
+
+    session = SessionStore(session.session_key)
+    session["a"] = 2
+    session.save()
+
+    self.assertEqual(SessionStore(session.session_key)["a"], 2)
+    self.assertEqual(self.db_data(session)["a"], 1)
+
+    cache.delete(session.db_key)
+    session = SessionStore(session.session_key)
+    session["a"] = 3
+    session.save()
+    self.assertEqual(self.db_data(session)["a"], 3)
+
+  def test_login_is_written_through(self):
+    session = SessionStore()
+    session["a"] = 1
+    session.save()
+
+    session = SessionStore(session.session_key)
+    session["_auth_user_id"] = "1"
+    session["_auth_user_hash"] = "abc"
+    session.save()
+    self.assertEqual(self.db_data(session)["_auth_user_id"], "1")
+
+  def test_read_falls_back_to_database(self):
+    session = SessionStore()
+    session["a"] = 1
+    session.save()
+    cache.clear()
+    self.assertEqual(SessionStore(session.session_key)["a"], 1)
+
+  def test_delete(self):
+    session = SessionStore()
+    session["a"] = 1
+    session.save()
+    session_key = session.session_key
+    session.flush()
+    self.assertFalse(Session.objects.exists())
+    self.assertFalse(SessionStore().exists(session_key))
+
+
+class CleanSessionsCommandTest(TestCase):
+
+  def test_deletes_expired_sessions(self):
+    now = timezone.now()
+    for i in range(5):
+      Session.objects.create(session_key="old{}".format(i), session_data="", expire_date=now - datetime.timedelta(days=1))
+    Session.objects.create(session_key="new", session_data="", expire_date=now + datetime.timedelta(days=1))
+
+    call_command("clean_sessions", "--batch-size", "2", stdout=open(os.devnull, "w"))
+    self.assertEqual(list(Session.objects.values_list("session_key", flat=True)), ["new"])
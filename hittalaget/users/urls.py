@@ -12,5 +12,6 @@ urlpatterns = [
   path('ta-bort-konto/', views.UserDeleteView.as_view(), name="delete_account"),
   path('byt-losenord/', views.UserPasswordChangeView.as_view(), name="password_change"),
   path('~redirect/', views.UserRedirectView.as_view(), name="redirect"),
+  path('~navigation/', views.UserNavigationView.as_view(), name="navigation"),
   path('<username>/', views.UserDetailView.as_view(), name="detail"),
 ]
\ No newline at end of file
@@ -6,16 +6,20 @@ from django.core.exceptions import PermissionDenied
 from django.http import HttpResponseRedirect, Http404
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
+from django.utils import timezone
 from django.views.generic import (
     CreateView,
     DeleteView,
     DetailView,
     FormView,
     RedirectView,
+    TemplateView,
     UpdateView,
 )
 from .forms import CreateUserForm, UpdateUserForm
 from hittalaget.conversations.forms import PmMessageForm
+from hittalaget.core.views import FragmentCacheMixin, UserFragmentMixin
+from hittalaget.deletions.cascade import delete_teams
 
 User = get_user_model()
 
@@ -61,9 +65,13 @@ class UserCreateView(CreateView):
         return reverse("user:detail", kwargs={"username": user.username})
 
 
-class UserDetailView(DetailView):
+class UserDetailView(FragmentCacheMixin, DetailView):
     template_name = "users/detail.html"
 
+    def get_fragment_dependencies(self):
+        """ Profiles and teams bump the version of their user. """
+        return [self.object, self.object.city]
+
     def dispatch(self, request, *args, **kwargs):
         user = self.get_object()
         if user.is_active:
@@ -114,6 +122,11 @@ class UserRedirectView(LoginRequiredMixin, RedirectView):
         return reverse("user:detail", kwargs={"username": user.username})
 
 
+class UserNavigationView(UserFragmentMixin, TemplateView):
+    """ The login links and messages at the top of every page, see base.html. """
+    template_name = "users/navigation.html"
+
+
 class UserUpdateView(LoginRequiredMixin, UpdateView):
     template_name = "users/update.html"
     form_class = UpdateUserForm
@@ -135,7 +148,11 @@ class UserDeleteView(LoginRequiredMixin, DeleteView):
     def delete(self, request, *args, **kwargs):
         user = request.user
         user.is_active = False
+        user.deactivated_at = timezone.now()
         user.save()
+        ''' Hide the user's teams and ads now. They are purged, and the
+        account anonymized, in the background (see anonymize_users). '''
+        delete_teams(user.teams.all())
         logout(request)
         return HttpResponseRedirect(self.get_success_url())
     